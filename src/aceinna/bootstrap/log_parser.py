@@ -1,10 +1,26 @@
 import os
 import sys
+import time
 from ctypes import *
 from ..models import LogParserArgs
 from ..framework.constants import APP_TYPE
 from ..framework.context import APP_CONTEXT
 from ..framework.utils import resource
+from ..framework.columnar_storage import is_columnar_format
+from ..tools.parse_jobs import (
+    collect_files, filter_time_window, build_result, run_parse_jobs)
+from ..tools import openrtk_parse
+from ..tools import rtkl_parse
+
+# decoder lib loaded in current process, lib path -> lib
+LOADED_LIBS = {}
+# the decoder lib only exports csv of whole files, columnar export and time
+# window parse of these log types are done by the python parsers with output
+# packets of the device setting
+PYTHON_PARSE_SETTING_FILES = {
+    'openrtk': os.path.join('RTK_INS', 'openrtk.json'),
+    'rtkl': os.path.join('RTK_INS', 'RTK330L.json')
+}
 
 
 def prepare_lib_folder():
@@ -41,22 +57,86 @@ def prepare_lib_folder():
     return lib_path
 
 
-def do_parse(log_type, folder_path, kml_rate, dr_parse):
+def parse_gps_time(value):
+    '''
+    Parse GPS time of a time window, the value is 'week,tow' or 'tow' in
+    seconds. Return (week, tow), week is None if it is not given.
+    '''
+    if value is None:
+        return None
+    parts = value.split(',')
+    if len(parts) == 1:
+        return None, float(parts[0])
+    if len(parts) == 2:
+        return int(parts[0]), float(parts[1])
+    raise ValueError('GPS time {0} should be week,tow or tow'.format(value))
+
+
+def is_log_file(fname):
+    return (fname.startswith('user') and fname.endswith('.bin')) or (fname.startswith('ins_save') and fname.endswith('.bin'))
+
+
+def decode_file(lib_path, log_type, file_path, kml_rate, dr_parse):
+    '''
+    Decode one log file with the decoder lib, return the parse result
+    '''
+    start_time = time.time()
+    try:
+        lib = LOADED_LIBS.get(lib_path)
+        if lib is None:
+            lib = LOADED_LIBS[lib_path] = CDLL(lib_path)
+
+        if log_type == 'openrtk':
+            lib.decode_openrtk_user(bytes(file_path, encoding='utf8'))
+        if log_type == 'rtkl':
+            lib.decode_openrtk_inceptio(
+                bytes(file_path, encoding='utf8'))
+        if log_type == 'ins401':
+            lib.decode_ins401(bytes(file_path, encoding='utf8'), bytes(
+                dr_parse, encoding='utf8'), kml_rate)
+    except Exception as ex:  # pylint: disable=broad-except
+        return build_result(file_path, start_time, error=str(ex))
+
+    # the decoder lib does not report packet count
+    return build_result(file_path, start_time)
+
+
+def do_parse(log_type, folder_path, kml_rate, dr_parse, jobs=1, export_format='csv',
+             time_window=None):
+    '''
+    Parse log files under folder. time_window is (start, end) GPS time, the
+    segments of raw logs out of it are skipped, and the python parsers only
+    parse the packets in it.
+    '''
+    if is_columnar_format(export_format) or \
+            (time_window is not None and log_type in PYTHON_PARSE_SETTING_FILES):
+        return do_python_parse(log_type, folder_path, kml_rate, jobs, export_format,
+                               time_window)
+
     lib_path = prepare_lib_folder()
 
-    lib = CDLL(lib_path)
-    for root, _, file_name in os.walk(folder_path):
-        for fname in file_name:
-            if (fname.startswith('user') and fname.endswith('.bin')) or (fname.startswith('ins_save') and fname.endswith('.bin')):
-                file_path = os.path.join(folder_path, fname)
-                if log_type == 'openrtk':
-                    lib.decode_openrtk_user(bytes(file_path, encoding='utf8'))
-                if log_type == 'rtkl':
-                    lib.decode_openrtk_inceptio(
-                        bytes(file_path, encoding='utf8'))
-                if log_type == 'ins401':
-                    lib.decode_ins401(bytes(file_path, encoding='utf8'), bytes(
-                        dr_parse, encoding='utf8'), kml_rate)
+    file_paths = filter_time_window(
+        collect_files(folder_path, is_log_file), time_window)
+    file_args = [(lib_path, log_type, file_path, kml_rate, dr_parse)
+                 for file_path in file_paths]
+
+    return run_parse_jobs(decode_file, file_args, jobs)
+
+
+def do_python_parse(log_type, folder_path, kml_rate, jobs, export_format,
+                    time_window=None):
+    setting_file = PYTHON_PARSE_SETTING_FILES.get(log_type)
+    if setting_file is None:
+        raise ValueError(
+            'Export format {0} is not supported for {1} log'.format(export_format, log_type))
+
+    if log_type == 'openrtk':
+        return openrtk_parse.do_parse(
+            folder_path, kml_rate, setting_file, streaming=True, jobs=jobs,
+            export_format=export_format, time_window=time_window)
+    return rtkl_parse.do_parse(
+        folder_path, kml_rate, setting_file, jobs=jobs, export_format=export_format,
+        time_window=time_window)
 
 
 class LogParser:
@@ -76,7 +156,10 @@ class LogParser:
         do_parse(self._options.log_type,
                  self._options.path,
                  self._options.kml_rate,
-                 self._options.powerdr)
+                 self._options.powerdr,
+                 self._options.jobs,
+                 self._options.export_format,
+                 self._build_time_window())
 
         os._exit(1)
 
@@ -87,5 +170,12 @@ class LogParser:
                 raise ValueError(
                     'Parameter {0} should have a value'.format(attr_name))
 
+    def _build_time_window(self):
+        start = parse_gps_time(self._options.time_from)
+        end = parse_gps_time(self._options.time_to)
+        if start is None and end is None:
+            return None
+        return start, end
+
     def _build_options(self, **options):
         self._options = LogParserArgs(**options)
@@ -37,6 +37,10 @@ class PacketStatistics:
     _failure_collect_dict = {}
     _last_statistics = None
     _last_time = None
+    _log_sinks = []
+    _receive_caches = []
+    _parse_latencies = []
+    _data_logs = []
 
     def _get_packet_types(self):
         packet_types_in_success = self._packet_collect_dict.keys()
@@ -96,9 +100,98 @@ class PacketStatistics:
 
             self._failure_collect_dict[packet_type] += 1
 
+    def add_log_sink(self, log_sink):
+        ''' Add a log sink, its queue depth and drops are in log sink result
+        '''
+        if log_sink not in self._log_sinks:
+            self._log_sinks.append(log_sink)
+
+    def get_log_sink_result(self):
+        ''' Get queue depth, written and dropped counters of log sinks
+        '''
+        if len(self._log_sinks) == 0:
+            return None
+
+        result = {}
+        for log_sink in self._log_sinks:
+            result[log_sink.name] = log_sink.get_statistics()
+        return result
+
+    def add_receive_cache(self, receive_cache):
+        ''' Add a receive cache of communicator, its received and dropped
+            packets are in receive cache result. It replaces the cache of a
+            communicator created before
+        '''
+        for index, item in enumerate(self._receive_caches):
+            if item.name == receive_cache.name:
+                self._receive_caches[index] = receive_cache
+                return
+        self._receive_caches.append(receive_cache)
+
+    def get_receive_cache_result(self):
+        ''' Get received, dropped counters and high-water mark of receive
+            caches
+        '''
+        if len(self._receive_caches) == 0:
+            return None
+
+        result = {}
+        for receive_cache in self._receive_caches:
+            result[receive_cache.name] = receive_cache.get_statistics()
+        return result
+
+    def add_parse_latency(self, parse_latency):
+        ''' Add the parse latency of a message center. It replaces the
+            latency of a message center created before
+        '''
+        for index, item in enumerate(self._parse_latencies):
+            if item.name == parse_latency.name:
+                self._parse_latencies[index] = parse_latency
+                return
+        self._parse_latencies.append(parse_latency)
+
+    def get_parse_latency_result(self):
+        ''' Get latency in seconds from data is read to continuous message
+            is parsed
+        '''
+        if len(self._parse_latencies) == 0:
+            return None
+
+        result = {}
+        for parse_latency in self._parse_latencies:
+            result[parse_latency.name] = parse_latency.get_statistics()
+        return result
+
+    def add_data_log(self, data_log):
+        ''' Add a data log, its rows and bytes are in data log result. It
+            replaces the data log of the same name started before
+        '''
+        for index, item in enumerate(self._data_logs):
+            if item.name == data_log.name:
+                self._data_logs[index] = data_log
+                return
+        self._data_logs.append(data_log)
+
+    def get_data_log_result(self):
+        ''' Get rows, bytes and the rates per second of data logs
+        '''
+        if len(self._data_logs) == 0:
+            return None
+
+        result = {}
+        for data_log in self._data_logs:
+            result[data_log.name] = data_log.get_log_statistics()
+        return result
+
     def reset(self):
         ''' Reset statistics
         '''
+        for receive_cache in self._receive_caches:
+            receive_cache.reset_statistics()
+
+        for parse_latency in self._parse_latencies:
+            parse_latency.reset_statistics()
+
         for packet_type in self._packet_collect_dict:
             self._packet_collect_dict[packet_type]['received'] = 0
             self._packet_collect_dict[packet_type]['rate'] = 0
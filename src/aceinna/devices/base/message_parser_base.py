@@ -10,6 +10,9 @@ class MessageParserBase(EventBase):
 
     properties = None
     run_command = ''
+    # responses could be matched to pipelined commands, by the packet type
+    # and payload key of 0x5555 commands
+    supports_pipeline = False
 
     def __init__(self, configuration):
         super(MessageParserBase, self).__init__()
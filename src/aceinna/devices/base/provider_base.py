@@ -12,6 +12,7 @@ from . import EventBase
 from ...framework.context import APP_CONTEXT
 from ...framework.utils import (helper, resource)
 from ...framework.file_storage import FileLoger
+from ...framework.rotating_log import RotatingLogFile
 from ...framework.configuration import get_config
 from ...framework.ans_platform_api import AnsPlatformAPI
 from ...framework.progress_bar import ProgressBar
@@ -119,9 +120,18 @@ class OpenDeviceBase(EventBase):
         if not self._message_center:
             self._message_center = DeviceMessageCenter(self.communicator)
 
+        self._message_center.set_pipeline_window(
+            getattr(self.cli_options, 'command_window', 1) or 1)
+        self._message_center.set_parse_batch_size(
+            getattr(self.cli_options, 'parse_batch_size', 1) or 1)
+        APP_CONTEXT.statistics.add_parse_latency(self._message_center.latency)
+
         if not self._message_center.is_ready():
+            use_buffer_framer = getattr(
+                self.cli_options, 'buffer_framer', False)
             parser = ParserManager.build(
-                self.type, self.communicator.type, self.properties)
+                self.type, self.communicator.type, self.properties,
+                use_buffer_framer=use_buffer_framer)
             self._message_center.set_parser(parser)
             self._message_center.on(EVENT_TYPE.CONTINUOUS_MESSAGE,
                                     self.on_receive_continuous_messsage)
@@ -145,13 +155,16 @@ class OpenDeviceBase(EventBase):
         self.load_properties()
         self._logger = FileLoger(self.properties)
         self.cli_options = options
+        APP_CONTEXT.log_sink.set_policy(
+            getattr(self.cli_options, 'log_policy', 'block') or 'block')
 
         with_data_log = options and options.with_data_log
 
         self._setup_message_center()
 
         if with_data_log and not self.is_logging and self.enable_data_log:
-            log_result = self._logger.start_user_log('data')
+            log_result = self._logger.start_user_log(
+                'data', log_format=self._get_data_log_format())
             if log_result == 1 or log_result == 2:
                 raise Exception('Cannot start data logger')
             self.is_logging = True
@@ -363,13 +376,29 @@ class OpenDeviceBase(EventBase):
         with_data_log = options and options.with_data_log
 
         if with_data_log and not self.is_logging and self.enable_data_log:
-            log_result = self._logger.start_user_log('data')
+            log_result = self._logger.start_user_log(
+                'data', log_format=self._get_data_log_format())
             if log_result == 1 or log_result == 2:
                 raise Exception('Cannot start data logger')
             self.is_logging = True
 
         self.after_upgrade_completed()
 
+    def _get_data_log_format(self):
+        return getattr(self.cli_options, 'data_log_format', 'csv') or 'csv'
+
+    def open_raw_log(self, file_path, indexer=None):
+        '''
+        Open a raw log, which is rotated by the max size and time in cli
+        options. An index sidecar is saved with each segment.
+        '''
+        max_size = getattr(self.cli_options, 'raw_log_max_size', 0) or 0
+        max_time = getattr(self.cli_options, 'raw_log_max_time', 0) or 0
+        return RotatingLogFile(APP_CONTEXT.log_sink, file_path,
+                               max_size=max_size * 1024 * 1024,
+                               max_duration=max_time * 60,
+                               indexer=indexer)
+
     def start_data_log(self, *args):
         '''
         Start to log
@@ -380,7 +409,8 @@ class OpenDeviceBase(EventBase):
         if self._logger is None:
             self._logger = FileLoger(self.properties)
 
-        log_result = self._logger.start_user_log('data')
+        log_result = self._logger.start_user_log(
+            'data', log_format=self._get_data_log_format())
         if log_result == 1 or log_result == 2:
             raise Exception('Cannot start data logger')
         self.is_logging = True
@@ -445,3 +475,16 @@ class OpenDeviceBase(EventBase):
         return {
             'packetType': 'success'
         }
+
+    def get_statistics(self, *args):
+        ''' Get parse latency, data log, log sink and receive cache statistics
+        '''
+        return {
+            'packetType': 'statistics',
+            'data': {
+                'parseLatency': APP_CONTEXT.statistics.get_parse_latency_result(),
+                'dataLog': APP_CONTEXT.statistics.get_data_log_result(),
+                'logSink': APP_CONTEXT.statistics.get_log_sink_result(),
+                'receiveCache': APP_CONTEXT.statistics.get_receive_cache_result()
+            }
+        }
@@ -15,6 +15,7 @@ from ...framework.utils import (
 from ...framework.context import APP_CONTEXT
 from ...framework.utils.firmware_parser import parser as firmware_content_parser
 from ...framework.utils.print import (print_green, print_yellow, print_red)
+from ...framework.rotating_log import PacketIndexer
 from ..base import OpenDeviceBase
 from ..configs.openrtk_predefine import (
     APP_STR, get_openrtk_products, get_configuratin_file_mapping
@@ -306,8 +307,10 @@ class RTKProviderBase(OpenDeviceBase):
                         elif x['name'] == 'GNSS':
                             rtcm_port = x["value"]
 
-            self.user_logf = open(os.path.join(
-                self.rtk_log_file_name, 'user_{0}.bin'.format(formatted_file_time)), "wb")
+            self.user_logf = self.open_raw_log(
+                os.path.join(self.rtk_log_file_name,
+                             'user_{0}.bin'.format(formatted_file_time)),
+                PacketIndexer(self.properties['userMessages']['outputPackets']))
 
             if rtcm_port != '':
                 print_green('{0} log GNSS UART {1}'.format(
@@ -315,9 +318,9 @@ class RTKProviderBase(OpenDeviceBase):
                 self.rtcm_serial_port = serial.Serial(
                     rtcm_port, '460800', timeout=0.1)
                 if self.rtcm_serial_port.isOpen():
-                    self.rtcm_logf = open(
+                    self.rtcm_logf = self.open_raw_log(
                         os.path.join(self.rtk_log_file_name, 'rtcm_rover_{0}.bin'.format(
-                            formatted_file_time)), "wb")
+                            formatted_file_time)))
                     thead = threading.Thread(
                         target=self.thread_rtcm_port_receiver, args=(self.rtk_log_file_name,))
                     thead.start()
@@ -328,9 +331,9 @@ class RTKProviderBase(OpenDeviceBase):
                 self.debug_serial_port = serial.Serial(
                     debug_port, '460800', timeout=0.1)
                 if self.debug_serial_port.isOpen():
-                    self.debug_logf = open(
+                    self.debug_logf = self.open_raw_log(
                         os.path.join(self.rtk_log_file_name, 'rtcm_base_{0}.bin'.format(
-                            formatted_file_time)), "wb")
+                            formatted_file_time)))
                     thead = threading.Thread(
                         target=self.thread_debug_port_receiver, args=(self.rtk_log_file_name,))
                     thead.start()
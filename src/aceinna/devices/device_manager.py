@@ -37,6 +37,16 @@ def create_provider(device_type, communicator):
     return None
 
 
+def build_fingerprint(ping_info):
+    '''
+    Fingerprint of a device from its ping response, to validate the
+    cached device of a port
+    '''
+    return '{0}|{1}|{2}'.format(
+        ping_info['device_type'], ping_info['device_info'],
+        ping_info['app_info'])
+
+
 class DeviceManager:
     '''
     Manage devices
@@ -75,6 +85,7 @@ class DeviceManager:
 
         format_device_info = provider.bind_device_info(
             device_access, device_info, app_info)
+        provider.fingerprint = build_fingerprint(ping_info)
 
         print_green(format_device_info)
 
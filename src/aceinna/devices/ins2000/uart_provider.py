@@ -129,7 +129,7 @@ class Provider(OpenDeviceBase):
                 "%Y_%m_%d_%H_%M_%S", time.localtime())
             file_name = self.data_folder_path + '/' + 'ins2000_log_' + dir_time
             os.mkdir(file_name)
-            self.raw_log_file = open(
+            self.raw_log_file = APP_CONTEXT.log_sink.open(
                 file_name + '/' + 'raw_' + file_time + '.bin', "wb")
 
         # self.communicator.flushInput()
@@ -4,15 +4,21 @@ import uuid
 import threading
 import datetime
 import time
+import heapq
 
 from aceinna.framework.context import APP_CONTEXT
 from .base import EventBase
 from ..framework.utils import helper
 from ..framework.constants import INTERFACES
 if sys.version_info[0] > 2:
-    from queue import Queue
+    from queue import Queue, Empty
 else:
-    from Queue import Queue
+    from Queue import Queue, Empty
+
+# max seconds the parser thread blocks on data queue before checking status
+PARSER_WAIT_TIMEOUT = 0.1
+# seconds to wait after an empty read which is returned without blocking
+RECEIVER_IDLE_INTERVAL = 0.001
 
 
 class EVENT_TYPE:
@@ -25,6 +31,62 @@ class EVENT_TYPE:
     CRC_FAILURE = 'crc_failure'
 
 
+# response payload starts with the same key of request payload,
+# packet type -> key length
+PIPELINE_PAYLOAD_KEY_LENGTH = {
+    'gP': 4,  # paramId
+    'RE': 3,  # EEPROM start address and word length
+}
+
+
+def build_pipeline_key(packet_type, payload):
+    '''
+    Build the key to match a response with the in-flight request
+    '''
+    key_length = PIPELINE_PAYLOAD_KEY_LENGTH.get(packet_type)
+    if key_length is None or payload is None or len(payload) < key_length:
+        return (packet_type,)
+    return (packet_type, tuple(payload[0:key_length]))
+
+
+class ParseLatency(object):
+    '''
+    Latency from the data is read to the continuous message is emitted
+    '''
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset_statistics()
+
+    def collect(self, latency):
+        with self._lock:
+            self._count += 1
+            self._total += latency
+            self._last = latency
+            self._max = max(self._max, latency)
+
+    def reset_statistics(self):
+        ''' Reset collected latency
+        '''
+        with self._lock:
+            self._count = 0
+            self._total = 0
+            self._last = 0
+            self._max = 0
+
+    def get_statistics(self):
+        ''' Get latency result in seconds
+        '''
+        with self._lock:
+            return {
+                'count': self._count,
+                'last': self._last,
+                'average': self._total / self._count if self._count else 0,
+                'max': self._max
+            }
+
+
 class DeviceMessage(EventBase):
     def __init__(self, message_center, command, timeout=1):
         super(DeviceMessage, self).__init__()
@@ -37,14 +99,34 @@ class DeviceMessage(EventBase):
         self._start_time = None
         self._timeout = timeout
         self._is_finished = False
+        self._finish_lock = threading.Lock()
+        self._finished_event = threading.Event()
 
     def send(self):
         self._message_center.request_run(self)
 
     def finish(self, **kwargs):
-        if not self._is_finished:
+        with self._finish_lock:
+            if self._is_finished:
+                return
             self._is_finished = True
-            self.emit('finished', **kwargs)
+
+        self.result = {
+            'packet_type': kwargs.get('packet_type'),
+            'data': kwargs.get('data'),
+            'error': kwargs.get('error'),
+            'raw': kwargs.get('raw')
+        }
+        self.emit('finished', **kwargs)
+        self._finished_event.set()
+
+    def wait(self, timeout=None):
+        '''
+        Block until the message is finished by a response or timeout check,
+        return the result, or None if it is not finished in timeout
+        '''
+        self._finished_event.wait(timeout)
+        return self.result
 
     def set_status(self, status):
         self._status = status
@@ -70,7 +152,7 @@ class DeviceMessageCenter(EventBase):
     Device message center, it handles status of message, and also work as a message factory
     '''
 
-    def __init__(self, communicator):
+    def __init__(self, communicator, pipeline_window=1):
         super(DeviceMessageCenter, self).__init__()
         self.threads = []
         self._communicator = communicator
@@ -78,8 +160,7 @@ class DeviceMessageCenter(EventBase):
         self._is_pause = False
         self._receiving = False
         self._has_exception = False
-        self.data_queue = Queue()  # data container
-        self.data_lock = threading.Lock()
+        self.data_queue = Queue()  # data container, item is (read time, data)
         self.exception_lock = threading.Lock()
         self._is_running = False
         self.prerun_queue = Queue()
@@ -90,6 +171,16 @@ class DeviceMessageCenter(EventBase):
         self._last_timeout_command = None
         self._run_id = None
         self.loop = None
+        self._pipeline_window = 1
+        self._requested_pipeline_window = 1
+        self._pipeline_lock = threading.RLock()
+        self._pipeline_seq = 0
+        self._inflight_messages = []
+        self._timeout_heap = []
+        self.set_pipeline_window(pipeline_window)
+        self._parse_batch_size = 1
+        self._analysing_read_time = None
+        self.latency = ParseLatency(getattr(communicator, 'type', 'device'))
 
     @property
     def paused(self):
@@ -104,6 +195,7 @@ class DeviceMessageCenter(EventBase):
 
     def set_parser(self, parser):
         self._parser = parser
+        self._update_pipeline_window()
         self._parser.on('crc_failure', self.on_crc_failure)
         self._parser.on('command', self.on_command_receive)
         self._parser.on('continuous_message',
@@ -112,10 +204,45 @@ class DeviceMessageCenter(EventBase):
     def get_parser(self):
         return self._parser
 
+    @property
+    def pipeline_window(self):
+        ''' Max count of in-flight commands
+        '''
+        return self._pipeline_window
+
+    def set_pipeline_window(self, window):
+        '''
+        Set max count of in-flight commands, 1 runs the commands one by one.
+        It is kept as 1 if responses could not be matched by the parser
+        '''
+        self._requested_pipeline_window = max(1, int(window or 1))
+        self._update_pipeline_window()
+
+    def _update_pipeline_window(self):
+        window = self._requested_pipeline_window
+        if window > 1 and self._parser and \
+                not getattr(self._parser, 'supports_pipeline', False):
+            APP_CONTEXT.get_logger().logger.warning(
+                'Command window {0} is not supported by {1}, commands are run one by one'.format(
+                    window, type(self._parser).__name__))
+            window = 1
+        self._pipeline_window = window
+
+    def set_parse_batch_size(self, size):
+        '''
+        Set max count of reads to merge into one analyse call.
+        Only for parsers which analyse a byte stream, such as uart parser
+        '''
+        self._parse_batch_size = max(1, int(size or 1))
+
     def build(self, command, timeout=3):
         return DeviceMessage(self, command, timeout)
 
     def request_run(self, message):
+        if self._pipeline_window > 1:
+            self._request_pipelined_run(message)
+            return
+
         if self._is_running:
             self.prerun_queue.put(message)
         else:
@@ -142,6 +269,92 @@ class DeviceMessageCenter(EventBase):
             self.run(next_message)
         # print('post')
 
+    def _request_pipelined_run(self, message):
+        with self._pipeline_lock:
+            if len(self._inflight_messages) < self._pipeline_window and \
+                    self.prerun_queue.empty():
+                self._run_pipelined(message)
+            else:
+                self.prerun_queue.put(message)
+
+    def _run_pipelined(self, message):
+        if not self._is_running:
+            self._run_id = str(uuid.uuid1())
+
+        self._is_running = True
+        command = message.get_command()
+        packet_type, payload = None, None
+        if isinstance(command, (list, bytes, bytearray)):
+            packet_type, payload, _ = helper.parse_command_packet(
+                list(command))
+
+        message.set_start_time(datetime.datetime.now())
+        self._pipeline_seq += 1
+        heapq.heappush(self._timeout_heap,
+                       (time.time() + message.get_timeout(),
+                        self._pipeline_seq, message))
+        self._inflight_messages.append(
+            (build_pipeline_key(packet_type, payload), message))
+
+        self._parser.set_run_command(command)
+        self._communicator.write(command)
+
+    def _fill_pipeline(self):
+        with self._pipeline_lock:
+            while len(self._inflight_messages) < self._pipeline_window and \
+                    not self.prerun_queue.empty():
+                self._run_pipelined(self.prerun_queue.get())
+
+            if len(self._inflight_messages) == 0:
+                self._is_running = False
+                self._run_id = None
+
+    def _pop_inflight_message(self, packet_type, raw):
+        payload = None
+        if raw is not None:
+            _, payload, _ = helper.parse_command_packet(list(raw))
+        key = build_pipeline_key(packet_type, payload)
+
+        with self._pipeline_lock:
+            if len(self._inflight_messages) == 0:
+                return None
+
+            # match with key, then packet type, a late or stray response
+            # matches nothing and is dropped
+            index = next((i for i, item in enumerate(self._inflight_messages)
+                          if item[0] == key), None)
+            if index is None:
+                index = next((i for i, item in enumerate(self._inflight_messages)
+                              if item[0][0] == packet_type), None)
+            if index is None:
+                return None
+            return self._inflight_messages.pop(index)[1]
+
+    def _pipelined_timeout_check(self):
+        expired_messages = []
+        current = time.time()
+        with self._pipeline_lock:
+            while len(self._timeout_heap) > 0 and \
+                    self._timeout_heap[0][0] <= current:
+                _, _, message = heapq.heappop(self._timeout_heap)
+                if message.get_finished():
+                    continue
+                self._inflight_messages = [
+                    item for item in self._inflight_messages if item[1] is not message]
+                expired_messages.append(message)
+
+        for message in expired_messages:
+            timeout_command = message.get_command()
+            print('command timeout', timeout_command, message.get_timeout(),
+                  message.get_start_time(), datetime.datetime.now())
+            packet_info = self._parser.get_packet_info(timeout_command)
+            self._last_timeout_command = packet_info
+            self._last_timeout_command['run_id'] = self._run_id
+            message.finish(error='Timeout', **packet_info)
+
+        if len(expired_messages) > 0:
+            self._fill_pipeline()
+
     def setup(self):
         if not self._has_running_checker:
             thread = threading.Thread(target=self.thread_running_checker)
@@ -171,6 +384,10 @@ class DeviceMessageCenter(EventBase):
         #     self.loop.close()
 
     def timeout_check(self):
+        if self._pipeline_window > 1:
+            self._pipelined_timeout_check()
+            return
+
         if self._is_running:
             timeout = self._running_message.get_timeout()
             start_time = self._running_message.get_start_time()
@@ -238,6 +455,7 @@ class DeviceMessageCenter(EventBase):
             data = None
             try:
                 self._receiving = True
+                read_start = time.time()
                 data = self._communicator.read(1000)
                 # print('thread_receiver:', data)
             except Exception as ex:  # pylint: disable=broad-except
@@ -250,11 +468,10 @@ class DeviceMessageCenter(EventBase):
 
             if data and len(data) > 0:
                 self.emit(EVENT_TYPE.READ_BLOCK, data)
-                self.data_lock.acquire()
-                self.data_queue.put(data)
-                self.data_lock.release()
-            else:
-                time.sleep(0.01)
+                self.data_queue.put((time.time(), data))
+            elif time.time() - read_start < RECEIVER_IDLE_INTERVAL:
+                # communicator returns without blocking, avoid busy loop
+                time.sleep(RECEIVER_IDLE_INTERVAL)
 
             self._receiving = False
 
@@ -280,27 +497,49 @@ class DeviceMessageCenter(EventBase):
                 time.sleep(0.1)
                 continue
 
-            self.data_lock.acquire()
-            if self.data_queue.empty():
-                self.data_lock.release()
-                time.sleep(0.001)
+            try:
+                read_time, data = self.data_queue.get(
+                    timeout=PARSER_WAIT_TIMEOUT)
+            except Empty:
                 continue
-            else:
-                data = self.data_queue.get()
-                self.data_lock.release()
+
+            if self._parse_batch_size > 1:
+                data = self._merge_queued_data(data)
 
             if self._parser:
                 if sys.version_info[0] < 3:
                     data = ord(data)
+                self._analysing_read_time = read_time
                 self._parser.analyse(data)
+                self._analysing_read_time = None
+
+    def _merge_queued_data(self, data):
+        merged_data = bytearray(data)
+        for _ in range(self._parse_batch_size - 1):
+            try:
+                _, next_data = self.data_queue.get_nowait()
+            except Empty:
+                break
+            merged_data.extend(next_data)
+        return merged_data
 
     def on_command_receive(self, *args, **kwargs):
+        if self._pipeline_window > 1:
+            message = self._pop_inflight_message(
+                kwargs.get('packet_type'), kwargs.get('raw'))
+            if message:
+                message.finish(**kwargs)
+            self._fill_pipeline()
+            return
+
         # TODO: should do timeout command check
         if self._running_message:
             self._running_message.finish(**kwargs)
         self.run_post()
 
     def on_continuous_messageReceive(self, *args, **kwargs):
+        if self._analysing_read_time:
+            self.latency.collect(time.time() - self._analysing_read_time)
         # save data
         self.emit(EVENT_TYPE.CONTINUOUS_MESSAGE, **kwargs)
 
@@ -404,17 +404,32 @@ class Provider(OpenDeviceBase):
         '''
         Update paramters value
         '''
+        messages = []
         for parameter in params:
             command_line = helper.build_input_packet(
                 'uP', properties=self.properties,
                 param=parameter['paramId'],
                 value=parameter['value'])
+            messages.append(self._message_center.build(command=command_line))
 
-            result = yield self._message_center.build(command=command_line)
+        results = None
+        if self._message_center.pipeline_window > 1 and len(messages) > 0:
+            # message center runs the commands in pipeline
+            results = yield messages
 
+        for index, message in enumerate(messages):
+            # one by one, it stops at the first failed command
+            result = results[index] if results is not None else (yield message)
             packet_type = result['packet_type']
             data = result['data']
 
+            if result['error']:
+                yield {
+                    'packetType': 'error',
+                    'data': {
+                        'error': result['error']
+                    }
+                }
             if packet_type == 'error':
                 yield {
                     'packetType': 'error',
@@ -826,17 +841,33 @@ class Provider(OpenDeviceBase):
         file_write_size = 0
         file_result = bytearray()
 
-        while file_write_size < max_length:
+        # plan all reads first, each word is 2 bytes in RE response
+        read_plan = []
+        messages = []
+        plan_write_size = 0
+        while plan_write_size < max_length:
             actual_read_size = read_size
-            plan_file_write_size = file_write_size + actual_read_size
-
-            if plan_file_write_size >= max_length:
-                actual_read_size = max_length - file_write_size
+            is_last_read = plan_write_size + actual_read_size >= max_length
+            if is_last_read:
+                actual_read_size = max_length - plan_write_size
 
             command_line = helper.build_read_eeprom_input_packet(
                 start, actual_read_size)
-            result = yield self._message_center.build(command=command_line)
+            messages.append(self._message_center.build(command=command_line))
+            read_plan.append((actual_read_size, is_last_read))
+
+            plan_write_size += actual_read_size * 2
+            start += actual_read_size
+
+        results = None
+        if self._message_center.pipeline_window > 1:
+            # message center runs the commands in pipeline
+            results = yield messages
 
+        for index, message in enumerate(messages):
+            # one by one, it stops at the first failed read
+            result = results[index] if results is not None else (yield message)
+            actual_read_size, is_last_read = read_plan[index]
             if result['error']:
                 self.is_backup = False
                 self.add_output_packet('backup_status', {
@@ -845,13 +876,12 @@ class Provider(OpenDeviceBase):
                 break
 
             data = result['data']
-            if plan_file_write_size >= max_length:
+            if is_last_read:
                 file_result.extend(data[0:actual_read_size])
             else:
                 file_result.extend(data)
 
             file_write_size += len(data)
-            start += actual_read_size
 
         reserved_data = self._reserve_by_word(file_result)
 
@@ -11,6 +11,7 @@ from ..widgets import (NTRIPClient, EthernetDataLogger,
                        EthernetDebugDataLogger, EthernetRTCMDataLogger)
 from ...framework.utils import (helper, resource)
 from ...framework.context import APP_CONTEXT
+from ...framework.rotating_log import PacketIndexer
 from ...framework.utils.firmware_parser import parser as firmware_content_parser
 from ..base.provider_base import OpenDeviceBase
 from ..configs.openrtk_predefine import (APP_STR, get_openrtk_products,
@@ -208,7 +209,7 @@ class Provider(OpenDeviceBase):
 
     def ntrip_client_thread(self):
         self.ntrip_client = NTRIPClient(self.properties)
-        self.ntrip_client.on('parsed', self.handle_rtcm_data_parsed)
+        self.ntrip_client.on('frames', self.handle_rtcm_frames)
         if self.device_info.__contains__('sn') and self.device_info.__contains__('pn'):
             self.ntrip_client.set_connect_headers({
                 'Ntrip-Sn': self.device_info['sn'],
@@ -216,24 +217,26 @@ class Provider(OpenDeviceBase):
             })
         self.ntrip_client.run()
 
-    def handle_rtcm_data_parsed(self, data):
-        # print('rtcm',data)
-
-        if self.rtcm_logf is not None and data is not None:
-            self.rtcm_logf.write(bytes(data))
+    def handle_rtcm_frames(self, frames):
+        '''
+        Forward the RTCM frames of a NTRIP receive in a burst, a packet per
+        frame
+        '''
+        if self.rtcm_logf is not None and frames:
+            self.rtcm_logf.write(b''.join(frames))
             self.rtcm_logf.flush()
 
         if self.communicator.can_write() and not self.is_upgrading and not self.with_upgrade_error:
-            command = helper.build_ethernet_packet(
-                self.communicator.get_dst_mac(),
-                self.communicator.get_src_mac(), b'\x02\x0b', data)
-
-            self.communicator.write(command.actual_command)
+            mac_header = self.communicator.get_mac_header()
+            self.communicator.write_many([
+                helper.build_ethernet_frame(mac_header, b'\x02\x0b', frame)
+                for frame in frames])
 
     def after_setup(self):
         set_user_para = self.cli_options and self.cli_options.set_user_para
         self.ntrip_client_enable = self.cli_options and self.cli_options.ntrip_client
         # with_raw_log = self.cli_options and self.cli_options.with_raw_log
+        APP_CONTEXT.statistics.add_receive_cache(self.communicator.receive_cache)
 
         try:
             if self.data_folder:
@@ -244,12 +247,14 @@ class Provider(OpenDeviceBase):
                 os.mkdir(file_name)
                 self.rtk_log_file_name = file_name
 
-                self.user_logf = open(
-                    file_name + '/' + 'user_' + file_time + '.bin', "wb")
-                self.rtcm_logf = open(
-                    file_name + '/' + 'rtcm_base_' + file_time + '.bin', "wb")
-                self.rtcm_rover_logf = open(
-                    file_name + '/' + 'rtcm_rover_' + file_time + '.bin', "wb")
+                # packet types of ethernet packets are not named in setting
+                self.user_logf = self.open_raw_log(
+                    file_name + '/' + 'user_' + file_time + '.bin',
+                    PacketIndexer(length_size=4))
+                self.rtcm_logf = self.open_raw_log(
+                    file_name + '/' + 'rtcm_base_' + file_time + '.bin')
+                self.rtcm_rover_logf = self.open_raw_log(
+                    file_name + '/' + 'rtcm_rover_' + file_time + '.bin')
 
             if set_user_para:
                 result = self.set_params(
@@ -673,7 +678,13 @@ class Provider(OpenDeviceBase):
         '''
         Get server connection status
         '''
-        return {'packetType': 'ping', 'data': {'status': '1'}}
+        return {
+            'packetType': 'ping',
+            'data': {
+                'status': '1',
+                'receiveCache': APP_CONTEXT.statistics.get_receive_cache_result()
+            }
+        }
 
     def get_device_info(self, *args):  # pylint: disable=invalid-name
         '''
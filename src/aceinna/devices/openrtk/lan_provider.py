@@ -12,6 +12,7 @@ from ...framework.utils import (
     helper, resource
 )
 from ...framework.context import APP_CONTEXT
+from ...framework.rotating_log import PacketIndexer
 from ..base.provider_base import OpenDeviceBase
 from ..configs.openrtk_predefine import (
     APP_STR, get_openrtk_products, get_configuratin_file_mapping
@@ -200,12 +201,13 @@ class Provider(OpenDeviceBase):
                 file_name = self.data_folder + '/' + 'openrtk_log_' + dir_time
                 os.mkdir(file_name)
                 self.rtk_log_file_name = file_name
-                self.user_logf = open(
-                    file_name + '/' + 'user_' + file_time + '.bin', "wb")
-                self.debug_logf = open(
-                    file_name + '/' + 'debug_' + file_time + '.bin', "wb")
-                self.rtcm_logf = open(
-                    file_name + '/' + 'rtcm_' + file_time + '.bin', "wb")
+                self.user_logf = self.open_raw_log(
+                    file_name + '/' + 'user_' + file_time + '.bin',
+                    PacketIndexer(self.properties['userMessages']['outputPackets']))
+                self.debug_logf = self.open_raw_log(
+                    file_name + '/' + 'debug_' + file_time + '.bin')
+                self.rtcm_logf = self.open_raw_log(
+                    file_name + '/' + 'rtcm_' + file_time + '.bin')
 
             # start a thread to log data
             # threading.Thread(target=self.thread_data_log).start()
@@ -1,4 +1,5 @@
 from .parsers.open_message_parser import UartMessageParser as OpenUartMessageParser
+from .parsers.open_message_parser import BufferedUartMessageParser as OpenBufferedUartMessageParser
 from .parsers.dmu_message_parser import UartMessageParser as DMUUartMessageParser
 from .parsers.ins2000_message_parser import UartMessageParser as INS2000UartMessageParser
 from .parsers.ins401_message_parser import EthernetMessageParser as INS401EthernetMessageParser
@@ -11,7 +12,7 @@ class ParserManager:
 
     # TODO: communicator_type should be used to generate the parser
     @staticmethod
-    def build(device_type, communicator_type, properties):  # pylint:disable=unused-argument
+    def build(device_type, communicator_type, properties, use_buffer_framer=False):  # pylint:disable=unused-argument
         '''
         Generate matched parser
         '''
@@ -21,5 +22,7 @@ class ParserManager:
             return INS2000UartMessageParser(properties)
         elif device_type == 'INS401':
             return INS401EthernetMessageParser(properties)
+        elif use_buffer_framer:
+            return OpenBufferedUartMessageParser(properties)
         else:
             return OpenUartMessageParser(properties)
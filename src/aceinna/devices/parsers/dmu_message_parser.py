@@ -2,9 +2,9 @@ import collections
 import operator
 import time
 from ..base.message_parser_base import MessageParserBase
-from ...framework.utils import helper
+from ...framework.utils.crc import check_crc16
 from .dum_packet_parser import (
-    match_command_handler, match_continuous_handler)
+    match_command_handler, match_continuous_handler, build_continuous_decoders)
 from ...framework.context import APP_CONTEXT
 
 MSG_HEADER = [0x55, 0x55]
@@ -16,6 +16,7 @@ INPUT_PACKETS = ['PK', 'CH', 'RE', 'WE', 'UE', 'GP',
                  'AR', 'SR', 'PR', '\x15\x15', '\x00\x00',
                  'WC', 'CB', 'CC']
 OUTPUT_PACKETS = ['ID', 'VR', 'VA', 'KC', 'KT', 'KS']
+INPUT_PACKET_SET = frozenset(INPUT_PACKETS)
 
 
 class ANALYSIS_STATUS:
@@ -69,9 +70,9 @@ class DMUPacket:
         self._raw_data_bytes.append(byte_data)
 
     def check_crc(self):
-        crc_calculate_value = helper.calc_crc(self._raw_data_bytes[2:-2])
-        crc_value = self._raw_data_bytes[-2:]
-        return crc_calculate_value == crc_value
+        return check_crc16(self._raw_data_bytes[2:-2],
+                           self._raw_data_bytes[-2],
+                           self._raw_data_bytes[-1])
 
 
 # class UartMessageParser(MessageParserBase):
@@ -215,11 +216,48 @@ class UartMessageParser(MessageParserBase):
         self.sync_pattern = collections.deque(2*[0], 2)
         self.find_header = False
         self.payload_len = 0
+        self._input_handlers = {}
+        self._input_packet_names = frozenset()
+        self._output_packets = {}
+        self._build_packet_index()
         # command,continuous_message
 
     def set_run_command(self, command):
         self.run_command = ''.join(['%c' % x for x in command[2:4]])
 
+    def set_configuration(self, configuration):
+        super(UartMessageParser, self).set_configuration(configuration)
+        self._build_packet_index()
+
+    def _build_packet_index(self):
+        '''
+        Index handlers and configurations by packet type
+        '''
+        output_packets = []
+        input_packets = []
+        scaling = {}
+        if self.properties and self.properties.__contains__('userMessages'):
+            output_packets = self.properties['userMessages']['outputPackets']
+            input_packets = self.properties['userMessages'].get(
+                'inputPackets') or []
+            scaling = self.properties.get('scaling') or {}
+        self._input_handlers = dict(
+            (packet_type, match_command_handler(packet_type))
+            for packet_type in INPUT_PACKETS)
+        self._input_packet_names = frozenset(x['name'] for x in input_packets)
+        decoders = build_continuous_decoders(output_packets, scaling)
+        # packet type -> (continuous handler, output packet config, decoder)
+        self._output_packets = dict(
+            (x['name'], (match_continuous_handler(x['name']), x,
+                         decoders[x['name']]))
+            for x in output_packets)
+
+    def _match_output_packet(self, packet_type):
+        output_packet = self._output_packets.get(packet_type)
+        if output_packet is None:
+            output_packet = (match_continuous_handler(packet_type), None, None)
+        return output_packet
+
     def analyse(self, data):
         for data_block in data:
             if self.find_header:
@@ -231,8 +269,7 @@ class UartMessageParser(MessageParserBase):
                     packet_type = ''.join(
                         ["%c" % x for x in self.frame[PACKET_TYPE_INDEX:4]])
                     self.find_header = False
-                    result = helper.calc_crc(self.frame[2:-2])
-                    if result[0] == self.frame[-2] and result[1] == self.frame[-1]:
+                    if check_crc16(self.frame[2:-2], self.frame[-2], self.frame[-1]):
                         # find a whole frame
                         # self._parse_frame(self.frame, self.payload_len)
                         self._parse_message(
@@ -246,10 +283,7 @@ class UartMessageParser(MessageParserBase):
                             "crc check error! packet_type:{0}".format(packet_type))
                         self.emit('crc_failure', packet_type=packet_type, event_time=time.time())
 
-                        input_packet_config = next(
-                            (x for x in self.properties['userMessages']['inputPackets']
-                            if x['name'] == packet_type), None)
-                        if input_packet_config:
+                        if packet_type in self._input_packet_names:
                             self.emit('command', packet_type=packet_type,
                                     data=[], error=True)
 
@@ -262,8 +296,7 @@ class UartMessageParser(MessageParserBase):
     def _parse_message(self, packet_type, payload_len, frame):
         payload = frame[5:payload_len+5]
         # parse interactive commands
-        is_interactive_cmd = INPUT_PACKETS.__contains__(packet_type)
-        if is_interactive_cmd:
+        if packet_type in INPUT_PACKET_SET:
             self._parse_input_packet(packet_type, payload, frame)
         else:
             # consider as output packet, parse output Messages
@@ -271,7 +304,7 @@ class UartMessageParser(MessageParserBase):
 
     def _parse_input_packet(self, packet_type, payload, frame):
         # print(packet_type, payload, payload_len)
-        payload_parser = match_command_handler(packet_type)
+        payload_parser = self._input_handlers.get(packet_type)
 
         if payload_parser:
             data, error = payload_parser(payload)
@@ -286,13 +319,12 @@ class UartMessageParser(MessageParserBase):
 
     def _parse_output_packet(self, packet_type, payload):
         # check if it is the valid out packet
-        payload_parser = match_continuous_handler(packet_type)
-        output_packet_config = next(
-            (x for x in self.properties['userMessages']['outputPackets']
-             if x['name'] == packet_type), None)
+        payload_parser, output_packet_config, output_decoder = \
+            self._match_output_packet(packet_type)
         scaling = self.properties['scaling']
 
-        data = payload_parser(payload, output_packet_config, scaling)
+        data = payload_parser(
+            payload, output_packet_config, scaling, output_decoder)
 
         if not data:
             APP_CONTEXT.get_logger().logger.info(
@@ -1,8 +1,11 @@
+import ast
 import struct
+import operator
 import collections
 from ..dmu.configuration_field import CONFIGURATION_FIELD_DEFINES_SINGLETON
 from ..dmu.eeprom_field import EEPROM_FIELD_DEFINES_SINGLETON
 from .dmu_field_parser import decode_value
+from ...framework.packet_layout import get_packet_layout
 
 
 class DMU_PACKET_STATUS(object):
@@ -147,83 +150,120 @@ def version_data_parser(payload, *args):
     }
 
 
-def common_continuous_parser(payload, configuration, scaling):
+SCALING_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos
+}
+
+
+def _eval_scaling_node(node):
+    if isinstance(node, ast.Expression):
+        return _eval_scaling_node(node.body)
+    if hasattr(ast, 'Constant') and isinstance(node, ast.Constant):
+        value = node.value
+    elif isinstance(node, ast.Num):
+        value = node.n
+    elif isinstance(node, ast.BinOp) and type(node.op) in SCALING_OPERATORS:
+        return SCALING_OPERATORS[type(node.op)](
+            _eval_scaling_node(node.left), _eval_scaling_node(node.right))
+    elif isinstance(node, ast.UnaryOp) and type(node.op) in SCALING_OPERATORS:
+        return SCALING_OPERATORS[type(node.op)](_eval_scaling_node(node.operand))
+    else:
+        raise ValueError('unsupported scaling expression')
+
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError('unsupported scaling expression')
+    return value
+
+
+def compile_scaling(expression):
     '''
-    Unpack output packet
+    Evaluate a scaling expression of config, like "20*9.80665/65536", into a
+    number. Only numbers and arithmetic operators are allowed.
+    '''
+    if isinstance(expression, (int, float)):
+        return expression
+    try:
+        return float(_eval_scaling_node(
+            ast.parse(expression.strip(), mode='eval')))
+    except (SyntaxError, ValueError, ZeroDivisionError) as ex:
+        raise ValueError('invalid scaling {0}: {1}'.format(expression, ex))
+
+
+class ContinuousPacketDecoder(object):
+    '''
+    Precompiled decoder of an output packet, the scaling of fields is
+    evaluated once from the scaling settings
+    '''
+
+    def __init__(self, configuration, scaling):
+        self.name = configuration['name']
+        self.layout = get_packet_layout(configuration, '>')
+        self.error = None
+        self.factors = ()
+        self.is_scaled = False
+        try:
+            factors = []
+            for key in self.layout.scalings:
+                expression = scaling[key] if key is not None else None
+                factors.append(compile_scaling(expression) if expression else 1)
+            self.factors = tuple(factors)
+            self.is_scaled = any(x is not None for x in self.layout.scalings)
+        except (KeyError, TypeError, ValueError) as ex:
+            # raised when a packet is decoded, as the previous parser
+            self.error = ex
+
+        self.time_field = _extract_time_field(configuration)
+        self.time_index = -1
+        if self.time_field is not None:
+            self.time_index = configuration['payload'].index(self.time_field)
+
+    def decode(self, payload):
+        if self.error is not None:
+            raise self.error
+        if not self.layout.is_valid:
+            raise struct.error('unsupported field type in packet {0}'
+                               .format(self.name))
+
+        data = self.layout.struct.unpack(bytes(bytearray(payload)))
+        if self.is_scaled:
+            values = [value * factor for value,
+                      factor in zip(data, self.factors)]
+        else:
+            values = list(data)
+        if self.time_index >= 0:
+            values[self.time_index] = _calculate_time_value(
+                self.name, payload, self.time_field)
+        return collections.OrderedDict(zip(self.layout.names, values))
+
+
+def build_continuous_decoders(output_packets, scaling):
+    '''
+    Build a decoder registry keyed by output packet name
+    '''
+    return dict((x['name'], ContinuousPacketDecoder(x, scaling))
+                for x in output_packets or [])
+
+
+def common_continuous_parser(payload, configuration, scaling, decoder=None):
+    '''
+    Unpack output packet, the decoder is built from configuration if it is
+    not given
     '''
     if configuration is None:
         return
 
-    data = None
-    length = 0
-    pack_fmt = '>'
-    for value in configuration['payload']:
-        if value['type'] == 'float':
-            pack_fmt += 'f'
-            length += 4
-        elif value['type'] == 'uint32':
-            pack_fmt += 'I'
-            length += 4
-        elif value['type'] == 'int32':
-            pack_fmt += 'i'
-            length += 4
-        elif value['type'] == 'int16':
-            pack_fmt += 'h'
-            length += 2
-        elif value['type'] == 'uint16':
-            pack_fmt += 'H'
-            length += 2
-        elif value['type'] == 'double':
-            pack_fmt += 'd'
-            length += 8
-        elif value['type'] == 'int64':
-            pack_fmt += 'q'
-            length += 8
-        elif value['type'] == 'uint64':
-            pack_fmt += 'Q'
-            length += 8
-        elif value['type'] == 'char':
-            pack_fmt += 'c'
-            length += 1
-        elif value['type'] == 'uchar':
-            pack_fmt += 'B'
-            length += 1
-        elif value['type'] == 'uint8':
-            pack_fmt += 'B'
-            length += 1
-    len_fmt = '{0}B'.format(length)
+    if decoder is None:
+        decoder = ContinuousPacketDecoder(configuration, scaling)
 
     format_data = None
     try:
-        pack_item = struct.pack(len_fmt, *payload)
-        data = struct.unpack(pack_fmt, pack_item)
-        out = []
-
-        time_field = _extract_time_field(configuration)
-
-        for idx, item in enumerate(configuration['payload']):
-            if item == time_field:
-                format_value = _calculate_time_value(
-                    configuration['name'], payload, time_field)
-            else:
-                scaling_setting = None
-                scaling_value = 1
-                if item.__contains__('scaling'):
-                    scaling_setting = scaling[item['scaling']]
-                if scaling_setting:
-                    scaling_value = eval(scaling_setting)
-                format_value = data[idx]*scaling_value
-
-            out.append((item['name'], format_value))
-
-        # time_field = _extract_time_field(configuration)
-        # if time_field:
-        #     time_value = _calculate_time_value(
-        #         configuration['name'], payload, time_field)
-        #     out.append(('time', time_value))
-
-        format_data = collections.OrderedDict(out)
-
+        format_data = decoder.decode(payload)
     except Exception as ex:  # pylint: disable=broad-except
         print(
             "error happened when decode the payload of packets, pls restart driver: {0}"
@@ -3,6 +3,7 @@ import time
 import struct
 import re
 from ..base.message_parser_base import MessageParserBase
+from ...framework.packet_layout import get_packet_layout
 
 MSG_HEADER = [0x55, 0x55]
 PACKET_TYPE_INDEX = 2
@@ -28,11 +29,27 @@ class UartMessageParser(MessageParserBase):
         self.message_type = 0
         self.nmea_state = 0
         self.nmea_frame = []
+        self._build_packet_index()
         # command,continuous_message
 
     def set_run_command(self, command):
         pass
 
+    def set_configuration(self, configuration):
+        super(UartMessageParser, self).set_configuration(configuration)
+        self._build_packet_index()
+
+    def _build_packet_index(self):
+        '''
+        Index layouts of output packets by message name
+        '''
+        output_packets = {}
+        if self.properties and self.properties.__contains__('outputPackets'):
+            output_packets = self.properties['outputPackets']
+        self._output_layouts = dict(
+            (name, get_packet_layout(value))
+            for name, value in output_packets.items())
+
     def analyse(self, data_block):
         self.sync_pattern.append(data_block)
         if self.sync_state == 1:
@@ -113,41 +130,6 @@ class UartMessageParser(MessageParserBase):
         check_crc, = struct.unpack('<L', packet[-4:])
         return crc == check_crc
 
-    def output_fmt(self, payload):
-        """generate struct format"""
-        packet_fmt = '<'
-        keys = []
-        for item in payload:
-            if item["type"] == "int8":
-                packet_fmt += 'b'
-            if item["type"] == "uint8":
-                packet_fmt += 'B'
-            if item["type"] == "bool":
-                packet_fmt += '?'
-            if item["type"] == "int16":
-                packet_fmt += 'h'
-            if item["type"] == "uint16":
-                packet_fmt += 'H'
-            if item["type"] == "int32":
-                packet_fmt += 'i'
-            if item["type"] == "uint32":
-                packet_fmt += 'I'
-            if item["type"] == "int64":
-                packet_fmt += 'q'
-            if item["type"] == "uint64":
-                packet_fmt += 'Q'
-            if item["type"] == "float":
-                packet_fmt += 'f'
-            if item["type"] == "double":
-                packet_fmt += 'd'
-            if item["type"] == "string":
-                packet_fmt += item["length"] + 's'
-
-            keys.append(item["name"])
-
-        return packet_fmt, keys
-
-
     def crc(self, data):
         """crc"""
         crc_rst = 0
@@ -195,18 +177,16 @@ class UartMessageParser(MessageParserBase):
             return
 
         message_str = self.properties["packetsTypeList"][message_id_str]
-        if not message_str in self.properties["outputPackets"]:
+        layout = self._output_layouts.get(message_str)
+        if layout is None:
             return
 
-        payload = self.properties["outputPackets"][message_str]["payload"]
-        bin_format, keys = self.output_fmt(payload)
-
         try:
-            packets = struct.unpack(bin_format, packet[self.header_len:-4])
+            packets = layout.struct.unpack(packet[self.header_len:-4])
         except Exception as e:
             return
 
-        dict_pack = dict(zip(keys, packets))
+        dict_pack = dict(zip(layout.names, packets))
         dict_pack['header_message_id'] = message_id
         if message_id == 1462:
             dict_pack['header_gps_week'], = struct.unpack('<H', packet[6:8])
@@ -3,7 +3,7 @@ import operator
 import time
 import struct
 from ..base.message_parser_base import MessageParserBase
-from ...framework.utils import helper
+from ...framework.utils.crc import check_crc16
 from ...framework.context import APP_CONTEXT
 from .ins401_packet_parser import (
     match_command_handler, common_continuous_parser, other_output_parser)
@@ -27,15 +27,37 @@ OUTPUT_PACKETS = [
     b'\x05\n',  # diagnostic 1hz 31 31
     b'\x06\n'  # RTCM Rover 3000
 ]
+INPUT_PACKET_SET = frozenset(INPUT_PACKETS)
+OUTPUT_PACKET_SET = frozenset(OUTPUT_PACKETS)
 
 
 class EthernetMessageParser(MessageParserBase):
     def __init__(self, configuration):
         super(EthernetMessageParser, self).__init__(configuration)
+        self._input_handlers = {}
+        self._input_packet_names = frozenset()
+        self._build_packet_index()
 
     def set_run_command(self, command):
         pass
 
+    def set_configuration(self, configuration):
+        super(EthernetMessageParser, self).set_configuration(configuration)
+        self._build_packet_index()
+
+    def _build_packet_index(self):
+        '''
+        Index handlers and configurations by packet type
+        '''
+        input_packets = []
+        if self.properties and self.properties.__contains__('userMessages'):
+            input_packets = self.properties['userMessages'].get(
+                'inputPackets') or []
+        self._input_handlers = dict(
+            (packet_type, match_command_handler(packet_type))
+            for packet_type in INPUT_PACKETS)
+        self._input_packet_names = frozenset(x['name'] for x in input_packets)
+
     def analyse(self, data):
         sync_pattern = data[0:2]
         if operator.eq(list(sync_pattern), MSG_HEADER) and len(data) >= PAYLOAD_LEN_INDEX:
@@ -55,9 +77,12 @@ class EthernetMessageParser(MessageParserBase):
                             event_time=time.time())
                 return
 
-            result = helper.calc_crc(data[2:PAYLOAD_LEN_INDEX+payload_len])
+            is_crc_valid = check_crc16(
+                data[2:PAYLOAD_LEN_INDEX+payload_len],
+                data[PAYLOAD_LEN_INDEX + payload_len],
+                data[PAYLOAD_LEN_INDEX + payload_len + 1])
 
-            if result[0] == data[PAYLOAD_LEN_INDEX + payload_len] and result[1] == data[PAYLOAD_LEN_INDEX + payload_len + 1]:
+            if is_crc_valid:
                 self._parse_message(packet_type_byte, payload_len, data)
             else:
                 APP_CONTEXT.get_logger().logger.info(
@@ -65,10 +90,7 @@ class EthernetMessageParser(MessageParserBase):
 
                 self.emit('crc_failure', packet_type=packet_type,
                             event_time=time.time())
-                input_packet_config = next(
-                    (x for x in self.properties['userMessages']['inputPackets']
-                        if x['name'] == packet_type), None)
-                if input_packet_config:
+                if packet_type in self._input_packet_names:
                     self.emit('command',
                                 packet_type=packet_type,
                                 data=[],
@@ -78,16 +100,14 @@ class EthernetMessageParser(MessageParserBase):
     def _parse_message(self, packet_type, payload_len, frame):
         payload = frame[PAYLOAD_LEN_INDEX:payload_len+PAYLOAD_LEN_INDEX]
         # parse interactive commands
-        is_interactive_cmd = INPUT_PACKETS.__contains__(packet_type)
-
-        if is_interactive_cmd:
+        if packet_type in INPUT_PACKET_SET:
             self._parse_input_packet(packet_type, payload, frame)
         else:
             # consider as output packet, parse output Messages
             self._parse_output_packet(packet_type, payload, frame)
 
     def _parse_input_packet(self, packet_type, payload, frame):
-        payload_parser = match_command_handler(packet_type)
+        payload_parser = self._input_handlers.get(packet_type)
 
         if payload_parser:
             data, error = payload_parser(
@@ -103,8 +123,7 @@ class EthernetMessageParser(MessageParserBase):
 
     def _parse_output_packet(self, packet_type, payload, frame):
         # check if it is the valid out packet
-        is_output_packet = OUTPUT_PACKETS.__contains__(packet_type)
-        if is_output_packet:
+        if packet_type in OUTPUT_PACKET_SET:
 
             self.emit('continuous_message',
                       packet_type=packet_type,
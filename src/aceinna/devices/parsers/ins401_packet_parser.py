@@ -5,6 +5,7 @@ from . import filter_nan
 from .ins401_field_parser import decode_value
 from ...framework.utils.print import print_yellow
 from ...framework.context import APP_CONTEXT
+from ...framework.packet_layout import get_packet_layout
 # from .dmu_field_parser import decode_value
 
 # input packet
@@ -233,59 +234,19 @@ def common_continuous_parser(payload, configuration):
         return
 
     data = None
-    is_list = 0
-    length = 0
-    pack_fmt = '<'
-    for value in configuration['payload']:
-        if value['type'] == 'float':
-            pack_fmt += 'f'
-            length += 4
-        elif value['type'] == 'uint32':
-            pack_fmt += 'I'
-            length += 4
-        elif value['type'] == 'int32':
-            pack_fmt += 'i'
-            length += 4
-        elif value['type'] == 'int16':
-            pack_fmt += 'h'
-            length += 2
-        elif value['type'] == 'uint16':
-            pack_fmt += 'H'
-            length += 2
-        elif value['type'] == 'double':
-            pack_fmt += 'd'
-            length += 8
-        elif value['type'] == 'int64':
-            pack_fmt += 'q'
-            length += 8
-        elif value['type'] == 'uint64':
-            pack_fmt += 'Q'
-            length += 8
-        elif value['type'] == 'char':
-            pack_fmt += 'c'
-            length += 1
-        elif value['type'] == 'uchar':
-            pack_fmt += 'B'
-            length += 1
-        elif value['type'] == 'uint8':
-            pack_fmt += 'B'
-            length += 1
-    len_fmt = '{0}B'.format(length)
-
-    has_list = configuration.__contains__('isList')
-    if has_list:
-        is_list = configuration['isList']
-
-    if is_list == 1:
+    layout = get_packet_layout(configuration)
+    length = layout.size
+    unpacker = layout.struct
+
+    if layout.is_list:
         packet_num = len(payload) // length
         data = []
         for i in range(packet_num):
             payload_c = payload[i*length:(i+1)*length]
             try:
-                pack_item = struct.pack(len_fmt, *payload_c)
-                item = struct.unpack(pack_fmt, pack_item)
-                out = [(value['name'], item[idx])
-                       for idx, value in enumerate(configuration['payload'])]
+                item = unpacker.unpack(bytes(bytearray(payload_c)))
+                out = [(name, item[idx])
+                       for idx, name in enumerate(layout.names)]
                 item = collections.OrderedDict(out)
                 data.append(item)
             except Exception as ex:  # pylint: disable=broad-except
@@ -294,12 +255,11 @@ def common_continuous_parser(payload, configuration):
                     .format(ex))
     else:
         try:
-            pack_item = struct.pack(len_fmt, *payload)
-            data = struct.unpack(pack_fmt, pack_item)
+            data = unpacker.unpack(bytes(bytearray(payload)))
             out = [(
-                value['name'],
+                name,
                 filter_nan(data[idx])
-            ) for idx, value in enumerate(configuration['payload'])]
+            ) for idx, name in enumerate(layout.names)]
 
             data = collections.OrderedDict(out)
         except Exception as ex:  # pylint: disable=broad-except
@@ -2,12 +2,17 @@ import collections
 import operator
 import time
 from ..base.message_parser_base import MessageParserBase
-from ...framework.utils import helper
+from ...framework.utils.crc import check_crc16
 from ...framework.context import APP_CONTEXT
 from .open_packet_parser import (
-    match_command_handler, common_continuous_parser, other_output_parser)
+    match_command_handler, build_continuous_decoders,
+    decode_continuous_packet, other_output_parser)
 
 MSG_HEADER = [0x55, 0x55]
+MSG_HEADER_BYTES = b'\x55\x55'
+PAYLOAD_LEN_INDEX = 4
+PAYLOAD_INDEX = 5
+CRC_LEN = 2
 PACKET_TYPE_INDEX = 2
 PRIVATE_PACKET_TYPE = ['RE', 'WE', 'UE', 'LE', 'SR']
 INPUT_PACKETS = ['pG', 'uC', 'uP', 'uA', 'uB',
@@ -18,6 +23,8 @@ INPUT_PACKETS = ['pG', 'uC', 'uP', 'uA', 'uB',
                  'RE', 'WE', 'UE', 'LE', 'SR',
                  'SF', 'RF', 'WF', 'GF']
 OTHER_OUTPUT_PACKETS = ['CD', 'CB']
+INPUT_PACKET_SET = frozenset(INPUT_PACKETS)
+OTHER_OUTPUT_PACKET_SET = frozenset(OTHER_OUTPUT_PACKETS)
 
 
 class ANALYSIS_STATUS:
@@ -71,9 +78,9 @@ class OpenDevicePacket:
         self._raw_data_bytes.append(byte_data)
 
     def check_crc(self):
-        crc_calculate_value = helper.calc_crc(self._raw_data_bytes[2:-2])
-        crc_value = self._raw_data_bytes[-2:]
-        return crc_calculate_value == crc_value
+        return check_crc16(self._raw_data_bytes[2:-2],
+                           self._raw_data_bytes[-2],
+                           self._raw_data_bytes[-1])
 
 
 # class UartMessageParser(MessageParserBase):
@@ -201,6 +208,8 @@ class OpenDevicePacket:
 
 
 class UartMessageParser(MessageParserBase):
+    supports_pipeline = True
+
     def __init__(self, configuration):
         super(UartMessageParser, self).__init__(configuration)
         self.frame = []
@@ -208,11 +217,35 @@ class UartMessageParser(MessageParserBase):
         self.sync_pattern = collections.deque(2*[0], 2)
         self.find_header = False
         self.payload_len = 0
+        self._output_decoders = {}
+        self._input_handlers = {}
+        self._input_packet_names = frozenset()
+        self._build_packet_index()
         # command,continuous_message
 
     def set_run_command(self, command):
         pass
 
+    def set_configuration(self, configuration):
+        super(UartMessageParser, self).set_configuration(configuration)
+        self._build_packet_index()
+
+    def _build_packet_index(self):
+        '''
+        Index handlers and configurations by packet type
+        '''
+        output_packets = None
+        input_packets = None
+        if self.properties and self.properties.__contains__('userMessages'):
+            output_packets = self.properties['userMessages']['outputPackets']
+            input_packets = self.properties['userMessages'].get('inputPackets')
+        self._output_decoders = build_continuous_decoders(output_packets)
+        self._input_handlers = dict(
+            (packet_type, match_command_handler(packet_type))
+            for packet_type in INPUT_PACKETS)
+        self._input_packet_names = frozenset(
+            x['name'] for x in input_packets or [])
+
     def analyse(self, data):
         for data_block in data:
             if self.find_header:
@@ -224,8 +257,7 @@ class UartMessageParser(MessageParserBase):
                     packet_type = ''.join(
                         ["%c" % x for x in self.frame[PACKET_TYPE_INDEX:4]])
                     self.find_header = False
-                    result = helper.calc_crc(self.frame[2:-2])
-                    if result[0] == self.frame[-2] and result[1] == self.frame[-1]:
+                    if check_crc16(self.frame[2:-2], self.frame[-2], self.frame[-1]):
                         # find a whole frame
                         # self._parse_frame(self.frame, self.payload_len)
                         self._parse_message(
@@ -235,38 +267,38 @@ class UartMessageParser(MessageParserBase):
                         self.payload_len = 0
                         self.sync_pattern = collections.deque(2*[0], 2)
                     else:
-                        APP_CONTEXT.get_logger().logger.info(
-                            "crc check error! packet_type:{0}".format(packet_type))
-
-                        self.emit('crc_failure', packet_type=packet_type,
-                                event_time=time.time())
-                        input_packet_config = next(
-                            (x for x in self.properties['userMessages']['inputPackets']
-                            if x['name'] == packet_type), None)
-                        if input_packet_config:
-                            self.emit('command',
-                                    packet_type=packet_type,
-                                    data=[],
-                                    error=True,
-                                    raw=self.frame)
+                        self._on_crc_failure(packet_type, self.frame)
             else:
                 self.sync_pattern.append(data_block)
                 if operator.eq(list(self.sync_pattern), MSG_HEADER):
                     self.frame = MSG_HEADER[:]  # header_tp.copy()
                     self.find_header = True
 
+    def _on_crc_failure(self, packet_type, frame):
+        APP_CONTEXT.get_logger().logger.info(
+            "crc check error! packet_type:{0}".format(packet_type))
+
+        self.emit('crc_failure', packet_type=packet_type,
+                  event_time=time.time())
+        if packet_type in self._input_packet_names:
+            self.emit('command',
+                      packet_type=packet_type,
+                      data=[],
+                      error=True,
+                      raw=frame)
+
     def _parse_message(self, packet_type, payload_len, frame):
-        payload = frame[5:payload_len+5]
         # parse interactive commands
-        is_interactive_cmd = INPUT_PACKETS.__contains__(packet_type)
-        if is_interactive_cmd:
+        if packet_type in INPUT_PACKET_SET:
+            payload = frame[5:payload_len+5]
             self._parse_input_packet(packet_type, payload, frame)
         else:
             # consider as output packet, parse output Messages
+            payload = memoryview(bytearray(frame))[5:payload_len+5]
             self._parse_output_packet(packet_type, payload)
 
     def _parse_input_packet(self, packet_type, payload, frame):
-        payload_parser = match_command_handler(packet_type)
+        payload_parser = self._input_handlers.get(packet_type)
         if payload_parser:
             data, error = payload_parser(
                 payload, self.properties['userConfiguration'])
@@ -282,19 +314,12 @@ class UartMessageParser(MessageParserBase):
 
     def _parse_output_packet(self, packet_type, payload):
         # check if it is the valid out packet
-        payload_parser = None
-        is_other_output_packet = OTHER_OUTPUT_PACKETS.__contains__(packet_type)
-        if is_other_output_packet:
-            payload_parser = other_output_parser
-            data = payload_parser(payload)
+        if packet_type in OTHER_OUTPUT_PACKET_SET:
+            other_output_parser(payload)
             return
 
-        payload_parser = common_continuous_parser
-
-        output_packet_config = next(
-            (x for x in self.properties['userMessages']['outputPackets']
-                if x['name'] == packet_type), None)
-        data = payload_parser(payload, output_packet_config)
+        decoder = self._output_decoders.get(packet_type)
+        data = decode_continuous_packet(payload, decoder)
 
         if not data:
             # APP_CONTEXT.get_logger().logger.info(
@@ -305,3 +330,68 @@ class UartMessageParser(MessageParserBase):
                   packet_type=packet_type,
                   data=data,
                   event_time=time.time())
+
+
+class BufferedUartMessageParser(UartMessageParser):
+    '''
+    Uart message parser works on a bytearray buffer. It jumps between
+    headers with find, and decodes payload from memoryview slices.
+    '''
+
+    def __init__(self, configuration):
+        super(BufferedUartMessageParser, self).__init__(configuration)
+        self._buffer = bytearray()
+
+    def analyse(self, data):
+        # always work on a new buffer, the views handed out in last round
+        # would block resizing of the old one
+        buffer = bytearray(self._buffer)
+        buffer.extend(data)
+        buffer_view = memoryview(buffer)
+        buffer_len = len(buffer)
+        read_index = 0
+
+        while True:
+            header_index = buffer.find(MSG_HEADER_BYTES, read_index)
+            if header_index < 0:
+                # keep the last byte, it may be the start of next header
+                read_index = buffer_len - 1 \
+                    if buffer_len > 0 and buffer[-1] == MSG_HEADER[0] \
+                    else buffer_len
+                break
+
+            if header_index + PAYLOAD_INDEX > buffer_len:
+                read_index = header_index
+                break
+
+            payload_len = buffer[header_index + PAYLOAD_LEN_INDEX]
+            payload_start = header_index + PAYLOAD_INDEX
+            payload_end = payload_start + payload_len
+            frame_end = payload_end + CRC_LEN
+            if frame_end > buffer_len:
+                read_index = header_index
+                break
+
+            packet_type = buffer[header_index +
+                                 PACKET_TYPE_INDEX:header_index+4].decode('latin-1')
+
+            if check_crc16(buffer_view[header_index+2:payload_end],
+                           buffer[payload_end], buffer[payload_end+1]):
+                self._parse_buffer_message(
+                    packet_type,
+                    buffer_view[payload_start:payload_end],
+                    buffer_view[header_index:frame_end])
+            else:
+                self._on_crc_failure(
+                    packet_type, list(buffer_view[header_index:frame_end]))
+
+            read_index = frame_end
+
+        self._buffer = buffer[read_index:]
+
+    def _parse_buffer_message(self, packet_type, payload, frame):
+        if packet_type in INPUT_PACKET_SET:
+            # command parsers and listeners keep the list format
+            self._parse_input_packet(packet_type, list(payload), list(frame))
+        else:
+            self._parse_output_packet(packet_type, payload)
@@ -1,10 +1,11 @@
 import sys
+import math
 import struct
 import collections
-from . import filter_nan
 from .open_field_parser import decode_value
 from ...framework.utils.print import print_yellow
 from ...framework.context import APP_CONTEXT
+from ...framework.packet_layout import get_packet_layout
 # from .dmu_field_parser import decode_value
 
 # input packet
@@ -202,85 +203,90 @@ def read_eeprom_parser(payload, user_configuration=None):
 
 
 # output packet
+class ContinuousPacketDecoder(object):
+    '''
+    Precompiled decoder of an output packet, built from its configuration
+    '''
 
+    def __init__(self, configuration):
+        layout = get_packet_layout(configuration)
+        self.name = layout.name
+        self.struct = layout.struct
+        self.size = layout.size
+        self.names = layout.names
+        self.nan_indexes = layout.nan_indexes
+        self.is_list = layout.is_list
+        # unknown field types cannot be decoded, same as the previous parser
+        self.is_valid = layout.is_valid
+
+    def unpack(self, payload):
+        '''
+        Decode a single record, the payload length should match the layout
+        '''
+        if not self.is_valid or len(payload) != self.size:
+            raise struct.error(
+                'unpack requires a buffer of {0} bytes'.format(self.size))
+
+        values = self.struct.unpack_from(payload)
+        if self.nan_indexes:
+            values = list(values)
+            for idx in self.nan_indexes:
+                if math.isnan(values[idx]):
+                    values[idx] = 0
+        return collections.OrderedDict(zip(self.names, values))
+
+    def unpack_list(self, payload):
+        '''
+        Decode all records of a list packet in one pass
+        '''
+        if not self.is_valid:
+            raise struct.error('unsupported field type in packet {0}'
+                               .format(self.name))
+
+        packet_num = len(payload) // self.size
+        return [collections.OrderedDict(zip(self.names, item))
+                for item in self.struct.iter_unpack(
+                    payload[:packet_num*self.size])]
+
+
+def build_continuous_decoders(output_packets):
+    '''
+    Build a decoder registry keyed by output packet name
+    '''
+    decoders = {}
+    for output_packet in output_packets or []:
+        decoders[output_packet['name']] = ContinuousPacketDecoder(
+            output_packet)
+    return decoders
 
-def common_continuous_parser(payload, configuration):
+
+def _to_buffer(payload):
+    if isinstance(payload, list):
+        return bytearray(payload)
+    return payload
+
+
+def decode_continuous_packet(payload, decoder):
     '''
-    Unpack output packet
+    Unpack output packet with a precompiled decoder
     '''
-    if configuration is None:
+    if decoder is None:
         return
 
     data = None
-    is_list = 0
-    length = 0
-    pack_fmt = '<'
-    for value in configuration['payload']:
-        if value['type'] == 'float':
-            pack_fmt += 'f'
-            length += 4
-        elif value['type'] == 'uint32':
-            pack_fmt += 'I'
-            length += 4
-        elif value['type'] == 'int32':
-            pack_fmt += 'i'
-            length += 4
-        elif value['type'] == 'int16':
-            pack_fmt += 'h'
-            length += 2
-        elif value['type'] == 'uint16':
-            pack_fmt += 'H'
-            length += 2
-        elif value['type'] == 'double':
-            pack_fmt += 'd'
-            length += 8
-        elif value['type'] == 'int64':
-            pack_fmt += 'q'
-            length += 8
-        elif value['type'] == 'uint64':
-            pack_fmt += 'Q'
-            length += 8
-        elif value['type'] == 'char':
-            pack_fmt += 'c'
-            length += 1
-        elif value['type'] == 'uchar':
-            pack_fmt += 'B'
-            length += 1
-        elif value['type'] == 'uint8':
-            pack_fmt += 'B'
-            length += 1
-    len_fmt = '{0}B'.format(length)
-
-    has_list = configuration.__contains__('isList')
-    if has_list:
-        is_list = configuration['isList']
-
-    if is_list == 1:
-        packet_num = len(payload) // length
-        data = []
-        for i in range(packet_num):
-            payload_c = payload[i*length:(i+1)*length]
-            try:
-                pack_item = struct.pack(len_fmt, *payload_c)
-                item = struct.unpack(pack_fmt, pack_item)
-                out = [(value['name'], item[idx])
-                       for idx, value in enumerate(configuration['payload'])]
-                item = collections.OrderedDict(out)
-                data.append(item)
-            except Exception as ex:  # pylint: disable=broad-except
-                print(
-                    "error happened when decode the payload, pls restart driver: {0}"
-                    .format(ex))
+    payload = _to_buffer(payload)
+
+    if decoder.is_list:
+        try:
+            data = decoder.unpack_list(payload)
+        except Exception as ex:  # pylint: disable=broad-except
+            data = []
+            print(
+                "error happened when decode the payload, pls restart driver: {0}"
+                .format(ex))
     else:
         try:
-            pack_item = struct.pack(len_fmt, *payload)
-            data = struct.unpack(pack_fmt, pack_item)
-            out = [(
-                value['name'],
-                filter_nan(data[idx])
-            ) for idx, value in enumerate(configuration['payload'])]
-
-            data = collections.OrderedDict(out)
+            data = decoder.unpack(payload)
         except Exception as ex:  # pylint: disable=broad-except
             global error_decode_packet
             error_decode_packet = error_decode_packet + 1
@@ -296,6 +302,17 @@ def common_continuous_parser(payload, configuration):
     return data
 
 
+def common_continuous_parser(payload, configuration):
+    '''
+    Unpack output packet
+    '''
+    if configuration is None:
+        return
+
+    return decode_continuous_packet(
+        payload, ContinuousPacketDecoder(configuration))
+
+
 def other_output_parser(payload):
     return payload
 
@@ -167,7 +167,9 @@ class NTRIPClient(EventBase):
 
 
     def handle_parsed_data(self, data):
-        combined_data = []
-        for item in data:
-            combined_data += item
-        self.emit('parsed', combined_data)
+        # frames are memoryviews, listeners of frames could send them one by
+        # one, listeners of parsed get them joined in one copy
+        self.emit('frames', data)
+        if self.listeners.__contains__('parsed'):
+            combined_data = list(b''.join(data))
+            self.emit('parsed', combined_data)
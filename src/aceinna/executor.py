@@ -5,6 +5,7 @@ import os
 import sys
 import signal
 import time
+import multiprocessing
 from aceinna.bootstrap import Loader
 from aceinna.framework.decorator import (
     receive_args, handle_application_exception)
@@ -56,6 +57,8 @@ def start_app(**kwargs):
 
 
 if __name__ == '__main__':
+    # log parser may start processes in packaged executable
+    multiprocessing.freeze_support()
     signal.signal(signal.SIGINT, kill_app)
     # compatible code for windows python 3.8
     if IS_WINDOWS and IS_LATER_PY_38:
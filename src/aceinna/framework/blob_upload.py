@@ -0,0 +1,240 @@
+"""
+Chunked upload of log files to Azure block blobs. A log file is cut into
+fixed-size chunks, each chunk is gzip-compressed and put as a block by a
+bounded thread pool, then the blocks put so far are committed in order, so
+the blob is a gzip stream of the uploaded part of the file. Blocks after a
+failed chunk are discarded by the commit and uploaded again. The progress is
+kept in a local manifest, an interrupted upload resumes from the chunks not
+uploaded yet.
+"""
+import os
+import io
+import gzip
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from azure.storage.blob import ContentSettings
+from azure.storage.blob.models import BlobBlock
+
+# bytes of log file in a block, before compression
+CHUNK_SIZE = 4 * 1024 * 1024
+MAX_WORKERS = 4
+# a request is retried with doubled delay until the attempts are used up
+MAX_ATTEMPTS = 6
+RETRY_DELAY = 1
+MAX_RETRY_DELAY = 32
+ERROR_AUTHORIZATION = 'AuthenticationFailed'
+CONTENT_TYPE = 'application/gzip'
+
+
+def get_block_id(index):
+    # ids of blocks in a blob should have the same length
+    return 'chunk-{0:08d}'.format(index)
+
+
+def compress_chunk(data):
+    # mtime is fixed, so a chunk uploaded again is the same block
+    stream = io.BytesIO()
+    with gzip.GzipFile(fileobj=stream, mode='wb', mtime=0) as gzip_file:
+        gzip_file.write(data)
+    return stream.getvalue()
+
+
+class UploadManifest(object):
+    '''
+    Upload progress of log files, saved as a json file. An entry per log
+    file records the blob, the chunk size, the chunks uploaded and the
+    count of chunks committed.
+    '''
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(file_path):
+            try:
+                with open(file_path) as manifest_file:
+                    self.entries = json.load(manifest_file)
+            except ValueError:
+                self.entries = {}
+        # the uploads done in previous runs are not needed any more
+        self.entries = dict((k, v) for k, v in self.entries.items()
+                            if not v['done'])
+
+    def get_entry(self, log_path, container_name, blob_name, chunk_size):
+        with self._lock:
+            entry = self.entries.get(log_path)
+            if entry is None or entry['blob'] != blob_name:
+                entry = {
+                    'container': container_name,
+                    'blob': blob_name,
+                    'chunk_size': chunk_size,
+                    'uploaded': [],
+                    'committed': 0,
+                    'done': False
+                }
+                self.entries[log_path] = entry
+            return entry
+
+    def add_uploaded(self, entry, index):
+        with self._lock:
+            entry['uploaded'].append(index)
+            self._save()
+
+    def update(self, entry, **kwargs):
+        with self._lock:
+            entry.update(kwargs)
+            self._save()
+
+    def remove(self, log_path):
+        with self._lock:
+            self.entries.pop(log_path, None)
+            self._save()
+
+    def _save(self):
+        # replace the manifest at once, a broken write does not lose progress
+        temp_path = self.file_path + '.tmp'
+        with open(temp_path, 'w') as manifest_file:
+            json.dump(self.entries, manifest_file)
+        os.replace(temp_path, self.file_path)
+
+
+class ChunkedBlobUploader(object):
+    '''
+    Upload log files as gzip-compressed block blobs. blob_service_factory
+    returns a BlockBlobService, it is called again after an authorization
+    error, to get a service with a new sas token.
+    '''
+
+    def __init__(self, blob_service_factory, manifest_path, chunk_size=CHUNK_SIZE,
+                 max_workers=MAX_WORKERS, max_attempts=MAX_ATTEMPTS,
+                 retry_delay=RETRY_DELAY, max_retry_delay=MAX_RETRY_DELAY):
+        self.blob_service_factory = blob_service_factory
+        self.manifest = UploadManifest(manifest_path)
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.sleep = time.sleep
+        self._service = None
+        self._service_lock = threading.Lock()
+        self.chunk_bytes = 0  # bytes of log files uploaded
+        self.uploaded_bytes = 0  # compressed bytes uploaded
+        self.failed_chunks = 0
+
+    def upload_file(self, file_path, container_name, blob_name, final=False):
+        '''
+        Upload the chunks of log file not uploaded yet, and commit the chunks
+        uploaded in order. Only full chunks are uploaded until final, which
+        uploads the rest of file as the last chunk. Return the count of
+        chunks committed.
+        '''
+        entry = self.manifest.get_entry(
+            file_path, container_name, blob_name, self.chunk_size)
+        if entry['done']:
+            return entry['committed']
+
+        size = os.path.getsize(file_path)
+        count = size // entry['chunk_size']
+        if final and size % entry['chunk_size'] > 0:
+            count += 1
+
+        uploaded = set(entry['uploaded'])
+        pending = [i for i in range(count) if i not in uploaded]
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                list(executor.map(
+                    lambda index: self._upload_chunk(file_path, entry, index), pending))
+
+        uploaded = set(entry['uploaded'])
+        committed = entry['committed']
+        while committed < count and committed in uploaded:
+            committed += 1
+
+        if committed > entry['committed']:
+            try:
+                self._call('put_block_list', entry['container'], entry['blob'],
+                           [BlobBlock(id=get_block_id(i)) for i in range(committed)],
+                           content_settings=ContentSettings(content_type=CONTENT_TYPE))
+            except Exception as ex:  # pylint: disable=broad-except
+                print('Exception when commit blob {0}: {1}'.format(
+                    entry['blob'], ex))
+                return entry['committed']
+
+            # blob service discards the blocks left out of the committed list,
+            # the chunks after a gap are uploaded again by the next call
+            self.manifest.update(
+                entry, uploaded=[i for i in entry['uploaded'] if i < committed])
+
+        self.manifest.update(entry, committed=committed,
+                             done=final and committed == count)
+        return committed
+
+    def resume(self):
+        '''
+        Finish the uploads left in manifest by a previous run
+        '''
+        for file_path, entry in list(self.manifest.entries.items()):
+            if entry['done']:
+                continue
+            if not os.path.exists(file_path):
+                self.manifest.remove(file_path)
+                continue
+            self.upload_file(file_path, entry['container'], entry['blob'], True)
+
+    def get_statistics(self):
+        return {
+            'chunk_bytes': self.chunk_bytes,
+            'uploaded_bytes': self.uploaded_bytes,
+            'failed_chunks': self.failed_chunks
+        }
+
+    def _upload_chunk(self, file_path, entry, index):
+        chunk_size = entry['chunk_size']
+        with open(file_path, 'rb') as log_file:
+            log_file.seek(index * chunk_size)
+            data = log_file.read(chunk_size)
+        block = compress_chunk(data)
+        try:
+            self._call('put_block', entry['container'], entry['blob'],
+                       block, get_block_id(index))
+        except Exception as ex:  # pylint: disable=broad-except
+            # the chunk is uploaded again by the next call
+            self.failed_chunks += 1
+            print('Exception when upload chunk {0} of {1}: {2}'.format(
+                index, entry['blob'], ex))
+            return False
+
+        self.manifest.add_uploaded(entry, index)
+        self.chunk_bytes += len(data)
+        self.uploaded_bytes += len(block)
+        return True
+
+    def _get_service(self):
+        with self._service_lock:
+            if self._service is None:
+                self._service = self.blob_service_factory()
+            return self._service
+
+    def _reset_service(self, service):
+        with self._service_lock:
+            if self._service is service:
+                self._service = None
+
+    def _call(self, method, *args, **kwargs):
+        delay = self.retry_delay
+        attempt = 1
+        while True:
+            service = self._get_service()
+            try:
+                return getattr(service, method)(*args, **kwargs)
+            except Exception as ex:  # pylint: disable=broad-except
+                if attempt >= self.max_attempts:
+                    raise
+                if ERROR_AUTHORIZATION in str(ex):
+                    self._reset_service(service)
+                self.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+                attempt += 1
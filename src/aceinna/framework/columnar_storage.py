@@ -0,0 +1,170 @@
+"""
+Columnar export of output packets. Records of a packet type are collected
+as packed bytes, then decoded with a numpy structured dtype built from the
+payload config, and saved as a compressed .npz or a memory-mappable .npy.
+"""
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required by npz/npy export
+    np = None
+
+EXPORT_FORMATS = ['csv', 'npz', 'npy']
+COLUMNAR_FORMATS = ['npz', 'npy']
+# packed records are appended to this file until the writer is closed
+RECORD_FILE_SUFFIX = '.records'
+# bytes decoded per round when records are copied into a .npy file
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+
+# payload type -> (struct format, numpy dtype), little-endian and packed
+PAYLOAD_TYPES = {
+    'float': ('f', '<f4'),
+    'double': ('d', '<f8'),
+    'int16': ('h', '<i2'),
+    'uint16': ('H', '<u2'),
+    'int32': ('i', '<i4'),
+    'uint32': ('I', '<u4'),
+    'int64': ('q', '<i8'),
+    'uint64': ('Q', '<u8'),
+    'char': ('c', 'S1'),
+    'uchar': ('B', 'u1'),
+    'uint8': ('B', 'u1'),
+}
+# message parsers decode scaled fields to float
+SCALED_TYPE = ('d', '<f8')
+
+
+def is_columnar_format(export_format):
+    return export_format in COLUMNAR_FORMATS
+
+
+def get_payload_types(payload, decoded=False):
+    '''
+    Get (struct format, numpy dtype) of fields in payload config. Set decoded
+    if records are packed from values decoded by message parsers.
+    '''
+    types = []
+    for value in payload:
+        if decoded and 'scaling' in value:
+            types.append(SCALED_TYPE)
+        elif value['type'] in PAYLOAD_TYPES:
+            types.append(PAYLOAD_TYPES[value['type']])
+        else:
+            raise ValueError('Payload type {0} of {1} is not supported in columnar export'.format(
+                value['type'], value['name']))
+    return types
+
+
+def build_record_struct(payload, decoded=False):
+    return struct.Struct(
+        '<' + ''.join(x[0] for x in get_payload_types(payload, decoded)))
+
+
+def build_dtype(payload, decoded=False):
+    '''
+    Build the structured dtype of a record, a field per payload item
+    '''
+    if np is None:
+        raise ValueError('numpy is required by npz/npy export')
+
+    return np.dtype([(value['name'], numpy_type) for value, (_, numpy_type)
+                     in zip(payload, get_payload_types(payload, decoded))])
+
+
+class ColumnarWriter(object):
+    '''
+    Collect packed records of a packet type, and save them as numpy arrays
+    into file_path + '.npz' or file_path + '.npy' when closed.
+    '''
+
+    def __init__(self, file_path, payload, export_format, decoded=False):
+        if not is_columnar_format(export_format):
+            raise ValueError(
+                'Export format {0} is not columnar'.format(export_format))
+
+        self.file_path = file_path
+        self.export_format = export_format
+        self.dtype = build_dtype(payload, decoded)
+        self.record_struct = build_record_struct(payload, decoded)
+        self.record_size = self.dtype.itemsize
+        self.record_count = 0
+        self.record_file = open(file_path + RECORD_FILE_SUFFIX, 'w+b')
+
+    def write(self, data):
+        '''
+        Append packed records, a partial record at the end is dropped.
+        Return the count of records appended.
+        '''
+        count = len(data) // self.record_size
+        if count > 0:
+            self.record_file.write(data[0:count * self.record_size])
+            self.record_count += count
+        return count
+
+    def write_values(self, values):
+        '''
+        Append a record of decoded values, in the order of payload config
+        '''
+        self.record_file.write(self.record_struct.pack(*values))
+        self.record_count += 1
+
+    def merge(self, record_file):
+        '''
+        Append records of another writer, which is closed with export=False
+        '''
+        while True:
+            data = record_file.read(COPY_CHUNK_SIZE)
+            if not data:
+                break
+            self.record_file.write(data)
+            self.record_count += len(data) // self.record_size
+
+    def close(self, export=True):
+        '''
+        Save the collected records as numpy arrays, and remove the record
+        file. Keep the record file without saving if export is False.
+        '''
+        if self.record_file is None:
+            return None
+
+        if not export:
+            self.record_file.close()
+            self.record_file = None
+            return self.file_path + RECORD_FILE_SUFFIX
+
+        self.record_file.flush()
+        self.record_file.seek(0)
+        if self.export_format == 'npy':
+            output_path = self.save_npy()
+        else:
+            output_path = self.save_npz()
+        self.record_file.close()
+        self.record_file = None
+        os.remove(self.file_path + RECORD_FILE_SUFFIX)
+        return output_path
+
+    def save_npy(self):
+        # copy records chunk by chunk into a memory-mapped array
+        output_path = self.file_path + '.npy'
+        records = np.lib.format.open_memmap(
+            output_path, mode='w+', dtype=self.dtype, shape=(self.record_count,))
+        chunk_records = max(1, COPY_CHUNK_SIZE // self.record_size)
+        index = 0
+        while index < self.record_count:
+            data = self.record_file.read(chunk_records * self.record_size)
+            chunk = np.frombuffer(data, dtype=self.dtype)
+            records[index:index + len(chunk)] = chunk
+            index += len(chunk)
+        records.flush()
+        del records
+        return output_path
+
+    def save_npz(self):
+        # an array per field, so a column is loaded without the others
+        output_path = self.file_path + '.npz'
+        records = np.frombuffer(self.record_file.read(), dtype=self.dtype)
+        np.savez_compressed(
+            output_path, **dict((name, records[name]) for name in self.dtype.names))
+        return output_path
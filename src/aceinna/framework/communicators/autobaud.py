@@ -0,0 +1,225 @@
+"""
+Autobaud of serial ports. Probes of (port, baud) are scheduled on a pool of
+threads. Each port is sniffed at each baud for packets of streaming output
+first, then pinged. A port is opened at one baud at a time, and all probes
+are cancelled once a device is confirmed.
+"""
+import time
+import threading
+import serial
+from ..context import APP_CONTEXT
+from ..utils.crc import check_crc16
+
+PACKET_HEADER = b'\x55\x55'
+# header, packet type, payload length and crc
+PACKET_OVERHEAD = 7
+DEFAULT_MAX_WORKERS = 8
+# seconds to sniff streaming output at a baud
+SNIFF_TIME = 0.3
+SNIFF_READ_SIZE = 256
+
+SNIFF = 'sniff'
+PING = 'ping'
+
+
+class ProbeCancelled(Exception):
+    '''
+    Raised by read and write of a probed serial port after cancel
+    '''
+
+
+def open_serial_port(port, baud):
+    return serial.Serial(port, baud, timeout=0.1, exclusive=True)
+
+
+def has_packet(data):
+    '''
+    Check if data contains a packet started with 0x5555 and a valid crc
+    '''
+    index = data.find(PACKET_HEADER)
+    while 0 <= index <= len(data) - PACKET_OVERHEAD:
+        payload_len = data[index + 4]
+        crc_index = index + 5 + payload_len
+        if crc_index + 2 <= len(data) and check_crc16(
+                data[index + 2:crc_index], data[crc_index], data[crc_index + 1]):
+            return True
+        index = data.find(PACKET_HEADER, index + 1)
+    return False
+
+
+class ProbePort(object):
+    '''
+    Serial port given to ping while probing. Read and write raise
+    ProbeCancelled after the probe is cancelled, so a long ping is stopped.
+    '''
+
+    def __init__(self, serial_port, cancel_event):
+        self.serial_port = serial_port
+        self._cancel_event = cancel_event
+
+    def read(self, size=1):
+        if self._cancel_event.is_set():
+            raise ProbeCancelled()
+        return self.serial_port.read(size)
+
+    def write(self, data):
+        if self._cancel_event.is_set():
+            raise ProbeCancelled()
+        return self.serial_port.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.serial_port, name)
+
+
+class AutobaudScheduler(object):
+    '''
+    Find the serial port and baud of a device. confirm is called with the
+    probed port, and returns True if a device is confirmed on it.
+    '''
+
+    def __init__(self, ports, baudrate_list, confirm, open_port=None,
+                 max_workers=DEFAULT_MAX_WORKERS, sniff_time=SNIFF_TIME,
+                 preferred_bauds=None):
+        self.ports = list(ports)
+        self.max_workers = max(1, max_workers)
+        self.sniff_time = sniff_time
+        self.result = None
+        self.probe_count = 0
+        self._confirm = confirm
+        self._open_port = open_port or open_serial_port
+        self._cancel_event = threading.Event()
+        self._condition = threading.Condition()
+        self._busy_ports = set()
+        self._done_ports = set()
+        self._sniffed_ports = set()
+        self._tasks = self._build_tasks(baudrate_list, preferred_bauds or {})
+
+    def _build_tasks(self, baudrate_list, preferred_bauds):
+        # a baud of ports at a time, ports are probed in parallel
+        port_bauds = []
+        for port in self.ports:
+            bauds = list(baudrate_list)
+            preferred = preferred_bauds.get(port)
+            if preferred in bauds:
+                bauds.remove(preferred)
+                bauds.insert(0, preferred)
+            port_bauds.append((port, bauds))
+
+        tasks = []
+        for mode in [SNIFF, PING]:
+            for index in range(len(baudrate_list)):
+                for port, bauds in port_bauds:
+                    tasks.append((mode, port, bauds[index]))
+        return tasks
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        with self._condition:
+            self._cancel_event.set()
+            self._condition.notify_all()
+
+    def run(self):
+        '''
+        Probe until a device is confirmed, all probes are done or cancelled.
+        Return (serial port, baud) of the device or None
+        '''
+        threads = []
+        for index in range(min(self.max_workers, len(self.ports))):
+            thread = threading.Thread(
+                target=self._work, name='autobaud-{0}'.format(index))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+        return self.result
+
+    def _next_task(self):
+        with self._condition:
+            while True:
+                if self.cancelled:
+                    return None
+
+                self._tasks = [
+                    x for x in self._tasks if x[1] not in self._done_ports]
+                for index, task in enumerate(self._tasks):
+                    if task[1] not in self._busy_ports:
+                        del self._tasks[index]
+                        self._busy_ports.add(task[1])
+                        return task
+
+                if not self._tasks:
+                    return None
+                self._condition.wait()
+
+    def _work(self):
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+
+            mode, port, baud = task
+            try:
+                self._probe(mode, port, baud)
+            except Exception as ex:  # pylint: disable=broad-except
+                APP_CONTEXT.get_logger().logger.info(
+                    '{0} : {1} probe failed {2}'.format(port, baud, ex))
+            finally:
+                with self._condition:
+                    self._busy_ports.discard(port)
+                    self._condition.notify_all()
+
+    def _probe(self, mode, port, baud):
+        APP_CONTEXT.get_logger().logger.info(
+            "{0} {1}:{2}".format(mode, port, baud))
+        try:
+            serial_port = self._open_port(port, baud)
+        except Exception:  # pylint: disable=broad-except
+            APP_CONTEXT.get_logger().logger.info(
+                '{0} : {1} open failed'.format(port, baud))
+            with self._condition:
+                self._done_ports.add(port)
+            return
+
+        self.probe_count += 1
+        is_confirmed = False
+        try:
+            if mode == SNIFF:
+                if self._sniff(serial_port):
+                    # ping at the baud before other probes of the port
+                    with self._condition:
+                        self._sniffed_ports.add(port)
+                        self._tasks = [x for x in self._tasks if x[1] != port]
+                        self._tasks.insert(0, (PING, port, baud))
+                return
+
+            is_confirmed = self._confirm(
+                ProbePort(serial_port, self._cancel_event))
+            with self._condition:
+                if is_confirmed and self.result is None:
+                    self.result = (serial_port, baud)
+                    self._cancel_event.set()
+                    self._condition.notify_all()
+                elif is_confirmed:
+                    is_confirmed = False
+                elif port in self._sniffed_ports:
+                    # streaming packets, but not the wanted device
+                    self._done_ports.add(port)
+        finally:
+            if not is_confirmed:
+                serial_port.close()
+
+    def _sniff(self, serial_port):
+        data = b''
+        end_time = time.time() + self.sniff_time
+        while not self.cancelled and time.time() < end_time:
+            # a packet is at most 262 bytes
+            data = data[-SNIFF_READ_SIZE * 2:] + bytes(
+                serial_port.read(SNIFF_READ_SIZE))
+            if has_packet(data):
+                return True
+        return False
@@ -0,0 +1,84 @@
+"""
+Cache of devices found on serial ports. Entries are keyed by the USB
+identity of a port, so a device is found again after its port is renamed,
+and are validated by the fingerprint of ping response.
+"""
+import json
+
+
+def build_port_key(port_info):
+    '''
+    Build the key of a port from the info of serial.tools.list_ports.
+    Channels of a multi channel adapter share the serial number, the
+    interface in location tells them apart.
+    '''
+    if port_info.vid is None:
+        return 'port:{0}'.format(port_info.device)
+
+    usb_id = '{0:04X}:{1:04X}'.format(port_info.vid, port_info.pid or 0)
+    location = port_info.location or ''
+    if port_info.serial_number:
+        interface = location.rsplit(':', 1)[1] if ':' in location else ''
+        return 'usb:{0}:{1}:{2}'.format(
+            usb_id, port_info.serial_number, interface)
+    return 'usb:{0}@{1}'.format(usb_id, location)
+
+
+class DiscoveryCache(object):
+    '''
+    Port, baud, device type and fingerprint of found devices, saved in a
+    json file
+    '''
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._devices = None
+        self._last = None
+
+    def _load(self):
+        if self._devices is not None:
+            return
+
+        self._devices = {}
+        try:
+            with open(self.file_path) as json_data:
+                parsed_json = json.load(json_data)
+            self._devices = dict(parsed_json['devices'])
+            self._last = parsed_json.get('last')
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    def get(self, key):
+        self._load()
+        return self._devices.get(key)
+
+    def sort_ports(self, ports, port_keys):
+        '''
+        Sort ports to validate, the port of last found device is the first
+        '''
+        self._load()
+        return sorted(ports, key=lambda port: port_keys.get(port) != self._last)
+
+    def update(self, key, port, baud, device_type, fingerprint):
+        self._load()
+        self._devices[key] = {
+            'port': port,
+            'baud': baud,
+            'device_type': device_type,
+            'fingerprint': fingerprint
+        }
+        self._last = key
+        self.save()
+
+    def remove(self, key):
+        self._load()
+        if self._devices.pop(key, None) is not None:
+            self.save()
+
+    def save(self):
+        try:
+            with open(self.file_path, 'w') as outfile:
+                json.dump({'last': self._last, 'devices': self._devices},
+                          outfile)
+        except Exception:  # pylint: disable=broad-except
+            pass
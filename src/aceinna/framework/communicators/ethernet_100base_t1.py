@@ -1,10 +1,12 @@
 import time
-import collections
+import threading
 from scapy.all import sendp, conf, AsyncSniffer
 from ..constants import (BAUDRATE_LIST, INTERFACES)
 from ..utils.print import (print_red)
 from ..utils import helper
 from ..communicator import Communicator
+from ..receive_cache import ReceiveCache
+from . import raw_socket
 
 
 class Ethernet(Communicator):
@@ -23,9 +25,18 @@ class Ethernet(Communicator):
         self.filter_device_type_assigned = False
 
         self.iface_confirmed = False
-        self.receive_cache = collections.deque(maxlen=1000)
+        self.receive_cache = ReceiveCache(
+            INTERFACES.ETH_100BASE_T1,
+            policy=getattr(options, 'receive_cache_policy', None) or 'drop-oldest')
         self.use_length_as_protocol = True
         self.async_sniffer = None
+        self.raw_receiver = None
+        self.send_socket = None
+        self._send_socket_iface = None
+        self._send_lock = threading.Lock()
+        self._mac_header = None
+        self._mac_header_key = None
+        self.capture = getattr(options, 'ethernet_capture', 'auto') or 'auto'
 
         if options and options.device_type != 'auto':
             self.filter_device_type = options.device_type
@@ -109,10 +120,20 @@ class Ethernet(Communicator):
         time.sleep(0.5)
         async_sniffer.stop()
 
-    def reshake_hand(self):
+    def stop_listen_data(self):
+        # a capture thread blocked by a full cache could exit
+        self.receive_cache.close()
+
         if self.async_sniffer and self.async_sniffer.running:
             self.async_sniffer.stop()
 
+        if self.raw_receiver:
+            self.raw_receiver.stop()
+            self.raw_receiver = None
+
+    def reshake_hand(self):
+        self.stop_listen_data()
+
         self.iface_confirmed = False
         dst_mac_str = 'FF:FF:FF:FF:FF:FF'
 
@@ -149,6 +170,20 @@ class Ethernet(Communicator):
         The different mac address make the filter very hard to match
         '''
         hard_code_mac = '04:00:00:00:00:04'
+        self.receive_cache.open()
+
+        if self.capture != 'scapy' and raw_socket.is_supported():
+            try:
+                self.raw_receiver = raw_socket.RawSocketReceiver(
+                    self.iface, [self.dst_mac, hard_code_mac],
+                    self.handle_receive_frame)
+                self.raw_receiver.start()
+                return
+            except OSError:
+                if self.capture == 'raw-socket':
+                    raise
+                self.raw_receiver = None
+
         filter_exp = 'ether src host {0} or {1}'.format(
             self.dst_mac, hard_code_mac)
 
@@ -158,17 +193,22 @@ class Ethernet(Communicator):
         time.sleep(0.1)
 
     def handle_recive_packet(self, packet):
-        packet_raw = bytes(packet)[12:]
-        packet_raw_length = packet_raw[0:2]
-        packet_type = packet_raw[4:6]
+        self.handle_receive_frame(bytes(packet))
+
+    def handle_receive_frame(self, frame):
+        '''
+        Cache the packet of a frame, frame could be bytes or memoryview
+        '''
+        packet_raw_length = frame[12:14]
+        packet_type = frame[16:18]
 
         if packet_type == b'\x01\xcc':
-            self.dst_mac = packet.src
+            self.dst_mac = raw_socket.bytes_to_mac(frame[6:12])
 
             if packet_raw_length == b'\x00\x00':
                 self.use_length_as_protocol = False
 
-        self.receive_cache.append(packet_raw[2:])
+        self.receive_cache.put(bytes(frame[14:]))
 
     def open(self):
         '''
@@ -179,6 +219,8 @@ class Ethernet(Communicator):
         '''
         close
         '''
+        self.stop_listen_data()
+        self.close_send_socket()
 
     def can_write(self):
         if self.iface:
@@ -189,19 +231,55 @@ class Ethernet(Communicator):
         '''
         write
         '''
-        try:
-            sendp(data, iface=self.iface, verbose=0)
-            # print(data)
-        except Exception as e:
-            raise
+        self.write_many([data])
+
+    def write_many(self, frames):
+        '''
+        Send a burst of frames on the persistent send socket, return the
+        count of sent frames
+        '''
+        with self._send_lock:
+            send_socket = self._get_send_socket()
+            try:
+                for frame in frames:
+                    send_socket.send(frame)
+            except Exception:
+                self.close_send_socket()
+                raise
+        return len(frames)
+
+    def _get_send_socket(self):
+        if self.send_socket and self._send_socket_iface == self.iface:
+            return self.send_socket
+
+        self.close_send_socket()
+        if self.capture != 'scapy' and raw_socket.is_supported():
+            try:
+                self.send_socket = raw_socket.open_send_socket(self.iface)
+            except OSError:
+                if self.capture == 'raw-socket':
+                    raise
+
+        if not self.send_socket:
+            self.send_socket = conf.L2socket(iface=self.iface)
+
+        self._send_socket_iface = self.iface
+        return self.send_socket
+
+    def close_send_socket(self):
+        if self.send_socket:
+            self.send_socket.close()
+            self.send_socket = None
+            self._send_socket_iface = None
 
     def read(self, size=100):
         '''
         read
         '''
-        if len(self.receive_cache) > 0:
-            return self.receive_cache.popleft()
-        return []
+        packet = self.receive_cache.get()
+        if packet is None:
+            return []
+        return packet
 
     def reset_buffer(self):
         '''
@@ -215,6 +293,17 @@ class Ethernet(Communicator):
     def get_dst_mac(self):
         return bytes([int(x, 16) for x in self.dst_mac.split(':')])
 
+    def get_mac_header(self):
+        '''
+        Destination and source MAC bytes of ethernet header, rebuilt only
+        when a MAC is changed
+        '''
+        mac_header_key = (self.dst_mac, self.src_mac)
+        if self._mac_header_key != mac_header_key:
+            self._mac_header = self.get_dst_mac() + self.get_src_mac()
+            self._mac_header_key = mac_header_key
+        return self._mac_header
+
     def get_network_card(self):
         network_card_info = []
         for item in conf.ifaces:
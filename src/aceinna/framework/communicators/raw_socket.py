@@ -0,0 +1,164 @@
+"""
+Receive and send ethernet frames on Linux AF_PACKET raw sockets. Frames
+are filtered in kernel by a classic BPF program, and drained in batches
+into preallocated buffers by a thread.
+"""
+import socket
+import select
+import struct
+import ctypes
+import threading
+
+ETH_P_ALL = 0x0003
+SO_ATTACH_FILTER = 26
+ETHERNET_HEADER_LEN = 14
+# 1500 bytes of MTU and the header, with room for a VLAN tag
+MAX_FRAME_SIZE = 2048
+BATCH_SIZE = 64
+POLL_TIMEOUT = 0.1
+# preamble of packets after the ethernet header
+PACKET_PREAMBLE = b'\x55\x55'
+
+# classic BPF opcodes
+BPF_LD_W_ABS = 0x20
+BPF_LD_H_ABS = 0x28
+BPF_JEQ_K = 0x15
+BPF_RET_K = 0x06
+BPF_ACCEPT = 0xFFFF
+
+
+def is_supported():
+    '''
+    Raw socket of packet family is only available on Linux
+    '''
+    return hasattr(socket, 'AF_PACKET')
+
+
+def mac_to_bytes(mac):
+    if isinstance(mac, (bytes, bytearray)):
+        return bytes(mac)
+    return bytes([int(x, 16) for x in mac.split(':')])
+
+
+def bytes_to_mac(mac_bytes):
+    return ':'.join('{0:02x}'.format(x) for x in mac_bytes)
+
+
+def build_filter(src_macs, preamble=PACKET_PREAMBLE):
+    '''
+    Build a BPF program, which accepts frames sent from one of src_macs and
+    started with the preamble after the ethernet header. The 2 bytes after
+    MACs are the length of payload instead of an ethertype, so the preamble
+    is matched.
+    '''
+    program = []
+    preamble_index = len(src_macs) * 4 + 1
+    for index, mac in enumerate(src_macs):
+        mac_high, mac_low = struct.unpack('!IH', mac_to_bytes(mac))
+        program.append((BPF_LD_W_ABS, 0, 0, 6))
+        program.append((BPF_JEQ_K, 0, 2, mac_high))
+        program.append((BPF_LD_H_ABS, 0, 0, 10))
+        program.append(
+            (BPF_JEQ_K, preamble_index - (index * 4 + 4), 0, mac_low))
+    program.append((BPF_RET_K, 0, 0, 0))
+    program.append((BPF_LD_H_ABS, 0, 0, ETHERNET_HEADER_LEN))
+    program.append((BPF_JEQ_K, 0, 1, struct.unpack('!H', preamble)[0]))
+    program.append((BPF_RET_K, 0, 0, BPF_ACCEPT))
+    program.append((BPF_RET_K, 0, 0, 0))
+    return program
+
+
+def attach_filter(sock, program):
+    instructions = ctypes.create_string_buffer(
+        b''.join([struct.pack('HBBI', *x) for x in program]))
+    # struct sock_fprog, the kernel copies the instructions
+    fprog = struct.pack('HL', len(program), ctypes.addressof(instructions))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+
+def open_raw_socket(iface, program=None):
+    '''
+    Open a raw socket on iface. The filter is attached before binding, so
+    no frame is queued unfiltered.
+    '''
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, 0)
+    try:
+        if program:
+            attach_filter(sock, program)
+        sock.bind((iface, ETH_P_ALL))
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+def open_send_socket(iface):
+    '''
+    Open a raw socket to send frames on iface. It is bound to no protocol,
+    so received frames are not queued on it.
+    '''
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, 0)
+    try:
+        sock.bind((iface, 0))
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+class RawSocketReceiver(object):
+    '''
+    Receive frames of an interface in a thread, and pass each frame to the
+    handler as a memoryview, which is only valid during the call.
+    '''
+
+    def __init__(self, iface, src_macs, handler,
+                 batch_size=BATCH_SIZE, frame_size=MAX_FRAME_SIZE):
+        self.iface = iface
+        self.received_count = 0
+        self.batch_count = 0
+        self._handler = handler
+        self._buffers = [bytearray(frame_size) for _ in range(batch_size)]
+        self._views = [memoryview(x) for x in self._buffers]
+        self._socket = open_raw_socket(iface, build_filter(src_macs))
+        self._socket.setblocking(False)
+        self._thread = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._receive_loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self._socket.close()
+
+    def read_batch(self):
+        '''
+        Read the queued frames into the buffers until the socket is empty or
+        the buffers are full, return the size of each frame
+        '''
+        sizes = []
+        for view in self._views:
+            try:
+                sizes.append(self._socket.recv_into(view))
+            except (BlockingIOError, InterruptedError):
+                break
+        if sizes:
+            self.batch_count += 1
+            self.received_count += len(sizes)
+        return sizes
+
+    def _receive_loop(self):
+        while self.running:
+            readable, _, _ = select.select(
+                [self._socket], [], [], POLL_TIMEOUT)
+            if not readable:
+                continue
+            for view, size in zip(self._views, self.read_batch()):
+                self._handler(view[:size])
@@ -1,24 +1,14 @@
 import os
 import time
 import json
-import threading
 import serial
 import serial.tools.list_ports
 from ..constants import (BAUDRATE_LIST, INTERFACES)
 from ..context import APP_CONTEXT
 from ..communicator import Communicator
-
-
-class StoppableThread(threading.Thread):
-    def __init__(self, *args, **kwargs):
-        super(StoppableThread, self).__init__(*args, **kwargs)
-        self._stop_event = threading.Event()
-
-    def stop(self):
-        self._stop_event.set()
-
-    def stopped(self):
-        return self._stop_event.is_set()
+from .autobaud import (AutobaudScheduler, DEFAULT_MAX_WORKERS,
+                       open_serial_port)
+from .discovery_cache import (DiscoveryCache, build_port_key)
 
 
 class SerialPort(Communicator):
@@ -45,6 +35,13 @@ class SerialPort(Communicator):
         self.filter_device_type = None
         self.filter_device_type_assigned = False
         self._connection_history = None
+        self._autobaud_scheduler = None
+        self.port_opener = open_serial_port
+        self.port_keys = {}
+        self.discovery_cache = DiscoveryCache(os.path.join(
+            self.setting_folder_path, 'discovery.json'))
+        self.autobaud_workers = getattr(
+            options, 'autobaud_workers', None) or DEFAULT_MAX_WORKERS
 
         if options and options.baudrate != 'auto':
             self.baudrate_list = [options.baudrate]
@@ -58,6 +55,7 @@ class SerialPort(Communicator):
 
     def pause_find(self):
         self._status = 'pause'
+        self._cancel_autobaud()
 
     def resume_find(self):
         self._status = 'idle'
@@ -126,10 +124,12 @@ class SerialPort(Communicator):
                     self.baudrate_assigned = current_baudrate_assigned
 
                 else:
-                    if self.try_last_port():
-                        break
+                    self.load_connection_history()
                     self._available_ports = self.find_ports()
-                    self.autobaud(self._available_ports)
+                    scan_ports = self.try_cached_devices(self._available_ports)
+                    if self.device:
+                        break
+                    self.autobaud(scan_ports)
 
                 self._tried += 1
 
@@ -153,6 +153,7 @@ class SerialPort(Communicator):
         '''
         port_list = list(serial.tools.list_ports.comports())
         ports = [p.device for p in port_list]
+        self.port_keys = dict((p.device, build_port_key(p)) for p in port_list)
 
         result = []
 
@@ -174,186 +175,132 @@ class SerialPort(Communicator):
                         'port:%s is in use', port)
         return result
 
-    def thread_for_ping(self, ports):
-        # for port in ports:
-        serial_port = None
-        for port in ports:
-            if self.try_from_history(port):
-                for td in self.threadList:
-                    td.stop()
-                return True
-
-            for baud in self.baudrate_list:
-                APP_CONTEXT.get_logger().logger.info(
-                    "try {0}:{1}".format(port, baud))
-                try:
-                    serial_port = serial.Serial(port, baud, timeout=0.1)
-                except Exception as ex:
-                    APP_CONTEXT.get_logger().logger.info(
-                        '{0} : {1} open failed'.format(port, baud))
-                    if serial_port is not None:
-                        if serial_port.isOpen():
-                            serial_port.close()
-                    for td in self.threadList:
-                        if td.name == ports[0]:
-                            td.stop()
-                    return False
-
-                if serial_port is not None and serial_port.isOpen():
-                    ret = self.confirm_device(
-                        serial_port, self.filter_device_type)
-                    if not ret:
-                        serial_port.close()
-                        time.sleep(0.1)
-                        for td in self.threadList:
-                            if td.name == ports[0]:
-                                if td.stopped():
-                                    return False
-                                break
-                        continue
-                    else:
-                        self.serial_port = serial_port
-                        self.update_connection_history({
-                            'port': serial_port.port,
-                            'baud': serial_port.baudrate,
-                            'device_type': self.device.type
-                        })
-
-                        for td in self.threadList:
-                            td.stop()
-                        return True
-        for td in self.threadList:
-            if td.name == ports[0]:
-                td.stop()
-        return False
-
     def autobaud(self, ports):
-        '''Autobauds unit - first check for stream_mode/continuous data, then check by polling unit
-           Converts resets polled unit (temporarily) to 100Hz ODR
+        '''Autobauds unit - all ports are sniffed for continuous data at each
+           baudrate, then polled. Probes are stopped once a unit is found
            :returns:
                 true when successful
         '''
         APP_CONTEXT.get_logger().logger.info('start to connect serial port')
-        # print('find ports: {0}'.format(ports))
-        thread_num = (len(ports) if (len(ports) < 4) else 4)
-        ports_list = [[] for i in range(thread_num)]
-        for i, port in enumerate(ports):
-            ports_list[i % thread_num].append(port)
-        for i in range(thread_num):
-            t = StoppableThread(target=self.thread_for_ping,
-                                name=ports_list[i][0],
-                                args=(ports_list[i], ))
-            t.start()
-
-            self.threadList.append(t)
-
-        # make sure every thread is stopped
-        while self.device is None:
-            if self._is_close:
-                return
+        if self._is_close or self._status == 'pause':
+            return False
 
-            if self._status == 'pause':
-                return
+        preferred_bauds = {}
+        if self._connection_history:
+            for connection in self._connection_history['history']:
+                preferred_bauds[connection['port']] = connection['baud']
+        for port in ports:
+            cached_device = self.discovery_cache.get(self.port_keys.get(port))
+            if cached_device:
+                preferred_bauds[port] = cached_device['baud']
+
+        scheduler = AutobaudScheduler(
+            ports, self.baudrate_list,
+            lambda serial_port: self.confirm_device(
+                serial_port, self.filter_device_type),
+            open_port=self.port_opener,
+            max_workers=self.autobaud_workers,
+            preferred_bauds=preferred_bauds)
+        self._autobaud_scheduler = scheduler
+        result = scheduler.run()
+        self._autobaud_scheduler = None
+
+        if not result:
+            return False
 
-            is_threads_stop = True
-            for td in self.threadList:
-                if not td.stopped():
-                    is_threads_stop = False
-                    break
-            if is_threads_stop:
-                break
-
-        for td in self.threadList:
-            td.join()
-        self.threadList.clear()
-
-    def try_last_port(self):
-        '''try to open serial port based on the port and baud read from connection.json.
-           try to find frame header in serial data.
-           returns: True if find header
-                    False if not find header.
+        self.serial_port, baud = result
+        self.update_connection_history({
+            'port': self.serial_port.port,
+            'baud': baud,
+            'device_type': self.device.type
+        })
+        port_key = self.port_keys.get(self.serial_port.port)
+        if port_key:
+            self.discovery_cache.update(
+                port_key, self.serial_port.port, baud, self.device.type,
+                getattr(self.device, 'fingerprint', None))
+        return True
+
+    def try_cached_devices(self, ports):
+        '''Validate the cached device of each port with a single ping at the
+           cached baud.
+           returns: ports to scan, whose device is not cached or not
+                    matched with the cached fingerprint
         '''
-        parsed_json = None
-        try:
-            if not os.path.isfile(self.connection_file_path):
-                return False
+        scan_ports = []
+        for port in self.discovery_cache.sort_ports(ports, self.port_keys):
+            port_key = self.port_keys.get(port)
+            cached_device = self.discovery_cache.get(port_key)
+            if self.device or self._is_close or self._status == 'pause' or \
+                    not cached_device or \
+                    cached_device['baud'] not in self.baudrate_list:
+                scan_ports.append(port)
+                continue
 
-            # if self._connection_history is None:
-            with open(self.connection_file_path) as json_data:
-                parsed_json = json.load(json_data)
+            if self._validate_cached_device(port, cached_device):
+                self.discovery_cache.update(
+                    port_key, port, cached_device['baud'],
+                    cached_device['device_type'], cached_device['fingerprint'])
+                continue
 
-            if not self._is_valid_connection_history(parsed_json):
-                return False
-
-            self._connection_history = parsed_json
-
-            last_connection_index = self._connection_history['last']
-            last_connection = self._connection_history['history'][last_connection_index]
-
-            if last_connection:
-                port = last_connection['port']
-                baud_rate = self.baudrate_list[0] if self.baudrate_assigned \
-                    else last_connection['baud']
-                device_type = self.filter_device_type if self.filter_device_type_assigned \
-                    else last_connection['device_type']
-
-                APP_CONTEXT.get_logger().logger.info(
-                    'try to use last connected port {} {}'.format(port, baud_rate))
-
-                self.open_serial_port(port=port, baud=baud_rate, timeout=0.1)
-
-                if self.serial_port is not None:
-                    ret = self.confirm_device(self.serial_port, device_type)
-                    if not ret:
-                        self.serial_port.close()
-                        return False
-                    else:
-                        self.update_connection_history({
-                            'port': port,
-                            'baud': baud_rate,
-                            'device_type': device_type
-                        })
-                        return True
-                else:
-                    return False
-        except Exception as ex:
-            print(ex)
+            scan_ports.append(port)
+        return scan_ports
+
+    def _validate_cached_device(self, port, cached_device):
+        device_type = cached_device['device_type']
+        if self.filter_device_type_assigned and \
+                self.filter_device_type != device_type:
             return False
 
-    def try_from_history(self, port):
+        baud = cached_device['baud']
         APP_CONTEXT.get_logger().logger.info(
-            'try to use connected port {} in history'.format(port))
+            'try to use cached device of port {} {}'.format(port, baud))
+        try:
+            serial_port = self.port_opener(port, baud)
+        except Exception:  # pylint: disable=broad-except
+            APP_CONTEXT.get_logger().logger.info(
+                '{0} : {1} open failed'.format(port, baud))
+            return False
 
-        history_connection_index = self._find_port_in_connection_history(port)
+        if not self.confirm_device(serial_port, device_type):
+            serial_port.close()
+            return False
 
-        if history_connection_index == -1:
+        if getattr(self.device, 'fingerprint', None) != cached_device['fingerprint']:
+            APP_CONTEXT.get_logger().logger.info(
+                'device of port {} is changed'.format(port))
+            self.device = None
+            serial_port.close()
             return False
 
-        history_connection = self._connection_history['history'][history_connection_index]
-        if history_connection:
-            port = history_connection['port']
-            baud_rate = self.baudrate_list[0] if self.baudrate_assigned \
-                else history_connection['baud']
-            device_type = self.filter_device_type if self.filter_device_type_assigned \
-                else history_connection['device_type']
-            # baud_rate = history_connection['baud']
-            # device_type = history_connection['device_type']
-            self.open_serial_port(port=port, baud=baud_rate, timeout=0.1)
+        self.serial_port = serial_port
+        self.update_connection_history({
+            'port': port,
+            'baud': baud,
+            'device_type': device_type
+        })
+        return True
+
+    def _cancel_autobaud(self):
+        scheduler = self._autobaud_scheduler
+        if scheduler:
+            scheduler.cancel()
+
+    def load_connection_history(self):
+        '''load the connection history of connection.json, its bauds are
+           tried first in autobaud
+        '''
+        try:
+            if not os.path.isfile(self.connection_file_path):
+                return
 
-            if self.serial_port is not None:
-                ret = self.confirm_device(self.serial_port, device_type)
-                if ret:
-                    # update connection history
-                    self.update_connection_history({
-                        'port': port,
-                        'baud': baud_rate,
-                        'device_type': device_type
-                    }, history_connection_index)
-                    return True
-                else:
-                    self.serial_port.close()
-                    return False
-        return False
+            with open(self.connection_file_path) as json_data:
+                parsed_json = json.load(json_data)
+
+            if self._is_valid_connection_history(parsed_json):
+                self._connection_history = parsed_json
+        except Exception as ex:
+            print(ex)
 
     def update_connection_history(self, connection, index=None):
         if self._connection_history is None:
@@ -458,6 +405,7 @@ class SerialPort(Communicator):
 
     def close(self):
         self._is_close = True
+        self._cancel_autobaud()
         return self.close_serial_port()
 
     def reset_buffer(self):
@@ -2,6 +2,8 @@
 DEVICE_TYPES = ['IMU', 'RTK', 'DMU']
 BAUDRATE_LIST = [460800, 115200, 57600, 230400, 38400]
 DEFAULT_PORT_RANGE = [8000, 8001, 8002, 8003]
+# capture of 100base-t1 frames, raw socket is Linux only
+ETHERNET_CAPTURES = ['auto', 'raw-socket', 'scapy']
 
 class APP_TYPE:
     DEFAULT = 'default'
@@ -2,6 +2,7 @@
 Context
 """
 from .app_logger import AppLogger
+from .log_sink import LogSink
 from ..core.packet_statistics import PacketStatistics
 
 
@@ -13,6 +14,7 @@ class AppContext:
     _print_logger = None
     _device_context = None
     _statistics = None
+    _log_sink = None
     _mode = None
 
     def __init__(self):
@@ -59,6 +61,17 @@ class AppContext:
 
         return self._statistics
 
+    @property
+    def log_sink(self):
+        ''' Retrieve the sink of data log files, its queue is reported in
+            statistics service
+        '''
+        if not self._log_sink:
+            self._log_sink = LogSink('data')
+            self.statistics.add_log_sink(self._log_sink)
+
+        return self._log_sink
+
     @property
     def mode(self):
         ''' Retrieve application mode. `default`, `cli` or `log_parser`
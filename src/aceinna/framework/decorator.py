@@ -6,7 +6,10 @@ import signal
 from datetime import datetime, timedelta
 from functools import wraps
 from typing import TypeVar
-from .constants import (DEVICE_TYPES, BAUDRATE_LIST, INTERFACES)
+from .constants import (DEVICE_TYPES, BAUDRATE_LIST, INTERFACES,
+                        ETHERNET_CAPTURES)
+from .columnar_storage import EXPORT_FORMATS
+from .log_sink import POLICIES as LOG_POLICIES
 from .utils.print import print_red
 from .utils.resource import is_dev_mode
 
@@ -47,6 +50,35 @@ def _build_args():
                         metavar='')
     parser.add_argument("--cli", dest='use_cli', action='store_true',
                         help="start as cli mode", default=False)
+    parser.add_argument("--autobaud-workers", dest='autobaud_workers', type=int,
+                        help="Max count of serial ports probed in parallel when finding device", default=8,
+                        metavar='')
+    parser.add_argument("--buffer-framer", dest='buffer_framer', action='store_true',
+                        help="Parse uart data with buffer based framer (OpenIMU/OpenRTK only)", default=False)
+    parser.add_argument("--command-window", dest='command_window', type=int,
+                        help="Max count of in flight commands (OpenIMU/OpenRTK uart only)", default=1,
+                        metavar='')
+    parser.add_argument("--parse-batch-size", dest='parse_batch_size', type=int,
+                        help="Max count of reads merged into one parse of uart data", default=1,
+                        metavar='')
+    parser.add_argument("--data-log-format", dest='data_log_format', type=str,
+                        help="Format of data log. Allowed one of values: {0}".format(EXPORT_FORMATS),
+                        default='csv', choices=EXPORT_FORMATS, metavar='')
+    parser.add_argument("--log-policy", dest='log_policy', type=str,
+                        help="What to do when data log writes are queued more than the disk could write. Allowed one of values: {0}".format(LOG_POLICIES),
+                        default='block', choices=LOG_POLICIES, metavar='')
+    parser.add_argument("--raw-log-max-size", dest='raw_log_max_size', type=int,
+                        help="Start a new segment of raw log after the size in MB, 0 is no limit (OpenRTK/INS401 only)",
+                        default=0, metavar='')
+    parser.add_argument("--raw-log-max-time", dest='raw_log_max_time', type=int,
+                        help="Start a new segment of raw log after the time in minutes, 0 is no limit (OpenRTK/INS401 only)",
+                        default=0, metavar='')
+    parser.add_argument("--ethernet-capture", dest='ethernet_capture', type=str,
+                        help="Capture of 100base-t1 frames, `auto` uses raw socket on Linux. Allowed one of values: {0}".format(ETHERNET_CAPTURES),
+                        default='auto', choices=ETHERNET_CAPTURES, metavar='')
+    parser.add_argument("--receive-cache-policy", dest='receive_cache_policy', type=str,
+                        help="What to do when 100base-t1 packets are received more than the parser could handle. Allowed one of values: {0}".format(LOG_POLICIES),
+                        default='drop-oldest', choices=LOG_POLICIES, metavar='')
 
     subparsers = parser.add_subparsers(
         title='Sub commands', help='use `<command> -h` to get sub command help', dest="sub_command")
@@ -60,6 +92,14 @@ def _build_args():
         "-p", type=str, help="The folder path of logs", default='./data', metavar='', dest="path")
     parse_log_action.add_argument(
         "-i", type=int, help="Ins kml rate(hz). Allowed one of values: {0}".format(KML_RATES), default=5, metavar='', dest="kml_rate", choices=KML_RATES)
+    parse_log_action.add_argument(
+        "-j", "--jobs", type=int, help="Count of processes to parse log files in parallel", default=1, metavar='', dest="jobs")
+    parse_log_action.add_argument(
+        "-f", "--format", type=str, help="Export format. Allowed one of values: {0}".format(EXPORT_FORMATS), default='csv', metavar='', dest="export_format", choices=EXPORT_FORMATS)
+    parse_log_action.add_argument(
+        "--from", type=str, help="Start of time window, GPS time as `week,tow` or `tow` in seconds", default=None, metavar='', dest="time_from")
+    parse_log_action.add_argument(
+        "--to", type=str, help="End of time window, GPS time as `week,tow` or `tow` in seconds", default=None, metavar='', dest="time_to")
 
     return parser.parse_args()
 
@@ -6,13 +6,67 @@ import datetime
 import json
 import threading
 import requests
-from azure.storage.blob import AppendBlobService
-from azure.storage.blob import ContentSettings
+from azure.storage.blob import BlockBlobService
 from .utils import resource
 from .configuration import get_config
 from .ans_platform_api import AnsPlatformAPI
+from .columnar_storage import (ColumnarWriter, is_columnar_format)
+from .blob_upload import ChunkedBlobUploader
 from .context import APP_CONTEXT
 
+# rows are written through a buffered file, which is flushed when the buffer
+# is full or LOG_FLUSH_INTERVAL seconds passed since last flush
+LOG_BUFFER_SIZE = 64 * 1024
+LOG_FLUSH_INTERVAL = 1
+INTEGER_TYPES = ['uint32', 'int32', 'uint16', 'int16', 'uint64', 'int64']
+CHARACTER_TYPES = ['uchar', 'char', 'string']
+# log files are uploaded in chunks every UPLOAD_INTERVAL seconds, the
+# progress is kept in the manifest under data folder
+UPLOAD_INTERVAL = 5
+UPLOAD_MANIFEST = 'upload_manifest.json'
+
+
+def _build_value_format(index, value):
+    '''Format of the value in a row, with the precision of the data type
+    '''
+    value_type = value['type']
+    if 'scaling' in value or value_type in INTEGER_TYPES:
+        spec = ''
+    elif value_type == 'double':
+        spec = ':0.8f'  # 15.12
+    elif value_type == 'float':
+        spec = ':0.4f'  # 12.8
+    elif value_type == 'uint8':
+        spec = ':d'
+    elif value_type in CHARACTER_TYPES:
+        spec = ':'
+    else:
+        # unknown
+        spec = ':3.5f'
+    return '{' + str(index) + spec + '}'
+
+
+def build_row_formatter(output_packet):
+    '''Build the CSV header of output packet, and a function formats the data
+       dictionary of output packet to a row
+    '''
+    labels = []
+    for value in output_packet['payload']:
+        if value.get('unit', '') == '':
+            labels.append(value['name'])
+        else:
+            labels.append('{0:s} ({1:s})'.format(value['name'], value['unit']))
+    header = ','.join(labels) + '\n'
+
+    names = [value['name'] for value in output_packet['payload']]
+    row_format = ','.join(_build_value_format(i, value)
+                          for i, value in enumerate(output_packet['payload'])) + '\n'
+
+    def format_row(data):
+        return row_format.format(*[data[name] for name in names])
+
+    return header, format_row
+
 
 class FileLoger():
     def __init__(self, device_properties):
@@ -28,11 +82,25 @@ class FileLoger():
         if not os.path.exists(self.root_folder):
             os.mkdir(self.root_folder)
         self.output_packets = self.device_properties['userMessages']['outputPackets']
+        # packet type -> output packet config
+        self._output_packet_index = dict(
+            (x['name'], x) for x in self.output_packets)
+        # packet type -> (CSV header, row formatter)
+        self._row_formatters = dict(
+            (x['name'], build_row_formatter(x)) for x in self.output_packets)
         self.log_file_rows = {}
         self.log_file_names = {}
         self.log_files_obj = {}
         self.log_files = {}
+        self.record_writers = {}  # packet type -> writer of npz/npy log
+        self.log_format = 'csv'
+        self.log_rows = 0  # rows logged since log started
+        self.log_bytes = 0  # bytes logged since log started
+        self.log_start_time = None
+        self.log_stop_time = None
+        self.last_flush_time = 0
         self.user_file_name = ''  # the prefix of log file name.
+        self.name = 'data'  # name in statistics of data logs
         self.msgs_need_to_log = []
         self.ws = False
         # azure app.
@@ -47,15 +115,17 @@ class FileLoger():
         self.threads = []  # thread of receiver and paser
         self.exit_thread = False  # flag of exit threads
         self.exit_lock = threading.Lock()  # lock of exit_thread
-        self.data_dict = {}  # data container
-        self.data_lock = threading.Lock()  # lock of data_queue
+        self.uploader = ChunkedBlobUploader(
+            self.create_blob_service,
+            os.path.join(self.root_folder, UPLOAD_MANIFEST))
 
         self.device_log_info = None
         self.ans_platform = AnsPlatformAPI()
 
-    def start_user_log(self, file_name='', ws=False):
+    def start_user_log(self, file_name='', ws=False, log_format='csv'):
         '''
-        start log.
+        start log. log_format is csv, or npz/npy to save the records of each
+        packet type as numpy arrays when log is stopped.
         return:
                 0: OK
                 1: exception that has started logging already.
@@ -65,9 +135,21 @@ class FileLoger():
             if len(self.log_file_rows) > 0:
                 return 1  # has started logging already.
 
+            if ws and is_columnar_format(log_format):
+                raise ValueError(
+                    'Upload of {0} log is not supported'.format(log_format))
+
             self.ws = ws
+            self.log_format = log_format
             self.exit_thread = False
             self.user_file_name = file_name
+            self.log_rows = 0
+            self.log_bytes = 0
+            self.log_start_time = time.time()
+            self.log_stop_time = None
+            self.last_flush_time = self.log_start_time
+            self.name = file_name or 'data'
+            APP_CONTEXT.statistics.add_data_log(self)
             start_time = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
             current_path = os.path.join(self.root_folder, start_time)
             if not os.path.exists(current_path):
@@ -85,24 +167,35 @@ class FileLoger():
 
                 self.log_file_rows[packet['name']] = 0
                 if self.user_file_name == '':
-                    self.log_file_names[packet['name']
-                                        ] = packet['name'] + '.csv'
+                    log_file_name = packet['name']
                 else:
-                    self.log_file_names[packet['name']] = self.user_file_name + \
-                        '_' + packet['name'] + '.csv'
+                    log_file_name = self.user_file_name + \
+                        '_' + packet['name']
+                self.log_file_names[packet['name']
+                                    ] = log_file_name + '.' + self.log_format
                 self.log_files[packet['name']
                                ] = self.log_file_names[packet['name']]
 
-                self.log_files_obj[packet['name']] = open(
-                    current_path + '/' + self.log_file_names[packet['name']], 'w')
+                if is_columnar_format(self.log_format):
+                    self.record_writers[packet['name']] = ColumnarWriter(
+                        current_path + '/' + log_file_name, packet['payload'],
+                        self.log_format, decoded=True)
+                    continue
+
+                # rows are written by the writer thread of log sink
+                self.log_files_obj[packet['name']] = APP_CONTEXT.log_sink.open(
+                    current_path + '/' + self.log_file_names[packet['name']], 'w',
+                    buffering=LOG_BUFFER_SIZE)
 
             if self.ws:
-                self.get_sas_token()
-                self.data_dict.clear()
-                for i, (k, v) in enumerate(self.log_files.items()):  # k:pack type  v:log file name
-                    self.data_dict[v] = ''
-                    threading.Thread(target=self.upload_azure,
-                                     args=(k, v)).start()
+                upload_time = datetime.datetime.now().strftime('%Y_%m_%d_%H_%M_%S')
+                upload_files = []
+                for k, v in self.log_files.items():  # k:pack type  v:log file name
+                    url_name = upload_time + '-' + self.user_id + '-' + v + '.gz'
+                    upload_files.append(
+                        (k, v, os.path.join(current_path, v), url_name))
+                threading.Thread(target=self.upload_azure,
+                                 args=(upload_files,)).start()
             return 0
         except Exception as e:
             print('Exception! File:[{0}], Line:[{1}]. Exception:{2}'.format(
@@ -123,6 +216,10 @@ class FileLoger():
                 return 1  # driver hasn't started logging files yet.
             for i, (k, v) in enumerate(self.log_files_obj.items()):
                 v.close()
+            for record_writer in self.record_writers.values():
+                record_writer.close()
+            self.log_stop_time = time.time()
+            self.record_writers.clear()
             self.log_file_rows.clear()
             self.log_file_names.clear()
             self.log_files_obj.clear()
@@ -140,97 +237,51 @@ class FileLoger():
 
         return rev
 
-    def upload_azure(self, packet_type, log_file_name):
-        if self.db_user_access_token == '' or self.sas_token == '':
-            print(
-                "Error: Can not upload log to azure since token is empty! Please check the network.")
-
-        print(datetime.datetime.now().strftime(
-            '%Y_%m_%d_%H_%M_%S:'), log_file_name, ' start.')
-
-        config = get_config()
-        account_name = config.AZURE_STORAGE_ACCOUNT
-        container_name = config.AZURE_STORAGE_DATA_CONTAINER
-        url_name = datetime.datetime.now().strftime(
-            '%Y_%m_%d_%H_%M_%S') + '-' + self.user_id + '-' + log_file_name
-        bcreate_blob_ok = False
-
-        error_connection = 'ConnectionError'
-        error_authorization = 'AuthenticationFailed'
+    def upload_azure(self, upload_files):
+        ''' Upload the log files in chunks while logging, upload_files is a
+            list of (packet type, log file name, file path, url name). The
+            rest of files are uploaded after log is stopped.
+        '''
+        container_name = get_config().AZURE_STORAGE_DATA_CONTAINER
+        # finish the uploads interrupted in previous runs
+        self.uploader.resume()
 
+        saved_urls = set()
         while True:
-            # get data from data_dict.
-            self.data_lock.acquire()
-            text = self.data_dict[log_file_name]
-            self.data_dict[log_file_name] = ''
-            self.data_lock.release()
-
             # check if user stop logging data.
             self.exit_lock.acquire()
-            if self.exit_thread:
-                # check for internet and text
-                if text == '':
-                    self.exit_lock.release()
-                    break
-                else:
-                    pass
+            final = self.exit_thread
             self.exit_lock.release()
-
-            # let CPU have a break.
-            if text == '':
-                time.sleep(1)
-                continue
-
-            # create blob on azure
-            if not bcreate_blob_ok:
-                try:
-                    self.append_blob_service = AppendBlobService(account_name=account_name,
-                                                                 sas_token=self.sas_token,
-                                                                 protocol='http')
-                    self.append_blob_service.create_blob(container_name=container_name, blob_name=url_name,
-                                                         content_settings=ContentSettings(content_type='text/plain'))
-                    bcreate_blob_ok = True
+            if final:
+                # the rows queued in log sink are written before last chunks
+                APP_CONTEXT.log_sink.drain()
+
+            for packet_type, log_file_name, file_path, url_name in upload_files:
+                committed = self.uploader.upload_file(
+                    file_path, container_name, url_name, final)
+                # the blob is created when the first chunk is committed
+                if committed > 0 and url_name not in saved_urls:
+                    saved_urls.add(url_name)
                     threading.Thread(target=self.save_to_db_task, args=(
                         packet_type, log_file_name, url_name)).start()
-                except Exception as e:
-                    # print('Exception when create_blob:', type(e), e)
-                    if error_connection in str(e):
-                        pass
-                    elif error_authorization in str(e):
-                        self.get_sas_token()
-                        self.append_blob_service = AppendBlobService(account_name=account_name,
-                                                                     sas_token=self.sas_token,
-                                                                     protocol='http')
-                    print('Retry to create_blob again...')
-                    continue
 
-            # append blob on azure
-            try:
-                # self.append_blob_service.append_blob_from_text(countainerName, fileName, text, progress_callback=self.upload_callback)
-                self.append_blob_service.append_blob_from_text(
-                    container_name, url_name, text)
-            except Exception as e:
-                # print('Exception when append_blob:', type(e), e)
-                if error_connection in str(e):
-                    pass
-                elif error_authorization in str(e):
-                    self.get_sas_token()
-                    self.append_blob_service = AppendBlobService(account_name=account_name,
-                                                                 sas_token=self.sas_token,
-                                                                 protocol='http')
-                    # if append blob failed, do not drop 'text', but push 'text' to data_dict and re-append next time.
-                    self.data_lock.acquire()
-                    self.data_dict[log_file_name] = text + \
-                        self.data_dict[log_file_name]
-                    self.data_lock.release()
-
-            time.sleep(5)
-
-        if bcreate_blob_ok:
-            # if not self.save_to_ans_platform(packet_type, log_file_name):
-            #     print('save_to_ans_platform failed.')
-            print(datetime.datetime.now().strftime(
-                '%Y_%m_%d_%H_%M_%S:'), log_file_name, ' done.')
+            if final:
+                break
+            time.sleep(UPLOAD_INTERVAL)
+
+        print(datetime.datetime.now().strftime(
+            '%Y_%m_%d_%H_%M_%S:'), 'upload done.', self.uploader.get_statistics())
+
+    def create_blob_service(self):
+        ''' Create the blob service with a new sas token
+        '''
+        self.get_sas_token()
+        if self.db_user_access_token == '' or self.sas_token == '':
+            print(
+                "Error: Can not upload log to azure since token is empty! Please check the network.")
+        return BlockBlobService(account_name=get_config().AZURE_STORAGE_ACCOUNT,
+                                sas_token=self.sas_token,
+                                protocol='http')
 
     def save_to_db_task(self, packet_type, file_name, url_name):
         if not self.save_to_ans_platform(packet_type, file_name, url_name):
@@ -247,91 +298,81 @@ class FileLoger():
         return self.log_file_names.copy()
 
     def log(self, packet_type, data):
-        ''' Parse the data, read in from the unit, and generate a data file using
-            the json properties file to create a header and specify the precision
-            of the data in the resulting data file.
+        ''' Format the data, read in from the unit, to a row of data file with the
+            row formatter built from the json properties. The header is written
+            before the first row.
         '''
-        output_packet = next(
-            (x for x in self.output_packets if x['name'] == packet_type), None)
-
-        fields = [field['name'] for field in output_packet['payload']]
-        '''Write row of CSV file based on data received.  Uses dictionary keys for column titles
-        '''
-        if self.log_file_rows[packet_type] == 0:
-            # Loop through each item in the data dictionary and create a header from the json
-            #   properties that correspond to the items in the dictionary
-            labels = ''
-            # for key in data:
-            for i, (k, v) in enumerate(data.items()):
-                '''dataStr = output_packet['payload'][i]['name'] + \
-                          ' [' + \
-                          output_packet['payload'][i]['unit'] + \
-                          ']'''
-                if not fields.__contains__(k):
-                    continue
-                data_str = output_packet['payload'][i]['name']
-                unit_str = output_packet['payload'][i]['unit']
-                if unit_str == '':
-                    labels = labels + '{0:s},'.format(data_str)
-                else:
-                    labels = labels + \
-                        '{0:s} ({1:s}),'.format(data_str, unit_str)
+        if self.record_writers:
+            self.log_records(packet_type, data)
+            return
 
-            # Remove the comma at the end of the string and append a new-line character
-            labels = labels[:-1]
-            header = labels + '\n'
-        else:
-            header = ''
+        header, format_row = self._row_formatters[packet_type]
+        try:
+            write_str = format_row(data)
+        except Exception as ex:
+            APP_CONTEXT.get_logger().logger.error(ex)
+            return
 
+        if self.log_file_rows[packet_type] == 0:
+            write_str = header + write_str
         self.log_file_rows[packet_type] += 1
-
-        # Loop through the items in the data dictionary and append to an output string
-        #   (with precision based on the data type defined in the json properties file)
-        write_str = ''
-        for i, (k, v) in enumerate(data.items()):
-            if not fields.__contains__(k):
-                continue
-            output_packet_type = output_packet['payload'][i]['type']
-
-            if output_packet['payload'][i].__contains__('scaling'):
-                write_str += '{0},'.format(v)
-            else:
-                if output_packet_type == 'uint32' or output_packet_type == 'int32' or \
-                        output_packet_type == 'uint16' or output_packet_type == 'int16' or \
-                        output_packet_type == 'uint64' or output_packet_type == 'int64':
-                    # integers and unsigned integers
-                    write_str += '{0},'.format(v)
-                elif output_packet_type == 'double':
-                    # double
-                    write_str += '{0:0.8f},'.format(v)  # 15.12
-                elif output_packet_type == 'float':
-                    write_str += '{0:0.4f},'.format(v)  # 12.8
-                elif output_packet_type == 'uint8':
-                    # byte
-                    write_str += '{0:d},'.format(v)
-                elif output_packet_type == 'uchar' or output_packet_type == 'char' or output_packet_type == 'string':
-                    # character
-                    write_str += '{:},'.format(v)
-                else:
-                    # unknown
-                    write_str += '{0:3.5f},'.format(v)
-        #
-        write_str = header + write_str[:-1] + '\n'
+        self.log_rows += 1
+        # rows are ascii, count of characters is count of bytes
+        self.log_bytes += len(write_str)
 
         try:
             self.log_files_obj[packet_type].write(write_str)
-            self.log_files_obj[packet_type].flush()
         except ValueError:
             APP_CONTEXT.get_logger().logger.error(
                 'I/O Exception, file may be closed before using')
         except Exception as ex:
             APP_CONTEXT.get_logger().logger.error(ex)
 
-        if self.ws:
-            self.data_lock.acquire()
-            self.data_dict[self.log_files[packet_type]
-                           ] = self.data_dict[self.log_files[packet_type]] + write_str
-            self.data_lock.release()
+        self.flush_log_files()
+
+    def flush_log_files(self, force=False):
+        ''' Flush the buffered rows to files, if LOG_FLUSH_INTERVAL seconds
+            passed since last flush
+        '''
+        now = time.time()
+        if not force and now - self.last_flush_time < LOG_FLUSH_INTERVAL:
+            return
+        self.last_flush_time = now
+        for log_file in self.log_files_obj.values():
+            try:
+                log_file.flush()
+            except ValueError:
+                pass
+
+    def get_log_statistics(self):
+        ''' Rows and bytes logged since log started, and the rates per second
+            until log is stopped
+        '''
+        duration = 0
+        if self.log_start_time is not None:
+            duration = (self.log_stop_time or time.time()) - self.log_start_time
+        return {
+            'rows': self.log_rows,
+            'bytes': self.log_bytes,
+            'rows_per_second': self.log_rows / duration if duration > 0 else 0,
+            'bytes_per_second': self.log_bytes / duration if duration > 0 else 0
+        }
+
+    def log_records(self, packet_type, data):
+        ''' Append the decoded data as a record of npz/npy log, the records are
+            saved as numpy arrays when log is stopped.
+        '''
+        output_packet = self._output_packet_index[packet_type]
+        record_writer = self.record_writers[packet_type]
+        try:
+            record_writer.write_values(
+                [data[value['name']] for value in output_packet['payload']])
+        except Exception as ex:
+            APP_CONTEXT.get_logger().logger.error(ex)
+            return
+        self.log_file_rows[packet_type] += 1
+        self.log_rows += 1
+        self.log_bytes += record_writer.record_size
 
     def set_info(self, info):
         self.device_log_info = info
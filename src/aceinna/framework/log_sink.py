@@ -0,0 +1,173 @@
+"""
+Asynchronous log sink. Writes to the log files opened from a sink are put
+in a bounded queue, and done by a writer thread, so a slow disk does not
+stall the receiver and parser threads.
+"""
+import atexit
+import collections
+import threading
+
+# what put does when the queue is full
+BLOCK = 'block'
+DROP_OLDEST = 'drop-oldest'
+DROP_NEWEST = 'drop-newest'
+POLICIES = [BLOCK, DROP_OLDEST, DROP_NEWEST]
+# max count of queued writes
+DEFAULT_MAX_SIZE = 10000
+# seconds to wait for queued writes when the application exits
+EXIT_DRAIN_TIMEOUT = 5
+
+_WRITE = 0
+_FLUSH = 1
+_CLOSE = 2
+
+
+class SinkFile(object):
+    '''
+    File like object of a log file, writes are done by the sink
+    '''
+
+    def __init__(self, sink, file_obj):
+        self._sink = sink
+        self._file = file_obj
+        self.name = file_obj.name
+        self.closed = False
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+        if isinstance(data, (bytearray, memoryview)):
+            # the buffer may be reused by caller
+            data = bytes(data)
+        self._sink.put(self._file, _WRITE, data)
+        return len(data)
+
+    def flush(self):
+        if not self.closed:
+            self._sink.put(self._file, _FLUSH)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._sink.put(self._file, _CLOSE)
+
+
+class LogSink(object):
+    '''
+    A bounded queue of writes, and a writer thread. Flush and close are
+    always queued, only writes are blocked or dropped by the policy.
+    '''
+
+    def __init__(self, name='data', max_size=DEFAULT_MAX_SIZE, policy=BLOCK):
+        self.name = name
+        self.max_size = max_size
+        self.policy = None
+        self.set_policy(policy)
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._writing = False
+        self.max_depth = 0
+        self.written = 0
+        self.written_bytes = 0
+        self.dropped = 0
+        self.dropped_bytes = 0
+        self.errors = 0
+        self.last_error = None
+
+    def set_policy(self, policy):
+        if policy not in POLICIES:
+            raise ValueError('Log sink policy should be one of {0}'.format(POLICIES))
+        self.policy = policy
+
+    def open(self, file_path, mode='wb', **kwargs):
+        '''
+        Open a log file, the writes to it are done by the writer thread
+        '''
+        return SinkFile(self, open(file_path, mode, **kwargs))
+
+    def put(self, file_obj, operation, data=None):
+        with self._condition:
+            if self._thread is None:
+                self._start()
+
+            if operation == _WRITE and len(self._queue) >= self.max_size:
+                if self.policy == DROP_NEWEST:
+                    self._count_drop(data)
+                    return
+                if self.policy == DROP_OLDEST:
+                    self._drop_oldest()
+                else:
+                    while len(self._queue) >= self.max_size:
+                        self._condition.wait()
+
+            self._queue.append((file_obj, operation, data))
+            if len(self._queue) > self.max_depth:
+                self.max_depth = len(self._queue)
+            self._condition.notify_all()
+
+    def drain(self, timeout=None):
+        '''
+        Wait until queued writes are done, return False if timeout
+        '''
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._queue and not self._writing, timeout)
+
+    def get_statistics(self):
+        return {
+            'policy': self.policy,
+            'depth': len(self._queue),
+            'max_depth': self.max_depth,
+            'written': self.written,
+            'written_bytes': self.written_bytes,
+            'dropped': self.dropped,
+            'dropped_bytes': self.dropped_bytes,
+            'errors': self.errors
+        }
+
+    def _start(self):
+        self._thread = threading.Thread(
+            target=self._run, name='log-sink-{0}'.format(self.name))
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.drain, EXIT_DRAIN_TIMEOUT)
+
+    def _count_drop(self, data):
+        self.dropped += 1
+        self.dropped_bytes += len(data)
+
+    def _drop_oldest(self):
+        for index, item in enumerate(self._queue):
+            if item[1] == _WRITE:
+                del self._queue[index]
+                self._count_drop(item[2])
+                return
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                items = list(self._queue)
+                self._queue.clear()
+                self._writing = True
+                self._condition.notify_all()
+
+            for file_obj, operation, data in items:
+                try:
+                    if operation == _WRITE:
+                        file_obj.write(data)
+                        self.written += 1
+                        self.written_bytes += len(data)
+                    elif operation == _FLUSH:
+                        file_obj.flush()
+                    else:
+                        file_obj.close()
+                except Exception as ex:  # pylint: disable=broad-except
+                    self.errors += 1
+                    self.last_error = str(ex)
+
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
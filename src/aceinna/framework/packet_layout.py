@@ -0,0 +1,129 @@
+"""
+Precompiled layouts of output packets. The payload config of an output
+packet is compiled once into a PacketLayout with the struct, field names,
+scaling and float fields, which is shared by live message parsers and the
+offline log parsers.
+"""
+import os
+import json
+import struct
+import threading
+from .columnar_storage import PAYLOAD_TYPES
+
+# payload type -> struct format, string fields have a length in config
+PAYLOAD_TYPE_FORMATS = dict((key, value[0])
+                            for key, value in PAYLOAD_TYPES.items())
+PAYLOAD_TYPE_FORMATS.update({
+    'int8': 'b',
+    'bool': '?',
+})
+STRING_TYPE = 'string'
+FLOAT_FORMATS = ['f', 'd']
+
+# payload definition -> layout
+_LAYOUTS = {}
+# (setting path, modified time, byte order) -> {packet name: layout}
+_SETTING_LAYOUTS = {}
+_LOCK = threading.Lock()
+
+
+def _get_field_format(value):
+    if value['type'] == STRING_TYPE:
+        return '{0}s'.format(int(value.get('length', 0)))
+    return PAYLOAD_TYPE_FORMATS.get(value['type'])
+
+
+class PacketLayout(object):
+    '''
+    Layout of an output packet payload, it is shared between parsers and
+    should not be changed
+    '''
+    __slots__ = ['name', 'struct', 'size', 'names', 'scalings',
+                 'nan_indexes', 'is_list', 'is_valid']
+
+    def __init__(self, output_packet, byte_order='<'):
+        pack_fmt = byte_order
+        names = []
+        scalings = []
+        nan_indexes = []
+        field_count = 0
+        for value in output_packet['payload']:
+            field_fmt = _get_field_format(value)
+            names.append(value['name'])
+            scalings.append(value.get('scaling'))
+            if field_fmt is None:
+                continue
+            if field_fmt in FLOAT_FORMATS:
+                # index in the values unpacked
+                nan_indexes.append(field_count)
+            pack_fmt += field_fmt
+            field_count += 1
+
+        self.name = output_packet.get('name')
+        # fields of unknown type are not in the struct
+        self.struct = struct.Struct(pack_fmt)
+        self.size = self.struct.size
+        self.names = tuple(names)
+        self.scalings = tuple(scalings)
+        self.nan_indexes = tuple(nan_indexes)
+        self.is_list = output_packet.get('isList', 0) == 1
+        self.is_valid = self.size > 0 and field_count == len(names)
+
+
+def _get_layout_key(output_packet, byte_order):
+    return (byte_order, output_packet.get('name'), output_packet.get('isList', 0),
+            tuple((x['name'], x['type'], x.get('length'), x.get('scaling'))
+                  for x in output_packet['payload']))
+
+
+def get_packet_layout(output_packet, byte_order='<'):
+    '''
+    Get the layout of an output packet, packets of same payload definition
+    share the layout
+    '''
+    key = _get_layout_key(output_packet, byte_order)
+    layout = _LAYOUTS.get(key)
+    if layout is None:
+        layout = PacketLayout(output_packet, byte_order)
+        with _LOCK:
+            layout = _LAYOUTS.setdefault(key, layout)
+    return layout
+
+
+def compile_packet_layouts(output_packets, byte_order='<'):
+    '''
+    Build the layouts of output packets, keyed by packet name
+    '''
+    return dict((x['name'], get_packet_layout(x, byte_order))
+                for x in output_packets or [])
+
+
+def get_output_packets(properties):
+    '''
+    Output packets of a parse setting or a device setting
+    '''
+    if 'userOutputPackets' in properties:
+        return properties['userOutputPackets']
+    return properties['userMessages']['outputPackets']
+
+
+def load_packet_layouts(setting_path, byte_order='<'):
+    '''
+    Load the layouts of output packets in a setting file. The layouts are
+    cached until the file is modified.
+    '''
+    setting_path = os.path.abspath(setting_path)
+    key = (setting_path, os.path.getmtime(setting_path), byte_order)
+    layouts = _SETTING_LAYOUTS.get(key)
+    if layouts is not None:
+        return layouts
+
+    with open(setting_path) as json_data:
+        properties = json.load(json_data)
+    layouts = compile_packet_layouts(get_output_packets(properties), byte_order)
+    with _LOCK:
+        for cached_key in list(_SETTING_LAYOUTS):
+            if cached_key[0] == setting_path and cached_key[2] == byte_order:
+                del _SETTING_LAYOUTS[cached_key]
+        _SETTING_LAYOUTS[key] = layouts
+    return layouts
@@ -0,0 +1,108 @@
+"""
+Bounded cache of received packets between a capture thread and the
+parser. Overflow is handled by a policy and counted, so a parser which
+falls behind is seen in statistics instead of as a gap in logs.
+"""
+import collections
+import threading
+from .log_sink import (BLOCK, DROP_OLDEST, POLICIES)
+
+DEFAULT_MAX_SIZE = 1000
+
+
+class ReceiveCache(object):
+    '''
+    A bounded queue of received packets. With the block policy, put waits
+    until the parser reads, until the cache is closed.
+    '''
+
+    def __init__(self, name, max_size=DEFAULT_MAX_SIZE, policy=DROP_OLDEST):
+        self.name = name
+        self.max_size = max_size
+        self.policy = None
+        self.set_policy(policy)
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def set_policy(self, policy):
+        if policy not in POLICIES:
+            raise ValueError(
+                'Receive cache policy should be one of {0}'.format(POLICIES))
+        self.policy = policy
+
+    def put(self, packet):
+        '''
+        Cache a packet, return False if a packet is dropped
+        '''
+        with self._condition:
+            self.received += 1
+            is_dropped = False
+
+            if len(self._queue) >= self.max_size:
+                if self.policy == DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                    is_dropped = True
+                else:
+                    while self.policy == BLOCK and not self._closed and \
+                            len(self._queue) >= self.max_size:
+                        self._condition.wait()
+                    if len(self._queue) >= self.max_size:
+                        self.dropped += 1
+                        return False
+
+            self._queue.append(packet)
+            if len(self._queue) > self.max_depth:
+                self.max_depth = len(self._queue)
+            return not is_dropped
+
+    def get(self):
+        '''
+        Pop the oldest packet, return None if cache is empty
+        '''
+        with self._condition:
+            if not self._queue:
+                return None
+            packet = self._queue.popleft()
+            self._condition.notify()
+            return packet
+
+    def clear(self):
+        with self._condition:
+            self._queue.clear()
+            self._condition.notify_all()
+
+    def open(self):
+        with self._condition:
+            self._closed = False
+
+    def close(self):
+        '''
+        Stop blocking put, packets put to a full cache are dropped
+        '''
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def reset_statistics(self):
+        with self._condition:
+            self.received = 0
+            self.dropped = 0
+            self.max_depth = len(self._queue)
+
+    def __len__(self):
+        return len(self._queue)
+
+    def get_statistics(self):
+        return {
+            'policy': self.policy,
+            'depth': len(self._queue),
+            'max_depth': self.max_depth,
+            'max_size': self.max_size,
+            'received': self.received,
+            'dropped': self.dropped
+        }
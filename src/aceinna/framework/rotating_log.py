@@ -0,0 +1,340 @@
+"""
+Rotating raw logs. A raw log is written as segments capped by size or
+time, each segment has an index sidecar with its byte offset in the
+recording, the GPS time of first and last packet and the packet counts
+per type, so a time window could be parsed without scanning all segments.
+"""
+import os
+import json
+import time
+import struct
+import binascii
+from .columnar_storage import PAYLOAD_TYPES
+from .log_sink import SinkFile
+from .utils.crc import calc_crc16
+
+INDEX_SUFFIX = '.index.json'
+# the index of open segment is saved again after the interval in seconds
+INDEX_UPDATE_INTERVAL = 5
+SECONDS_PER_WEEK = 604800
+USER_PACKET_HEADER = b'\x55\x55'
+# payload length is a byte in uart packets, 4 bytes in ethernet packets
+MAX_PAYLOAD_LEN = 65535
+
+
+def get_segment_path(file_path, segment):
+    '''
+    Path of a segment, the first segment has the path of raw log
+    '''
+    if segment == 0:
+        return file_path
+    base, ext = os.path.splitext(file_path)
+    return '{0}_{1:04d}{2}'.format(base, segment, ext)
+
+
+def build_time_reader(output_packet):
+    '''
+    Build (struct, scale) to read GPS week and time of week in seconds from
+    payload, if the payload starts with them
+    '''
+    payload = output_packet['payload']
+    if len(payload) < 2:
+        return None
+    week, tow = payload[0], payload[1]
+    tow_name = tow['name'].lower()
+    if 'week' not in week['name'].lower() or \
+            ('timeofweek' not in tow_name and not tow_name.endswith('tow')):
+        return None
+    if week['type'] not in PAYLOAD_TYPES or tow['type'] not in PAYLOAD_TYPES:
+        return None
+    time_struct = struct.Struct(
+        '<' + PAYLOAD_TYPES[week['type']][0] + PAYLOAD_TYPES[tow['type']][0])
+    scale = 0.001 if tow.get('unit') == 'ms' else 1
+    return time_struct, scale
+
+
+def build_time_readers(output_packets):
+    '''
+    Build time readers of output packets, packet type -> (struct, scale)
+    '''
+    time_readers = {}
+    for output_packet in output_packets:
+        time_reader = build_time_reader(output_packet)
+        if time_reader:
+            time_readers[output_packet['name'].encode('latin-1')] = time_reader
+    return time_readers
+
+
+def get_gps_seconds(week, tow):
+    return week * SECONDS_PER_WEEK + tow
+
+
+def resolve_gps_time(gps_time, default_week):
+    '''
+    GPS seconds of gps_time (week, tow), the week is default_week if it is
+    None. None is returned for None, which is an open end of time window.
+    '''
+    if gps_time is None:
+        return None
+    week, tow = gps_time
+    return get_gps_seconds(default_week if week is None else week, tow)
+
+
+def _format_packet_type(packet_type):
+    name = packet_type.decode('latin-1')
+    return name if name.isalnum() else binascii.hexlify(packet_type).decode()
+
+
+class PacketIndexer(object):
+    '''
+    Scan 0x5555 framed packets written to a raw log, count the packets per
+    type, and read the GPS time of packets in output_packets. Packets of any
+    type are counted if output_packets is empty.
+    '''
+
+    def __init__(self, output_packets=None, length_size=1):
+        output_packets = output_packets or []
+        self.length_size = length_size
+        self.header_size = 4 + length_size
+        self.packet_types = frozenset(
+            x['name'].encode('latin-1') for x in output_packets)
+        self.time_readers = build_time_readers(output_packets)
+        self._buffer = bytearray()
+        # offset in recording of the first byte not scanned
+        self.boundary = 0
+        self.reset()
+
+    def reset(self):
+        self.packets = {}
+        self.first_time = None
+        self.last_time = None
+
+    def summary(self):
+        result = {'packets': self.packets}
+        for key, value in [('first', self.first_time), ('last', self.last_time)]:
+            result[key + '_week'] = value[0] if value else None
+            result[key + '_tow'] = value[1] if value else None
+        return result
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer.extend(data)
+        buffer_len = len(buffer)
+        read_index = 0
+        while True:
+            header_index = buffer.find(USER_PACKET_HEADER, read_index)
+            if header_index < 0:
+                # keep the last byte, it may be the start of next header
+                read_index = max(read_index, buffer_len - 1)
+                break
+            if header_index + self.header_size > buffer_len:
+                read_index = header_index
+                break
+
+            packet_type = bytes(buffer[header_index+2:header_index+4])
+            if self.packet_types and packet_type not in self.packet_types:
+                read_index = header_index + 1
+                continue
+
+            if self.length_size == 1:
+                payload_len = buffer[header_index+4]
+            else:
+                payload_len = struct.unpack_from(
+                    '<I', buffer, header_index + 4)[0]
+            if payload_len > MAX_PAYLOAD_LEN:
+                read_index = header_index + 1
+                continue
+
+            payload_start = header_index + self.header_size
+            payload_end = payload_start + payload_len
+            if payload_end + 2 > buffer_len:
+                read_index = header_index
+                break
+
+            packet_crc = 256 * buffer[payload_end] + buffer[payload_end+1]
+            if packet_crc != calc_crc16(bytes(buffer[header_index+2:payload_end])):
+                read_index = header_index + 1
+                continue
+
+            self._add_packet(packet_type, buffer, payload_start, payload_len)
+            read_index = payload_end + 2
+
+        del buffer[0:read_index]
+        self.boundary += read_index
+
+    def _add_packet(self, packet_type, buffer, payload_start, payload_len):
+        name = _format_packet_type(packet_type)
+        self.packets[name] = self.packets.get(name, 0) + 1
+
+        time_reader = self.time_readers.get(packet_type)
+        if time_reader is None or payload_len < time_reader[0].size:
+            return
+        week, tow = time_reader[0].unpack_from(buffer, payload_start)
+        packet_time = (week, tow * time_reader[1])
+        if self.first_time is None:
+            self.first_time = packet_time
+        self.last_time = packet_time
+
+
+class RotatingLogFile(object):
+    '''
+    File like object of a raw log, written through the log sink. A new
+    segment is started when the segment reaches max_size bytes or lasts
+    max_duration seconds, 0 is no limit. With an indexer, segments are cut
+    at the packet boundary in the write reaches the limit, and the index has
+    the time and packet counts. Rotation, indexing and the index sidecars
+    are done by the writer thread of sink, not by the thread writing data.
+    '''
+
+    def __init__(self, sink, file_path, max_size=0, max_duration=0, indexer=None):
+        self.name = file_path
+        self._writer = _SegmentWriter(
+            file_path, max_size, max_duration, indexer)
+        self._file = SinkFile(sink, self._writer)
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    @property
+    def segment(self):
+        ''' Current segment, updated when the writes are done by sink
+        '''
+        return self._writer.segment
+
+    def write(self, data):
+        return self._file.write(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class _SegmentWriter(object):
+    '''
+    Write the segments and index sidecars of a raw log to files, it is the
+    file object of a RotatingLogFile in log sink
+    '''
+
+    def __init__(self, file_path, max_size, max_duration, indexer):
+        self.name = file_path
+        self.max_size = max_size
+        self.max_duration = max_duration
+        self.indexer = indexer
+        self.closed = False
+        self.segment = 0
+        self.offset = 0  # bytes written to all segments
+        self._open_segment()
+
+    def write(self, data):
+        if self.indexer:
+            self.indexer.feed(data)
+
+        if self._should_rotate(len(data)):
+            # without indexer, segments are cut between writes
+            split = 0
+            if self.indexer:
+                # the packets completed in data are kept in the segment, an
+                # incomplete packet at the end goes to the next segment
+                split = min(max(self.indexer.boundary - self.offset, 0), len(data))
+            self._write(data[0:split])
+            self._close_segment()
+            self.segment += 1
+            self._open_segment()
+            self._write(data[split:])
+        else:
+            self._write(data)
+
+        if time.time() - self.index_time >= INDEX_UPDATE_INTERVAL:
+            self._save_index(False)
+        return len(data)
+
+    def flush(self):
+        if not self.closed:
+            self._file.flush()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._close_segment()
+
+    def _should_rotate(self, size):
+        segment_size = self.offset - self.segment_offset
+        if segment_size == 0:
+            return False
+        if self.max_size and segment_size + size > self.max_size:
+            return True
+        if self.max_duration and \
+                time.time() - self.segment_start_time >= self.max_duration:
+            return True
+        return False
+
+    def _write(self, data):
+        if len(data) > 0:
+            self._file.write(data)
+            self.offset += len(data)
+
+    def _open_segment(self):
+        self.segment_path = get_segment_path(self.name, self.segment)
+        self.segment_offset = self.offset
+        self.segment_start_time = time.time()
+        self.index_time = self.segment_start_time
+        self._file = open(self.segment_path, 'wb')
+
+    def _close_segment(self):
+        self._save_index(True)
+        self._file.close()
+        if self.indexer:
+            self.indexer.reset()
+
+    def _save_index(self, closed):
+        self.index_time = time.time()
+        index = {
+            'file': os.path.basename(self.segment_path),
+            'segment': self.segment,
+            'offset': self.segment_offset,
+            'size': self.offset - self.segment_offset,
+            'start_time': self.segment_start_time,
+            'end_time': self.index_time,
+            'closed': closed
+        }
+        if self.indexer:
+            index.update(self.indexer.summary())
+        # replace the sidecar at once, a reader never sees a truncated index
+        index_path = self.segment_path + INDEX_SUFFIX
+        with open(index_path + '.tmp', 'w') as index_file:
+            index_file.write(json.dumps(index))
+        os.replace(index_path + '.tmp', index_path)
+
+
+def load_segment_index(file_path):
+    '''
+    Load the index sidecar of a segment, None if it is not found
+    '''
+    try:
+        with open(file_path + INDEX_SUFFIX) as index_file:
+            return json.load(index_file)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def is_segment_in_window(index, start=None, end=None):
+    '''
+    Check if a segment may have packets in the time window, start and end
+    are (week, tow), the week of segment is used if week is None. It is
+    True if the time of segment is unknown. The last time of a segment not
+    closed may be out of date, so it is not compared.
+    '''
+    if index is None or index.get('first_week') is None:
+        return True
+    first = get_gps_seconds(index['first_week'], index['first_tow'])
+    last = get_gps_seconds(index['last_week'], index['last_tow'])
+    start = resolve_gps_time(start, index['first_week'])
+    end = resolve_gps_time(end, index['first_week'])
+    if end is not None and first > end:
+        return False
+    if start is not None and index['closed'] and last < start:
+        return False
+    return True
@@ -0,0 +1,64 @@
+"""
+CRC-16 CCITT used by the 0x5555 framed packets
+"""
+import binascii
+import sys
+
+CRC16_INIT = 0x1D0F
+CRC16_POLY = 0x1021
+
+
+def _build_crc16_table():
+    table = []
+    for value in range(256):
+        crc = value << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ CRC16_POLY) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+        table.append(crc)
+    return tuple(table)
+
+
+CRC16_TABLE = _build_crc16_table()
+
+
+def calc_crc16_table(data, crc=CRC16_INIT):
+    '''
+    Calculates 16-bit CRC-CCITT with the lookup table.
+    data could be bytes, bytearray, memoryview or a list of int
+    '''
+    table = CRC16_TABLE
+    if sys.version_info < (3, 0) and isinstance(data, str):
+        data = bytearray(data)
+    for byte_data in data:
+        crc = ((crc << 8) & 0xFF00) ^ table[(crc >> 8) ^ byte_data]
+    return crc
+
+
+def calc_crc16(data, crc=CRC16_INIT):
+    '''
+    Calculates 16-bit CRC-CCITT, binascii.crc_hqx is the same polynomial
+    '''
+    if isinstance(data, (list, tuple)):
+        data = bytearray(data)
+    try:
+        return binascii.crc_hqx(data, crc)
+    except TypeError:
+        return calc_crc16_table(data, crc)
+
+
+def calc_crc16_bytes(data, crc=CRC16_INIT):
+    '''
+    Calculates 16-bit CRC-CCITT, return [msb, lsb]
+    '''
+    crc = calc_crc16(data, crc)
+    return [(crc & 0xFF00) >> 8, crc & 0x00FF]
+
+
+def check_crc16(data, crc_msb, crc_lsb):
+    '''
+    Check the CRC-CCITT of data with the big endian crc bytes
+    '''
+    return calc_crc16(data) == (crc_msb << 8 | crc_lsb)
@@ -8,6 +8,7 @@ import time
 from .dict_extend import Dict
 from ..constants import INTERFACES
 from ..command import Command
+from .crc import calc_crc16_bytes
 
 if sys.version_info[0] > 2:
     from queue import Queue
@@ -15,6 +16,7 @@ else:
     from Queue import Queue
 
 COMMAND_START = [0x55, 0x55]
+COMMAND_START_BYTES = bytes(COMMAND_START)
 PACKET_FOUND_INIT_STATE = 0
 PACKET_FOUND_START_STATE = 1
 PACKET_FOUND_TYPE_STATE = 2
@@ -70,6 +72,25 @@ def build_ethernet_packet(dest, src, message_type, message_bytes=[], payload_len
     return Command(message_type, bytes(whole_packet), payload_length_format)
 
 
+def build_ethernet_frame(mac_header, message_type, message_bytes=b'', use_length_as_protocol=True):
+    '''
+    Build the bytes of an ethernet packet with prebuilt destination and
+    source MAC bytes, same as the actual command of build_ethernet_packet
+    '''
+    packet = bytes(message_type) + \
+        struct.pack('<I', len(message_bytes)) + bytes(message_bytes)
+
+    payload_len = len(COMMAND_START) + len(packet) + 2
+    if not use_length_as_protocol:
+        payload_len = 0
+
+    frame = mac_header + struct.pack('<H', payload_len) + \
+        COMMAND_START_BYTES + packet + bytes(calc_crc(packet))
+    if payload_len < 46:
+        frame += bytes(46-payload_len)
+    return frame
+
+
 def build_input_packet(name, properties=None, param=False, value=False):
     '''
     Build input packet
@@ -249,21 +270,7 @@ def calc_crc(payload):
     '''
     Calculates 16-bit CRC-CCITT
     '''
-    crc = 0x1D0F
-    for bytedata in payload:
-        crc = crc ^ (bytedata << 8)
-        i = 0
-        while i < 8:
-            if crc & 0x8000:
-                crc = (crc << 1) ^ 0x1021
-            else:
-                crc = crc << 1
-            i += 1
-
-    crc = crc & 0xffff
-    crc_msb = (crc & 0xFF00) >> 8
-    crc_lsb = (crc & 0x00FF)
-    return [crc_msb, crc_lsb]
+    return calc_crc16_bytes(payload)
 
 
 def clear_elements(list_instance):
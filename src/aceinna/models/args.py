@@ -41,7 +41,17 @@ class WebserverArgs(KeyValuesArgumentBase):
         'set_user_para': False,
         'ntrip_client': False,
         'force_bootloader': False,
-        'para_path': None
+        'para_path': None,
+        'autobaud_workers': 8,
+        'buffer_framer': False,
+        'command_window': 1,
+        'parse_batch_size': 1,
+        'data_log_format': 'csv',
+        'log_policy': 'block',
+        'raw_log_max_size': 0,
+        'raw_log_max_time': 0,
+        'ethernet_capture': 'auto',
+        'receive_cache_policy': 'drop-oldest'
     }
 
 
@@ -64,5 +74,9 @@ class LogParserArgs(KeyValuesArgumentBase):
         'log_type': 'openrtk',
         'path': '.',
         'kml_rate': 5,
-        'powerdr': 'false'
+        'powerdr': 'false',
+        'jobs': 1,
+        'export_format': 'csv',
+        'time_from': None,
+        'time_to': None
     }
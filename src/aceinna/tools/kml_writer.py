@@ -0,0 +1,291 @@
+"""
+Streaming KML writer of GNSS and INS tracks for the log parsers
+"""
+import math
+import time
+import shutil
+import datetime
+import tempfile
+import collections
+
+GPS_EPOCH = datetime.datetime(1980, 1, 6)
+LEAP_SECONDS = -18
+
+# positions in degree, velocities in m/s, angles in degree, tow in ms
+GnssPoint = collections.namedtuple(
+    'GnssPoint', ['week', 'tow', 'position_type', 'latitude', 'longitude',
+                  'height', 'north_vel', 'east_vel', 'up_vel'])
+InsPoint = collections.namedtuple(
+    'InsPoint', ['week', 'tow', 'ins_status', 'position_type', 'latitude',
+                 'longitude', 'height', 'north_vel', 'east_vel', 'up_vel',
+                 'roll', 'pitch', 'heading'])
+
+
+class GpsTimeConverter(object):
+    '''
+    Convert GPS week and seconds to UTC time struct, the time struct of
+    last second is cached, as the track points are in time order
+    '''
+
+    def __init__(self, leapseconds=LEAP_SECONDS):
+        self.leapseconds = leapseconds
+        self._last_key = None
+        self._last_value = None
+
+    def to_utc(self, gpsweek, gpsseconds):
+        elapsed = datetime.timedelta(
+            days=(gpsweek*7), seconds=(gpsseconds+self.leapseconds))
+        # whole seconds, the same as format to '%Y-%m-%d %H:%M:%S'
+        key = elapsed.days * 86400 + elapsed.seconds
+        if key != self._last_key:
+            self._last_key = key
+            self._last_value = (
+                GPS_EPOCH + datetime.timedelta(seconds=key)).timetuple()
+        return self._last_value
+
+
+class TrackKmlWriter(object):
+    '''
+    Write the track line string to kml file while parsing, the placemarks
+    are spooled to a temp file, and appended to the kml file on close.
+    The placemark of a point is written when next point comes, so the
+    first and last point are known without keeping the track in memory.
+
+    In segment mode, the writer writes a part of the track which is merged
+    by the writer of whole track. The first two and last point of the part
+    are kept, as their placemarks depend on the position in whole track.
+    '''
+    colors = []
+    track_color = ''
+
+    def __init__(self, kml_file, placemark_file=None, is_segment=False):
+        self.kml_file = kml_file
+        self.is_segment = is_segment
+        self._own_placemark_file = placemark_file is None
+        self.placemark_file = tempfile.TemporaryFile(mode='w+') \
+            if placemark_file is None else placemark_file
+        self.time_converter = GpsTimeConverter()
+        self.count = 0
+        self.pending = None
+        self.head = []
+        self.middle_count = 0
+        if not is_segment:
+            self.kml_file.write(self.build_header())
+
+    def build_header(self):
+        kml_header = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"\
+            + "<kml xmlns=\"http://www.opengis.net/kml/2.2\">\n"\
+            + "<Document>\n"
+        for i in range(6):
+            kml_header += "<Style id=\"P" + str(i) + "\">\r\n"\
+                + "<IconStyle>\r\n"\
+                + "<color>" + self.colors[i] + "</color>\n"\
+                + "<scale>0.3</scale>\n"\
+                + "<Icon><href>http://maps.google.com/mapfiles/kml/shapes/track.png</href></Icon>\n"\
+                + "</IconStyle>\n"\
+                + "</Style>\n"
+
+        kml_header += "<Placemark>\n"\
+            + "<name>Rover Track</name>\n"\
+            + "<Style>\n"\
+            + "<LineStyle>\n"\
+            + "<color>" + self.track_color + "</color>\n"\
+            + "</LineStyle>\n"\
+            + "</Style>\n"\
+            + "<LineString>\n"\
+            + "<coordinates>\n"
+        return kml_header
+
+    def add(self, point):
+        '''
+        Add a point of track
+        '''
+        coordinate = self.build_coordinate(point)
+        if coordinate:
+            self.kml_file.write(coordinate)
+        self.add_placemark(point)
+
+    def add_placemark(self, point):
+        if self.is_segment and self.count < 2:
+            self.head.append(point)
+        else:
+            self.flush_pending()
+            self.pending = point
+        self.count += 1
+
+    def flush_pending(self):
+        if self.pending is None:
+            return
+        self.placemark_file.write(
+            self.build_placemark(self.pending, self.count - 1, False))
+        if self.is_segment:
+            self.middle_count += 1
+        self.pending = None
+
+    def close(self):
+        '''
+        Write the placemarks and end of kml. In segment mode, return the
+        kept points to merge.
+        '''
+        if self.is_segment:
+            return {
+                'head': self.head,
+                'tail': [] if self.pending is None else [self.pending],
+                'middle_count': self.middle_count
+            }
+
+        if self.pending is not None:
+            self.placemark_file.write(
+                self.build_placemark(self.pending, self.count - 1, True))
+            self.pending = None
+
+        self.kml_file.write("</coordinates>\n"
+                            + "</LineString>\n"
+                            + "</Placemark>\n"
+                            + "<Folder>\n"
+                            + "<name>Rover Position</name>\n")
+        self.placemark_file.seek(0)
+        shutil.copyfileobj(self.placemark_file, self.kml_file)
+        if self._own_placemark_file:
+            self.placemark_file.close()
+        self.kml_file.write("</Folder>\n"
+                            + "</Document>\n"
+                            + "</kml>\n")
+        return None
+
+    def merge(self, segment, coordinate_file, placemark_file):
+        '''
+        Append a part of track written by a writer in segment mode
+        '''
+        shutil.copyfileobj(coordinate_file, self.kml_file)
+        for point in segment['head']:
+            self.add_placemark(point)
+        if segment['middle_count'] > 0:
+            self.flush_pending()
+            shutil.copyfileobj(placemark_file, self.placemark_file)
+            self.count += segment['middle_count']
+        for point in segment['tail']:
+            self.add_placemark(point)
+
+    def build_coordinate(self, point):
+        raise NotImplementedError
+
+    def build_placemark(self, point, index, is_last):
+        raise NotImplementedError
+
+    def build_placemark_name(self, ep_sp, point, index, is_last):
+        if index <= 1:
+            return "<name>Start</name>\n"
+        if is_last:
+            return "<name>End</name>\n"
+        if math.fmod(ep_sp[5]+(point.tow % 1000)/1000+0.025, 30) < 0.05:
+            return "<name>"\
+                + "%02d" % ep_sp[3] + "%02d" % ep_sp[4] + "%02d" % ep_sp[5]\
+                + "</name>\n"
+        return ''
+
+    def build_time_description(self, ep_sp, point):
+        return "<TimeStamp><when>"\
+            + time.strftime("%Y-%m-%dT%H:%M:%S.", ep_sp)\
+            + "%02dZ" % ((point.tow % 1000)/10)\
+            + "</when></TimeStamp>\n"\
+            + "<description><![CDATA[\n"\
+            + "<TABLE border=\"1\" width=\"100%\" Align=\"center\">\n"\
+            + "<TR ALIGN=RIGHT>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Time:</TD><TD>"\
+            + str(point.week) + "</TD><TD>" + "%.3f" % (point.tow/1000) + "</TD><TD>"\
+            + "%2d:%2d:%7.4f" % (ep_sp[3], ep_sp[4], ep_sp[5]+(point.tow % 1000)/1000) + "</TD><TD>"\
+            + "%4d/%2d/%2d" % (ep_sp[0], ep_sp[1], ep_sp[2]) + "</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Position:</TD><TD>"\
+            + "%.8f" % point.latitude + "</TD><TD>" + "%.8f" % point.longitude + "</TD><TD>" + "%.4f" % point.height + "</TD><TD>(DMS,m)</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Vel(N,E,D):</TD><TD>"\
+            + "%.4f" % point.north_vel + "</TD><TD>" + "%.4f" % point.east_vel + "</TD><TD>" + "%.4f" % point.up_vel + "</TD><TD>(m/s)</TD></TR>\n"
+
+    def build_point(self, point, style, heading):
+        return "<styleUrl>#P" + str(style) + "</styleUrl>\n"\
+            + "<Style>\n"\
+            + "<IconStyle>\n"\
+            + "<heading>" + "%.4f" % heading + "</heading>\n"\
+            + "</IconStyle>\n"\
+            + "</Style>\n"\
+            + "<Point>\n"\
+            + "<coordinates>" + "%.9f,%.9f,%.3f" % (point.longitude, point.latitude, point.height) + "</coordinates>\n"\
+            + "</Point>\n"\
+            + "</Placemark>\n"
+
+
+class GnssKmlWriter(TrackKmlWriter):
+    colors = ["ffffffff", "ff0000ff", "ffff00ff",
+              "50FF78F0", "ff00ff00", "ff00aaff"]
+    track_color = 'ffffffff'
+    gnss_postype = ["NONE", "PSRSP", "PSRDIFF",
+                    "UNDEFINED", "RTKFIXED", "RTKFLOAT"]
+
+    def build_coordinate(self, point):
+        if point.position_type == 0:
+            return None
+        return format(point.longitude, ".9f") + ',' + format(point.latitude, ".9f")\
+            + ',' + format(point.height, ".3f") + '\n'
+
+    def build_placemark(self, point, index, is_last):
+        if point.position_type == 0:
+            return ''
+
+        ep_sp = self.time_converter.to_utc(point.week, point.tow/1000)
+        track_ground = math.atan2(
+            point.east_vel, point.north_vel) * (57.295779513082320)
+
+        return "<Placemark>\n"\
+            + self.build_placemark_name(ep_sp, point, index, is_last)\
+            + self.build_time_description(ep_sp, point)\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Att(r,p,h):</TD><TD>"\
+            + "0" + "</TD><TD>" + "0" + "</TD><TD>" + "%.4f" % track_ground + "</TD><TD>(deg,approx)</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Mode:</TD><TD>"\
+            + "0" + "</TD><TD>" + self.gnss_postype[point.position_type] + "</TD><TR>\n"\
+            + "</TABLE>\n"\
+            + "]]></description>\n"\
+            + self.build_point(point, point.position_type, track_ground)
+
+
+class InsKmlWriter(TrackKmlWriter):
+    # white-cyan, red, purple, light-yellow, green, yellow
+    colors = ["ffffffff", "50FF78F0", "ffff00ff",
+              "ff0000ff", "ff00ff00", "ff00aaff"]
+    track_color = 'ff0000ff'
+    ins_status = ["INS_INACTIVE", "INS_ALIGNING", "INS_HIGH_VARIANCE",
+                  "INS_SOLUTION_GOOD", "INS_SOLUTION_FREE", "INS_ALIGNMENT_COMPLETE"]
+    ins_postype = ["INS_NONE", "INS_PSRSP", "INS_PSRDIFF",
+                   "INS_PROPOGATED", "INS_RTKFIXED", "INS_RTKFLOAT"]
+
+    def __init__(self, kml_file, kml_rate, placemark_file=None, is_segment=False):
+        # seconds between points of track
+        self.kml_interval = 1/kml_rate
+        super(InsKmlWriter, self).__init__(
+            kml_file, placemark_file, is_segment)
+
+    def build_coordinate(self, point):
+        ep_sp = self.time_converter.to_utc(point.week, point.tow/1000)
+        if math.fmod(ep_sp[5]+(point.tow % 1000)/1000+0.0005, self.kml_interval) >= 0.005:
+            return None
+        return format(point.longitude, ".9f") + ',' + format(point.latitude, ".9f")\
+            + ',' + format(point.height, ".3f") + '\n'
+
+    def build_placemark(self, point, index, is_last):
+        if not (index == 0 or is_last or
+                math.fmod(point.tow/1000 + 0.0005, self.kml_interval) < 0.005):
+            return ''
+
+        ep_sp = self.time_converter.to_utc(point.week, point.tow/1000)
+        # styles are in the order of position type
+        pcolor = point.position_type if 0 <= point.position_type <= 5 else 0
+
+        return "<Placemark>\n"\
+            + self.build_placemark_name(ep_sp, point, index, is_last)\
+            + self.build_time_description(ep_sp, point)\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Att(r,p,h):</TD><TD>"\
+            + "%.4f" % point.roll + "</TD><TD>" + "%.4f" % point.pitch + "</TD><TD>" + "%.4f" % point.heading + "</TD><TD>(deg,approx)</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Mode:</TD><TD>"\
+            + self.ins_status[point.ins_status] + "</TD><TD>" + self.ins_postype[point.position_type] + "</TD><TR>\n"\
+            + "</TABLE>\n"\
+            + "]]></description>\n"\
+            + self.build_point(point, pcolor, point.heading)
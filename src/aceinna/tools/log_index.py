@@ -0,0 +1,168 @@
+"""
+Time index of user logs. The 0x5555 framed packets with GPS time in a log
+file are scanned once, and saved next to it as an array of records sorted
+by time, so the byte range of a time window is found by bisection.
+"""
+import os
+import mmap
+import struct
+from ..framework.rotating_log import (
+    PacketIndexer, get_gps_seconds, resolve_gps_time)
+
+INDEX_SUFFIX = '.idx'
+INDEX_MAGIC = b'ULIX'
+INDEX_VERSION = 1
+# magic, version, size and modified time of the log file
+INDEX_HEADER = struct.Struct('<4sHQd')
+# offset, length, GPS week, GPS time of week in seconds, packet type
+INDEX_RECORD = struct.Struct('<QIHd2s')
+# bytes read from log file per round when the index is built
+SCAN_CHUNK_SIZE = 1024 * 1024
+
+
+class _RecordIndexer(PacketIndexer):
+    '''
+    Collect a record per packet with GPS time
+    '''
+
+    def __init__(self, output_packets):
+        super(_RecordIndexer, self).__init__(output_packets)
+        self.records = []
+
+    def _add_packet(self, packet_type, buffer, payload_start, payload_len):
+        time_reader = self.time_readers.get(packet_type)
+        if time_reader is None or payload_len < time_reader[0].size:
+            return
+        week, tow = time_reader[0].unpack_from(buffer, payload_start)
+        tow = tow * time_reader[1]
+        # boundary is the offset of buffer until the scan is done
+        offset = self.boundary + payload_start - self.header_size
+        self.records.append((get_gps_seconds(week, tow), offset,
+                             self.header_size + payload_len + 2,
+                             week, tow, packet_type))
+
+
+def _get_log_stat(file_path):
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime
+
+
+def build_log_index(file_path, output_packets):
+    '''
+    Scan the log file, and save the records of packets sorted by GPS time
+    into file_path + '.idx'. Return the path of index.
+    '''
+    indexer = _RecordIndexer(output_packets)
+    with open(file_path, 'rb') as log_file:
+        while True:
+            chunk = log_file.read(SCAN_CHUNK_SIZE)
+            if not chunk:
+                break
+            indexer.feed(chunk)
+
+    # the sort is stable, packets of the same time keep the order in file
+    indexer.records.sort(key=lambda x: x[0])
+    index_path = file_path + INDEX_SUFFIX
+    size, modified_time = _get_log_stat(file_path)
+    with open(index_path, 'wb') as index_file:
+        index_file.write(INDEX_HEADER.pack(
+            INDEX_MAGIC, INDEX_VERSION, size, modified_time))
+        for record in indexer.records:
+            index_file.write(INDEX_RECORD.pack(*record[1:]))
+    return index_path
+
+
+def load_log_index(file_path, output_packets):
+    '''
+    Open the index of log file, it is built again if the log file is
+    changed after the index is saved
+    '''
+    index_path = file_path + INDEX_SUFFIX
+    if os.path.exists(index_path):
+        log_index = LogIndex(index_path)
+        if log_index.is_valid(*_get_log_stat(file_path)):
+            return log_index
+        log_index.close()
+    return LogIndex(build_log_index(file_path, output_packets))
+
+
+class LogIndex(object):
+    '''
+    Records of an index file, read from a memory map
+    '''
+
+    def __init__(self, index_path):
+        self._file = open(index_path, 'rb')
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._map = None
+        if self._size > INDEX_HEADER.size:
+            self._map = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = None
+        if self._size >= INDEX_HEADER.size:
+            self._file.seek(0)
+            self.header = INDEX_HEADER.unpack(
+                self._file.read(INDEX_HEADER.size))
+
+    def __len__(self):
+        return max(0, self._size - INDEX_HEADER.size) // INDEX_RECORD.size
+
+    def is_valid(self, size, modified_time):
+        return self.header is not None and \
+            self.header[0:2] == (INDEX_MAGIC, INDEX_VERSION) and \
+            self.header[2:4] == (size, modified_time)
+
+    def get_record(self, index):
+        return INDEX_RECORD.unpack_from(
+            self._map, INDEX_HEADER.size + index * INDEX_RECORD.size)
+
+    def get_time(self, index):
+        record = self.get_record(index)
+        return get_gps_seconds(record[2], record[3])
+
+    def bisect(self, gps_seconds, right=False):
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            value = self.get_time(middle)
+            if value < gps_seconds or (right and value == gps_seconds):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def resolve_window(self, start=None, end=None):
+        '''
+        GPS seconds of the time window, start and end are (week, tow), the
+        week of first packet is used if week is None
+        '''
+        first_week = self.get_record(0)[2] if len(self) > 0 else 0
+        return (resolve_gps_time(start, first_week),
+                resolve_gps_time(end, first_week))
+
+    def find_range(self, start=None, end=None):
+        '''
+        Find the byte range (start, end) of packets in the window of GPS
+        seconds. Return None if no packet is in the window.
+        '''
+        if len(self) == 0:
+            return None
+        low = 0 if start is None else self.bisect(start)
+        high = len(self) if end is None else self.bisect(end, right=True)
+        if low >= high:
+            return None
+
+        range_start = None
+        range_end = 0
+        for index in range(low, high):
+            offset, length = self.get_record(index)[0:2]
+            if range_start is None or offset < range_start:
+                range_start = offset
+            range_end = max(range_end, offset + length)
+        return range_start, range_end
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
@@ -9,7 +9,12 @@ import struct
 import json
 import math
 from ..framework.utils import resource
-from ..framework.utils.print import (print_green, print_red)
+from ..framework.utils.crc import calc_crc16
+from ..framework.utils.print import print_green
+from .parse_jobs import (
+    collect_files, filter_time_window, build_result, run_parse_jobs)
+from .stream_parse import StreamParseMixin
+from .kml_writer import (GnssPoint, InsPoint)
 
 is_later_py_3 = sys.version_info > (3, 0)
 
@@ -36,6 +41,7 @@ class ZouParse:
         self.time_tag = None  # in packet's head
 
         self.err_count = 0
+        self.packet_count = 0
 
         with open(json_setting) as json_data:
             self.rtk_properties = json.load(json_data)
@@ -55,6 +61,7 @@ class ZouParse:
                         pack_fmt = 'd'
                         b = struct.pack(len_fmt, *head_time)
                         self.time_tag = struct.unpack(pack_fmt, b)
+                        self.packet_count += 1
                         self.parse_output_packet_payload(packet_type)
 
                         self.packet_buffer = []
@@ -83,6 +90,10 @@ class ZouParse:
         if self.fp_all is not None:
             self.fp_all.close()
 
+    @property
+    def crc_error_count(self):
+        return self.err_count
+
     def start_log(self, output):
         if self.fp_all is None:
             self.fp_all = open(self.path + "all.txt", 'w')
@@ -404,17 +415,31 @@ class ZouParse:
         return ulCRC
 
 
-class UserRawParse:
-    def __init__(self, data_file, path, inskml_rate, json_setting):
+class UserRawParse(StreamParseMixin):
+    def __init__(self, data_file, path, inskml_rate, json_setting, streaming=False, jobs=1, export_format='csv',
+                 time_window=None):
         self.rawdata = []
-        if is_later_py_3:
+        self.data_file = data_file
+        # streaming mode reads the log file chunk by chunk,
+        # jobs more than 1 parses byte ranges of the file in processes
+        self.streaming = streaming or jobs > 1 or time_window is not None
+        self.jobs = jobs
+        # (start, end) GPS time, only the packets in it are parsed
+        self.time_window = time_window
+        # csv, or npz/npy to save packet records as numpy arrays
+        self.export_format = export_format
+        self.kml_rate = inskml_rate
+        self.json_setting = json_setting
+        if self.streaming:
+            # read in parse_stream
+            self.filedata = None
+        elif is_later_py_3:
             self.rawdata = data_file.read()
         else:
             self.filedata = data_file.read()
             for c in self.filedata:
                 self.rawdata.append(ord(c))
         self.path = path
-        self.inskml_rate = 1/inskml_rate
         self.packet_buffer = []
         self.sync_state = 0
         self.sync_pattern = collections.deque(4*[0], 4)
@@ -424,6 +449,7 @@ class UserRawParse:
         self.nmea_buffer = []
         self.nmea_sync = 0
         self.log_files = {}
+        self.record_writers = {}
         self.f_nmea = None
         self.f_process = None
         self.f_imu = None
@@ -432,70 +458,40 @@ class UserRawParse:
         self.f_ins = None
         self.f_gnss_kml = None
         self.f_ins_kml = None
-        self.gnssdata = []
-        self.insdata = []
-        self.pkfmt = {}
+        self.gnss_kml = None
+        self.ins_kml = None
+        self.packet_layouts = {}
+        self.output_packets = {}
+        self.packet_types = frozenset()
+        self.nmea_types = frozenset()
+        self.packet_count = 0
+        self.crc_error_count = 0
         self.last_time = 0
 
-        with open(json_setting) as json_data:
-            self.rtk_properties = json.load(json_data)
+        self.rtk_properties = self.load_setting(json_setting)
 
     def start_pasre(self):
+        self.prepare_parse()
+        self.open_files()
+
+        if self.time_window is not None:
+            self.parse_window(*self.time_window)
+        elif self.jobs > 1:
+            self.parse_parallel(self.jobs)
+        elif self.streaming:
+            self.parse_stream()
+        else:
+            self.parse_rawdata()
+
+        self.save_kml_files()
+        self.close_files()
+
+    def prepare_parse(self):
         self.userPacketsTypeList = self.rtk_properties['userPacketsTypeList']
         self.userNMEAList = self.rtk_properties['userNMEAList']
-        for x in self.rtk_properties['userOutputPackets']:
-            length = 0
-            pack_fmt = '<'
-            for value in x['payload']:
-                if value['type'] == 'float':
-                    pack_fmt += 'f'
-                    length += 4
-                elif value['type'] == 'uint32':
-                    pack_fmt += 'I'
-                    length += 4
-                elif value['type'] == 'int32':
-                    pack_fmt += 'i'
-                    length += 4
-                elif value['type'] == 'int16':
-                    pack_fmt += 'h'
-                    length += 2
-                elif value['type'] == 'uint16':
-                    pack_fmt += 'H'
-                    length += 2
-                elif value['type'] == 'double':
-                    pack_fmt += 'd'
-                    length += 8
-                elif value['type'] == 'int64':
-                    pack_fmt += 'q'
-                    length += 8
-                elif value['type'] == 'uint64':
-                    pack_fmt += 'Q'
-                    length += 8
-                elif value['type'] == 'char':
-                    pack_fmt += 'c'
-                    length += 1
-                elif value['type'] == 'uchar':
-                    pack_fmt += 'B'
-                    length += 1
-                elif value['type'] == 'uint8':
-                    pack_fmt += 'B'
-                    length += 1
-            len_fmt = '{0}B'.format(length)
-            fmt_dic = collections.OrderedDict()
-            fmt_dic['len'] = length
-            fmt_dic['len_b'] = len_fmt
-            fmt_dic['pack'] = pack_fmt
-            self.pkfmt[x['name']] = fmt_dic
-
-        self.f_process = open(self.path[0:-1] + '-process', 'w')
-        self.f_gnssposvel = open(self.path[0:-1] + '-gnssposvel.txt', 'w')
-        self.f_imu = open(self.path[0:-1] + '-imu.txt', 'w')
-        self.f_odo = open(self.path[0:-1] + '-odo.txt', 'w')
-        self.f_ins = open(self.path[0:-1] + '-ins.txt', 'w')
-        self.f_nmea = open(self.path[0:-1] + '-nmea', 'wb')
-        self.f_gnss_kml = open(self.path[0:-1] + '-gnss.kml', 'w')
-        self.f_ins_kml = open(self.path[0:-1] + '-ins.kml', 'w')
+        self.build_packet_index()
 
+    def parse_rawdata(self):
         packet_type = ''
         nmea_header_len = 0
         for i, new_byte in enumerate(self.rawdata):
@@ -508,11 +504,13 @@ class UserRawParse:
                         self.packet_buffer[-2] + self.packet_buffer[-1]
                     # packet crc
                     if packet_crc == self.calc_crc(self.packet_buffer[:-2]):
+                        self.packet_count += 1
                         self.parse_output_packet_payload(packet_type)
                         self.packet_buffer = []
                         self.sync_state = 0
                     else:
                         #print('user data crc err!')
+                        self.crc_error_count += 1
                         self.sync_state = 0  # CRC did not match
             else:
                 for packet_type in self.userPacketsTypeList:
@@ -554,269 +552,10 @@ class UserRawParse:
                     if self.nmea_buffer[-1] == 0x0A and self.nmea_buffer[-2] == 0x0D:
                         self.f_nmea.write(bytes(self.nmea_buffer))
                         self.nmea_sync = 0
-        self.save_gnss_kml()
-        self.save_ins_kml()
-        self.close_files()
-
-    def weeksecondstoutc(self, gpsweek, gpsseconds, leapseconds):
-        import datetime
-        import calendar
-        datetimeformat = "%Y-%m-%d %H:%M:%S"
-        epoch = datetime.datetime.strptime(
-            "1980-01-06 00:00:00", datetimeformat)
-        elapsed = datetime.timedelta(
-            days=(gpsweek*7), seconds=(gpsseconds+leapseconds))
-        return datetime.datetime.strftime(epoch + elapsed, datetimeformat)
-
-    def save_gnss_kml(self):
-        color = ["ffffffff", "ff0000ff", "ffff00ff",
-                 "50FF78F0", "ff00ff00", "ff00aaff"]
-        kml_header = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"\
-            + "<kml xmlns=\"http://www.opengis.net/kml/2.2\">\n"\
-            + "<Document>\n"
-        for i in range(6):
-            kml_header += "<Style id=\"P" + str(i) + "\">\r\n"\
-                + "<IconStyle>\r\n"\
-                + "<color>" + color[i] + "</color>\n"\
-                + "<scale>0.3</scale>\n"\
-                + "<Icon><href>http://maps.google.com/mapfiles/kml/shapes/track.png</href></Icon>\n"\
-                + "</IconStyle>\n"\
-                + "</Style>\n"
-        self.f_gnss_kml.write(kml_header)
-
-        gnss_postype = ["NONE", "PSRSP", "PSRDIFF",
-                        "UNDEFINED", "RTKFIXED", "RTKFLOAT"]
-
-        gnss_track = "<Placemark>\n"\
-            + "<name>Rover Track</name>\n"\
-            + "<Style>\n"\
-            + "<LineStyle>\n"\
-            + "<color>ffffffff</color>\n"\
-            + "</LineStyle>\n"\
-            + "</Style>\n"\
-            + "<LineString>\n"\
-            + "<coordinates>\n"
-
-        for pos in self.gnssdata:
-            if pos[2] == 0:
-                continue
-
-            gnss_track += format(pos[4], ".9f") + ',' + format(pos[3],
-                                                               ".9f") + ',' + format(pos[5], ".3f") + '\n'
-
-        gnss_track += "</coordinates>\n"\
-            + "</LineString>\n"\
-            + "</Placemark>\n"
-
-        gnss_track += "<Folder>\n"\
-            + "<name>Rover Position</name>\n"
-
-        for i, pos in enumerate(self.gnssdata):
-            ep = self.weeksecondstoutc(pos[0], pos[1]/1000, -18)
-            ep_sp = time.strptime(ep, "%Y-%m-%d %H:%M:%S")
-
-            if pos[2] == 0:
-                pass
-            else:
-                track_ground = math.atan2(
-                    pos[14], pos[13]) * (57.295779513082320)
-
-                gnss_track += "<Placemark>\n"
-                if i <= 1:
-                    gnss_track += "<name>Start</name>\n"
-                elif i == len(self.gnssdata)-1:
-                    gnss_track += "<name>End</name>\n"
-                else:
-                    if math.fmod(ep_sp[5]+(pos[1] % 1000)/1000+0.025, 30) < 0.05:
-                        gnss_track += "<name>"\
-                            + "%02d" % ep_sp[3] + "%02d" % ep_sp[4] + "%02d" % ep_sp[5]\
-                            + "</name>\n"
-
-                gnss_track += "<TimeStamp><when>"\
-                    + time.strftime("%Y-%m-%dT%H:%M:%S.", ep_sp)\
-                    + "%02dZ" % ((pos[1] % 1000)/10)\
-                    + "</when></TimeStamp>\n"
-
-                gnss_track += "<description><![CDATA[\n"\
-                    + "<TABLE border=\"1\" width=\"100%\" Align=\"center\">\n"\
-                    + "<TR ALIGN=RIGHT>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Time:</TD><TD>"\
-                    + str(pos[0]) + "</TD><TD>" + "%.3f" % (pos[1]/1000) + "</TD><TD>"\
-                    + "%2d:%2d:%7.4f" % (ep_sp[3], ep_sp[4], ep_sp[5]+(pos[1] % 1000)/1000) + "</TD><TD>"\
-                    + "%4d/%2d/%2d" % (ep_sp[0], ep_sp[1], ep_sp[2]) + "</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Position:</TD><TD>"\
-                    + "%.8f" % pos[3] + "</TD><TD>" + "%.8f" % pos[4] + "</TD><TD>" + "%.4f" % pos[5] + "</TD><TD>(DMS,m)</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Vel(N,E,D):</TD><TD>"\
-                    + "%.4f" % pos[13] + "</TD><TD>" + "%.4f" % pos[14] + "</TD><TD>" + "%.4f" % (-pos[15]) + "</TD><TD>(m/s)</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Att(r,p,h):</TD><TD>"\
-                    + "0" + "</TD><TD>" + "0" + "</TD><TD>" + "%.4f" % track_ground + "</TD><TD>(deg,approx)</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Mode:</TD><TD>"\
-                    + "0" + "</TD><TD>" + gnss_postype[pos[2]] + "</TD><TR>\n"\
-                    + "</TABLE>\n"\
-                    + "]]></description>\n"
-
-                gnss_track += "<styleUrl>#P" + str(pos[2]) + "</styleUrl>\n"\
-                    + "<Style>\n"\
-                    + "<IconStyle>\n"\
-                    + "<heading>" + "%.4f" % track_ground + "</heading>\n"\
-                    + "</IconStyle>\n"\
-                    + "</Style>\n"
-
-                gnss_track += "<Point>\n"\
-                    + "<coordinates>" + "%.9f,%.9f,%.3f" % (pos[4], pos[3], pos[5]) + "</coordinates>\n"\
-                    + "</Point>\n"
-
-                gnss_track += "</Placemark>\n"
-
-        gnss_track += "</Folder>\n"\
-            + "</Document>\n"\
-            + "</kml>\n"
-
-        self.f_gnss_kml.write(gnss_track)
-
-    def save_ins_kml(self):
-        '''
-        '''
-        # white-cyan, red, purple, light-yellow, green, yellow
-        color = ["ffffffff", "50FF78F0", "ffff00ff",
-                 "ff0000ff", "ff00ff00", "ff00aaff"]
-        kml_header = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"\
-            + "<kml xmlns=\"http://www.opengis.net/kml/2.2\">\n"\
-            + "<Document>\n"
-        for i in range(6):
-            kml_header += "<Style id=\"P" + str(i) + "\">\r\n"\
-                + "<IconStyle>\r\n"\
-                + "<color>" + color[i] + "</color>\n"\
-                + "<scale>0.3</scale>\n"\
-                + "<Icon><href>http://maps.google.com/mapfiles/kml/shapes/track.png</href></Icon>\n"\
-                + "</IconStyle>\n"\
-                + "</Style>\n"
-        self.f_ins_kml.write(kml_header)
-
-        ins_track = "<Placemark>\n"\
-            + "<name>Rover Track</name>\n"\
-            + "<Style>\n"\
-            + "<LineStyle>\n"\
-            + "<color>ff0000ff</color>\n"\
-            + "</LineStyle>\n"\
-            + "</Style>\n"\
-            + "<LineString>\n"\
-            + "<coordinates>\n"
-
-        ins_status = ["INS_INACTIVE", "INS_ALIGNING", "INS_HIGH_VARIANCE",
-                      "INS_SOLUTION_GOOD", "INS_SOLUTION_FREE", "INS_ALIGNMENT_COMPLETE"]
-        ins_postype = ["INS_NONE", "INS_PSRSP", "INS_PSRDIFF",
-                       "INS_PROPOGATED", "INS_RTKFIXED", "INS_RTKFLOAT"]
-
-        for ins in self.insdata:
-            ep = self.weeksecondstoutc(ins[0], ins[1]/1000, -18)
-            ep_sp = time.strptime(ep, "%Y-%m-%d %H:%M:%S")
-
-            if math.fmod(ep_sp[5]+(ins[1] % 1000)/1000+0.0005, self.inskml_rate) < 0.005:
-                if abs(ins[5]*ins[4]) < 0.00000001:
-                    continue
-
-                ins_track += format(ins[5], ".9f") + ',' + format(ins[4],
-                                                                  ".9f") + ',' + format(ins[6], ".3f") + '\n'
-
-        ins_track += "</coordinates>\n"\
-            + "</LineString>\n"\
-            + "</Placemark>\n"
-
-        ins_track += "<Folder>\n"\
-            + "<name>Rover Position</name>\n"
-
-        for i, ins in enumerate(self.insdata):
-            ep = self.weeksecondstoutc(ins[0], ins[1]/1000, -18)
-            ep_sp = time.strptime(ep, "%Y-%m-%d %H:%M:%S")
-
-            if i == 0 or i == len(self.insdata)-1 or math.fmod(ins[1]/1000 + 0.0005, self.inskml_rate) < 0.005:
-                ins_track += "<Placemark>\n"
-                if i <= 1:
-                    ins_track += "<name>Start</name>\n"
-                elif i == len(self.insdata)-1:
-                    ins_track += "<name>End</name>\n"
-                else:
-                    if math.fmod(ep_sp[5]+(ins[1] % 1000)/1000+0.025, 30) < 0.05:
-                        ins_track += "<name>"\
-                            + "%02d" % ep_sp[3] + "%02d" % ep_sp[4] + "%02d" % ep_sp[5]\
-                            + "</name>\n"
-
-                ins_track += "<TimeStamp><when>"\
-                    + time.strftime("%Y-%m-%dT%H:%M:%S.", ep_sp)\
-                    + "%02dZ" % ((ins[1] % 1000)/10)\
-                    + "</when></TimeStamp>\n"
-
-                ins_track += "<description><![CDATA[\n"\
-                    + "<TABLE border=\"1\" width=\"100%\" Align=\"center\">\n"\
-                    + "<TR ALIGN=RIGHT>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Time:</TD><TD>"\
-                    + str(ins[0]) + "</TD><TD>" + "%.3f" % (ins[1]/1000) + "</TD><TD>"\
-                    + "%2d:%2d:%7.4f" % (ep_sp[3], ep_sp[4], ep_sp[5]+(ins[1] % 1000)/1000) + "</TD><TD>"\
-                    + "%4d/%2d/%2d" % (ep_sp[0], ep_sp[1], ep_sp[2]) + "</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Position:</TD><TD>"\
-                    + "%.8f" % ins[4] + "</TD><TD>" + "%.8f" % ins[5] + "</TD><TD>" + "%.4f" % ins[6] + "</TD><TD>(DMS,m)</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Vel(N,E,D):</TD><TD>"\
-                    + "%.4f" % ins[7] + "</TD><TD>" + "%.4f" % ins[8] + "</TD><TD>" + "%.4f" % (-ins[9]) + "</TD><TD>(m/s)</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Att(r,p,h):</TD><TD>"\
-                    + "%.4f" % ins[10] + "</TD><TD>" + "%.4f" % ins[11] + "</TD><TD>" + "%.4f" % ins[12] + "</TD><TD>(deg,approx)</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Mode:</TD><TD>"\
-                    + ins_status[ins[2]] + "</TD><TD>" + ins_postype[ins[3]] + "</TD><TR>\n"\
-                    + "</TABLE>\n"\
-                    + "]]></description>\n"
-
-                pcolor = 0
-                if ins[3] == 0:     # "INS_INACTIVE"
-                    pcolor = 0
-                elif ins[3] == 1:   # "SPP/INS_SPP"
-                    pcolor = 1
-                elif ins[3] == 2:   # "PSRDIFF/INS_PSRDIFF (RTD)"
-                    pcolor = 2
-                elif ins[3] == 3:   # "INS_DR"
-                    pcolor = 3
-                elif ins[3] == 4:   # "RTK_FIX/INS_RTKFIXED"
-                    pcolor = 4
-                elif ins[3] == 5:   # "RTK_FLOAT/INS_RTKFLOAT"
-                    pcolor = 5
-                # pcolor = 4
-
-                ins_track += "<styleUrl>#P" + str(pcolor) + "</styleUrl>\n"\
-                    + "<Style>\n"\
-                    + "<IconStyle>\n"\
-                    + "<heading>" + "%.4f" % ins[12] + "</heading>\n"\
-                    + "</IconStyle>\n"\
-                    + "</Style>\n"
-
-                ins_track += "<Point>\n"\
-                    + "<coordinates>" + "%.9f,%.9f,%.3f" % (ins[5], ins[4], ins[6]) + "</coordinates>\n"\
-                    + "</Point>\n"
-
-                ins_track += "</Placemark>\n"
-
-        ins_track += "</Folder>\n"\
-            + "</Document>\n"\
-            + "</kml>\n"
-
-        self.f_ins_kml.write(ins_track)
-
-    def close_files(self):
-        for i, (k, v) in enumerate(self.log_files.items()):
-            v.close()
-        self.f_nmea.close()
-        self.f_process.close()
-        self.f_gnssposvel.close()
-        self.f_imu.close()
-        self.f_odo.close()
-        self.f_ins.close()
-        self.f_gnss_kml.close()
-        self.f_ins_kml.close()
-        self.log_files.clear()
 
     def log(self, output, data):
         if output['name'] not in self.log_files.keys():
-            self.log_files[output['name']] = open(
-                self.path + output['name'] + '.csv', 'w')
-            self.write_titlebar(self.log_files[output['name']], output)
+            self.open_log_file(output)
         buffer = ''
         for i in range(len(data)):
             if i == 1:
@@ -949,7 +688,9 @@ class UserRawParse:
                                      output['payload'][14]['format']) + "\n"
             self.f_gnssposvel.write(buffer)
 
-            self.gnssdata.append(data)
+            self.gnss_kml.add(GnssPoint(
+                data[0], data[1], data[2], data[3], data[4], data[5],
+                data[13], data[14], -data[15]))
 
         elif output['name'] == 'o1':
             buffer = '$GPODO,'
@@ -1041,38 +782,42 @@ class UserRawParse:
                 self.f_ins.write(buffer)
 
                 if abs(data[5]*data[4]) > 0.00000001:
-                    self.insdata.append(data)
+                    self.ins_kml.add(InsPoint(
+                        data[0], data[1], data[2], data[3], data[4], data[5],
+                        data[6], data[7], data[8], -data[9],
+                        data[10], data[11], data[12]))
 
     def parse_output_packet_payload(self, packet_type):
         payload_lenth = self.packet_buffer[2]
         payload = self.packet_buffer[3:payload_lenth+3]
-        output = next(
-            (x for x in self.rtk_properties['userOutputPackets'] if x['name'] == packet_type), None)
-        if output != None:
+        self.parse_packet(packet_type, payload, payload_lenth)
+
+    def parse_packet(self, packet_type, payload, payload_lenth):
+        output = self.output_packets.get(packet_type)
+        if output != None and self.is_columnar():
+            self.log_records(output, payload, payload_lenth)
+        elif output != None:
             self.openrtk_unpack_output_packet(output, payload, payload_lenth)
         else:
             print('no packet type {0} in json'.format(packet_type))
 
     def openrtk_unpack_output_packet(self, output, payload, payload_lenth):
-        fmt = self.pkfmt[output['name']]
-        len_fmt = fmt['len_b']
-        pack_fmt = fmt['pack']
+        layout = self.packet_layouts[output['name']]
+        unpacker = layout.struct
         if output['isList']:
-            length = fmt['len']
+            length = layout.size
             packet_num = payload_lenth // length
             for i in range(packet_num):
                 payload_c = payload[i*length:(i+1)*length]
                 try:
-                    b = struct.pack(len_fmt, *payload_c)
-                    data = struct.unpack(pack_fmt, b)
+                    data = unpacker.unpack(bytearray(payload_c))
                     self.log(output, data)
                 except Exception as e:
                     print(
                         "error happened when decode the payload {0}".format(e))
         else:
             try:
-                b = struct.pack(len_fmt, *payload)
-                data = struct.unpack(pack_fmt, b)
+                data = unpacker.unpack(bytearray(payload))
                 self.log(output, data)
             except Exception as e:
                 print("error happened when decode the payload {0}".format(e))
@@ -1084,17 +829,7 @@ class UserRawParse:
         file.write("\n")
 
     def calc_crc(self, payload):
-        crc = 0x1D0F
-        for bytedata in payload:
-            crc = crc ^ (bytedata << 8)
-            for i in range(0, 8):
-                if crc & 0x8000:
-                    crc = (crc << 1) ^ 0x1021
-                else:
-                    crc = crc << 1
-
-        crc = crc & 0xffff
-        return crc
+        return calc_crc16(payload)
 
 
 def mkdir(file_path):
@@ -1120,11 +855,12 @@ def prepare_setting_folder(setting_file):
 
     product = 'OpenRTK330L'
     product_folder = os.path.join(setting_folder_path, product)
-    if not os.path.isdir(product_folder):
-        os.makedirs(product_folder)
-
     config_path = os.path.join(
         product_folder, setting_file)
+    # setting file could be under a sub folder of product
+    config_folder = os.path.dirname(config_path)
+    if not os.path.isdir(config_folder):
+        os.makedirs(config_folder)
 
     if not os.path.isfile(config_path):
         config_content = resource.get_content_from_bundle(
@@ -1138,24 +874,51 @@ def prepare_setting_folder(setting_file):
     return config_path
 
 
-def do_parse(folder_path, kml_rate, setting_file):
+def is_log_file(fname):
+    return (fname.startswith('user') or fname.startswith('debug')) and fname.endswith('.bin') or (fname.startswith('IMU')) or (fname.endswith('.log'))
+
+
+def parse_file(file_path, kml_rate, setting_path, streaming=False, jobs=1, export_format='csv',
+               time_window=None):
+    '''
+    Parse one log file into its _p folder, return the parse result
+    '''
+    fname = os.path.basename(file_path)
+    print_green('Parse is started. File path: {0}'.format(file_path))
+    start_time = time.time()
+    path = mkdir(file_path)
+    parse = None
+    try:
+        with open(file_path, 'rb') as fp_rawdata:
+            if fname.startswith('user'):
+                parse = UserRawParse(
+                    fp_rawdata, path + '/' + fname[:-4] + '_', kml_rate, setting_path, streaming, jobs,
+                    export_format, time_window)
+            elif fname.endswith('.log'):
+                parse = ZouParse(
+                    fp_rawdata, path + '/' + fname.rstrip(".log") + '_', setting_path)
+            else:
+                raise ValueError('No parser for file {0}'.format(fname))
+            parse.start_pasre()
+    except Exception as e:
+        return build_result(file_path, start_time, error=str(e))
+
+    return build_result(file_path, start_time,
+                        packets=parse.packet_count,
+                        crc_errors=parse.crc_error_count)
+
+
+def do_parse(folder_path, kml_rate, setting_file, streaming=False, jobs=1, export_format='csv',
+             time_window=None):
     setting_path = prepare_setting_folder(setting_file)
-    for root, _, file_name in os.walk(folder_path):
-        for fname in file_name:
-            if (fname.startswith('user') or fname.startswith('debug')) and fname.endswith('.bin') or (fname.startswith('IMU')) or (fname.endswith('.log')):
-                file_path = os.path.join(root, fname)
-                print_green(
-                    'Parse is started. File path: {0}'.format(file_path))
-                path = mkdir(file_path)
-                try:
-                    with open(file_path, 'rb') as fp_rawdata:
-                        if fname.startswith('user'):
-                            parse = UserRawParse(
-                                fp_rawdata, path + '/' + fname[:-4] + '_', kml_rate, setting_path)
-                        elif fname.endswith('.log'):
-                            parse = ZouParse(
-                                fp_rawdata, path + '/' + fname.rstrip(".log") + '_', setting_path)
-                        parse.start_pasre()
-                        print_green('Parse done.')
-                except Exception as e:
-                    print_red(e)
+    file_paths = filter_time_window(
+        collect_files(folder_path, is_log_file), time_window)
+    if len(file_paths) >= jobs:
+        file_args = [(file_path, kml_rate, setting_path, streaming, 1, export_format,
+                      time_window) for file_path in file_paths]
+        return run_parse_jobs(parse_file, file_args, jobs)
+
+    # less files than jobs, split each file into byte ranges
+    file_args = [(file_path, kml_rate, setting_path, streaming, jobs, export_format,
+                  time_window) for file_path in file_paths]
+    return run_parse_jobs(parse_file, file_args)
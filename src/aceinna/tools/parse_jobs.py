@@ -0,0 +1,130 @@
+"""
+Run log parse of files in a process pool, and summarize the results
+"""
+import os
+import time
+from multiprocessing import Pool
+from ..framework.utils.print import (print_green, print_red)
+from ..framework.rotating_log import (load_segment_index, is_segment_in_window)
+
+
+def collect_files(folder_path, is_log_file):
+    '''
+    Collect paths of log files under folder, sorted by path
+    '''
+    file_paths = []
+    for root, _, file_names in os.walk(folder_path):
+        for fname in file_names:
+            if is_log_file(fname):
+                file_paths.append(os.path.join(root, fname))
+    return sorted(file_paths)
+
+
+def filter_time_window(file_paths, time_window=None):
+    '''
+    Drop the segments of raw logs out of the time window, which is (start,
+    end) of GPS time (week, tow), by the index sidecar of segments. Files
+    without index are kept.
+    '''
+    if time_window is None:
+        return file_paths
+    start, end = time_window
+    return [x for x in file_paths
+            if is_segment_in_window(load_segment_index(x), start, end)]
+
+
+def build_result(file_path, start_time, packets=None, crc_errors=None, error=None):
+    '''
+    Build parse result of one file
+    '''
+    return {
+        'file': file_path,
+        'bytes': os.path.getsize(file_path) if os.path.isfile(file_path) else 0,
+        'packets': packets,
+        'crc_errors': crc_errors,
+        'seconds': time.time() - start_time,
+        'error': error
+    }
+
+
+def format_throughput(size, duration):
+    '''
+    Format the parse throughput in MB/s
+    '''
+    size = size / (1024.0 * 1024.0)
+    throughput = size / duration if duration > 0 else 0
+    return '{0:.2f} MB in {1:.2f}s, {2:.2f} MB/s'.format(size, duration, throughput)
+
+
+def _run_task(task):
+    parse_file, args = task
+    return parse_file(*args)
+
+
+def _report_progress(index, total, result):
+    if result['error']:
+        print_red('[{0}/{1}] Parse failed. File path: {2}, {3}'.format(
+            index, total, result['file'], result['error']))
+        return
+
+    print_green('[{0}/{1}] Parse done. File path: {2}, {3}'.format(
+        index, total, result['file'],
+        format_throughput(result['bytes'], result['seconds'])))
+
+
+def _format_count(value):
+    return '-' if value is None else str(value)
+
+
+def print_summary(results):
+    '''
+    Print a table of bytes, packets, CRC errors and seconds per file
+    '''
+    if len(results) == 0:
+        print_green('No log file is parsed.')
+        return
+
+    rows = [['File', 'Bytes', 'Packets', 'CRC errors', 'Seconds']]
+    for result in sorted(results, key=lambda x: x['file']):
+        rows.append([
+            os.path.basename(result['file']),
+            str(result['bytes']),
+            _format_count(result['packets']),
+            _format_count(result['crc_errors']),
+            'failed' if result['error'] else '{0:.2f}'.format(result['seconds'])
+        ])
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print(' | '.join([row[0].ljust(widths[0])] +
+                         [row[i].rjust(widths[i]) for i in range(1, len(row))]))
+
+
+def run_parse_jobs(parse_file, file_args, jobs=1):
+    '''
+    Call parse_file(*args) for each args in file_args, in a pool of
+    jobs processes. parse_file should be a module level function which
+    returns the result of build_result.
+    '''
+    jobs = max(1, int(jobs or 1))
+    total = len(file_args)
+    results = []
+
+    if jobs > 1 and total > 1:
+        pool = Pool(min(jobs, total))
+        try:
+            tasks = [(parse_file, args) for args in file_args]
+            for result in pool.imap_unordered(_run_task, tasks):
+                results.append(result)
+                _report_progress(len(results), total, result)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for args in file_args:
+            result = parse_file(*args)
+            results.append(result)
+            _report_progress(len(results), total, result)
+
+    print_summary(results)
+    return results
@@ -0,0 +1,479 @@
+"""
+Streaming and chunk parallel parse of 0x5555 framed user logs
+"""
+import os
+import sys
+import json
+import mmap
+import shutil
+import tempfile
+from multiprocessing import Pool
+from ..framework.columnar_storage import (
+    ColumnarWriter, is_columnar_format, RECORD_FILE_SUFFIX)
+from ..framework.packet_layout import load_packet_layouts
+from .kml_writer import (GnssKmlWriter, InsKmlWriter)
+from ..framework.rotating_log import (build_time_readers, get_gps_seconds)
+from .log_index import load_log_index
+
+# bytes read from log file per round in streaming mode
+STREAM_CHUNK_SIZE = 1024 * 1024
+# min bytes of a range parsed by one process
+MIN_SEGMENT_SIZE = 16 * 1024 * 1024
+USER_PACKET_HEADER = b'\x55\x55'
+NMEA_HEADER = b'$'
+NMEA_END = b'\r\n'
+NMEA_TYPE_LEN = 6
+MAX_NMEA_LEN = 256
+
+# attribute, file suffix, mode of the output files
+OUTPUT_FILES = [
+    ('f_process', '-process', 'w'),
+    ('f_gnssposvel', '-gnssposvel.txt', 'w'),
+    ('f_imu', '-imu.txt', 'w'),
+    ('f_odo', '-odo.txt', 'w'),
+    ('f_ins', '-ins.txt', 'w'),
+    ('f_nmea', '-nmea', 'wb'),
+]
+KML_FILES = [
+    ('f_gnss_kml', '-gnss.kml', 'w'),
+    ('f_ins_kml', '-ins.kml', 'w'),
+]
+# placemarks of a segment, kml files of a segment only have coordinates
+SEGMENT_KML_FILES = [
+    ('f_gnss_placemark', '-gnss-placemark', 'w'),
+    ('f_ins_placemark', '-ins-placemark', 'w'),
+]
+# columnar export only keeps the packet records and nmea
+COLUMNAR_OUTPUT_FILES = [
+    ('f_nmea', '-nmea', 'wb'),
+]
+
+
+def parse_segment(parser_class, file_path, path, kml_rate, json_setting,
+                  export_format, start, end):
+    '''
+    Parse the byte range of log file into the files with path prefix
+    '''
+    with open(file_path, 'rb') as data_file:
+        parse = parser_class(data_file=data_file, path=path,
+                             inskml_rate=kml_rate, json_setting=json_setting,
+                             streaming=True, export_format=export_format)
+        return parse.parse_range(start, end)
+
+
+def _parse_segment_task(task):
+    return parse_segment(*task)
+
+
+def _copy_file(file_path, mode, target):
+    with open(file_path, mode) as source:
+        shutil.copyfileobj(source, target)
+
+
+class StreamParseMixin(object):
+    '''
+    Parse user log chunk by chunk, or split it into byte ranges and parse
+    them in a process pool. The parser class should provide
+    prepare_parse, parse_packet, calc_crc and the output files.
+
+    With a columnar export_format, parse_packet should pass payloads to
+    log_records, and the records of each packet type are saved as numpy
+    arrays instead of csv, text and kml outputs.
+    '''
+    is_segment = False
+    export_format = 'csv'
+    time_window = None
+    # (start, end) GPS seconds of the window parsed, and time readers of
+    # packet types to filter the packets out of it
+    window_seconds = None
+    window_time_readers = None
+    f_gnss_placemark = None
+    f_ins_placemark = None
+
+    def load_setting(self, json_setting):
+        '''
+        Load the parse setting. The output packets of a device setting are
+        used if it is not a parse setting.
+        '''
+        with open(json_setting) as json_data:
+            properties = json.load(json_data)
+
+        if 'userOutputPackets' not in properties:
+            output_packets = properties['userMessages']['outputPackets']
+            properties = {
+                'userPacketsTypeList': [x['name'] for x in output_packets],
+                'userNMEAList': [],
+                'userOutputPackets': output_packets
+            }
+        return properties
+
+    def is_columnar(self):
+        return is_columnar_format(self.export_format)
+
+    def build_packet_index(self):
+        self.packet_types = frozenset(
+            x.encode('latin-1') for x in self.userPacketsTypeList)
+        self.nmea_types = frozenset(
+            x.encode('latin-1') for x in self.userNMEAList)
+        self.output_packets = dict(
+            (x['name'], x) for x in self.rtk_properties['userOutputPackets'])
+        self.packet_layouts = load_packet_layouts(self.json_setting)
+
+    def open_files(self):
+        self.record_writers = {}
+        if self.is_columnar():
+            for attr, suffix, mode in COLUMNAR_OUTPUT_FILES:
+                setattr(self, attr, open(self.path[0:-1] + suffix, mode))
+            return
+
+        output_files = OUTPUT_FILES + KML_FILES
+        if self.is_segment:
+            output_files = output_files + SEGMENT_KML_FILES
+        for attr, suffix, mode in output_files:
+            setattr(self, attr, open(self.path[0:-1] + suffix, mode))
+
+        self.gnss_kml = GnssKmlWriter(
+            self.f_gnss_kml, self.f_gnss_placemark, self.is_segment)
+        self.ins_kml = InsKmlWriter(
+            self.f_ins_kml, self.kml_rate, self.f_ins_placemark, self.is_segment)
+
+    def save_kml_files(self):
+        if self.is_columnar():
+            return
+        self.gnss_kml.close()
+        self.ins_kml.close()
+
+    def open_log_file(self, output):
+        log_file = open(self.path + output['name'] + '.csv', 'w')
+        self.log_files[output['name']] = log_file
+        # the title bar is written once when segments are merged
+        if not self.is_segment:
+            self.write_titlebar(log_file, output)
+        return log_file
+
+    def open_record_writer(self, output):
+        record_writer = ColumnarWriter(
+            self.path + output['name'], output['payload'], self.export_format)
+        self.record_writers[output['name']] = record_writer
+        return record_writer
+
+    def log_records(self, output, payload, payload_len):
+        '''
+        Collect the payload as packed records of the packet type
+        '''
+        record_writer = self.record_writers.get(output['name'])
+        if record_writer is None:
+            record_writer = self.open_record_writer(output)
+
+        if not output['isList'] and payload_len != record_writer.record_size:
+            print('error happened when decode the {0}, payload length {1}'.format(
+                output['name'], payload_len))
+            return
+        record_writer.write(bytes(payload))
+
+    def close_files(self):
+        for log_file in self.log_files.values():
+            log_file.close()
+        # records of a segment are saved when segments are merged
+        for record_writer in self.record_writers.values():
+            record_writer.close(export=not self.is_segment)
+        for attr, _, _ in OUTPUT_FILES + KML_FILES + SEGMENT_KML_FILES:
+            if getattr(self, attr) is not None:
+                getattr(self, attr).close()
+        self.log_files.clear()
+        self.record_writers.clear()
+
+    def parse_stream(self, start=0, end=None):
+        '''
+        Parse the log file chunk by chunk from start, only the unparsed tail
+        is kept. Stop before the first frame or nmea starts at or after end,
+        return the offset of parse stopped.
+        '''
+        self.data_file.seek(start)
+        buffer = bytearray()
+        buffer_offset = start
+        stop_index = sys.maxsize
+        while True:
+            chunk = self.data_file.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                # the unparsed tail is dropped, as it is not complete
+                return buffer_offset + len(buffer)
+            buffer.extend(chunk)
+            if end is not None:
+                stop_index = end - buffer_offset
+            read_index, is_stopped = self.parse_buffer(buffer, stop_index)
+            if is_stopped:
+                return buffer_offset + read_index
+            # a new buffer, the memoryview of the old one is not released yet
+            buffer = bytearray(buffer[read_index:])
+            buffer_offset += read_index
+
+    def parse_window(self, start=None, end=None):
+        '''
+        Parse the packets in the time window, start and end are GPS time
+        (week, tow). The byte range of window is found in the time index of
+        log file, only the range is mapped into memory and parsed.
+        '''
+        output_packets = self.rtk_properties['userOutputPackets']
+        log_index = load_log_index(self.data_file.name, output_packets)
+        try:
+            self.window_seconds = log_index.resolve_window(start, end)
+            byte_range = log_index.find_range(*self.window_seconds)
+        finally:
+            log_index.close()
+        if byte_range is None:
+            return
+
+        # packets of other types may be in the range, as they are not
+        # sorted by time in log file
+        self.window_time_readers = build_time_readers(output_packets)
+
+        # offset of a memory map should be a multiple of the granularity
+        map_start = byte_range[0] - byte_range[0] % mmap.ALLOCATIONGRANULARITY
+        data_map = mmap.mmap(self.data_file.fileno(), byte_range[1] - map_start,
+                             access=mmap.ACCESS_READ, offset=map_start)
+        try:
+            self.parse_buffer(data_map, read_index=byte_range[0] - map_start)
+        finally:
+            data_map.close()
+
+    def parse_buffer(self, buffer, stop_index=sys.maxsize, read_index=0):
+        '''
+        Parse packets and nmea in buffer from read_index, return the index of
+        unparsed data, and if it stopped at a frame or nmea starts at or after
+        stop_index
+        '''
+        buffer_view = memoryview(buffer)
+        buffer_len = len(buffer)
+
+        while True:
+            header_index = buffer.find(USER_PACKET_HEADER, read_index)
+            search_end = buffer_len if header_index < 0 else header_index
+
+            if len(self.nmea_types) > 0:
+                nmea_index = buffer.find(NMEA_HEADER, read_index, search_end)
+                if nmea_index >= stop_index:
+                    return read_index, True
+                if nmea_index >= 0:
+                    nmea_end = self.parse_nmea(buffer, nmea_index, search_end)
+                    if nmea_end < 0:
+                        return nmea_index, False
+                    read_index = nmea_end
+                    continue
+
+            if header_index < 0:
+                # keep the last byte, it may be the start of next header
+                if buffer_len - 1 >= stop_index:
+                    return read_index, True
+                return max(read_index, buffer_len - 1), False
+
+            if header_index >= stop_index:
+                return read_index, True
+
+            if header_index + 5 > buffer_len:
+                return header_index, False
+
+            packet_type = bytes(buffer[header_index+2:header_index+4])
+            if packet_type not in self.packet_types:
+                read_index = header_index + 1
+                continue
+
+            payload_len = buffer[header_index+4]
+            payload_end = header_index + 5 + payload_len
+            if payload_end + 2 > buffer_len:
+                return header_index, False
+
+            packet_crc = 256 * buffer[payload_end] + buffer[payload_end+1]
+            if packet_crc != self.calc_crc(buffer_view[header_index+2:payload_end]):
+                self.crc_error_count += 1
+            elif self.window_seconds is None or \
+                    self.is_in_window(packet_type, buffer, header_index + 5, payload_len):
+                self.packet_count += 1
+                self.parse_packet(packet_type.decode('latin-1'),
+                                  buffer_view[header_index+5:payload_end],
+                                  payload_len)
+            read_index = payload_end + 2
+
+    def is_in_window(self, packet_type, buffer, payload_start, payload_len):
+        '''
+        Check if the GPS time of packet is in the window parsed, packets
+        without GPS time are not in the window
+        '''
+        time_reader = self.window_time_readers.get(packet_type)
+        if time_reader is None or payload_len < time_reader[0].size:
+            return False
+        week, tow = time_reader[0].unpack_from(buffer, payload_start)
+        packet_time = get_gps_seconds(week, tow * time_reader[1])
+        start, end = self.window_seconds
+        return (start is None or packet_time >= start) and \
+            (end is None or packet_time <= end)
+
+    def parse_nmea(self, buffer, index, search_end):
+        '''
+        Write the nmea sentence starts at index, return the index after it,
+        or -1 if the sentence is not complete in buffer
+        '''
+        if index + NMEA_TYPE_LEN > len(buffer):
+            return -1
+
+        if bytes(buffer[index:index+NMEA_TYPE_LEN]) not in self.nmea_types:
+            # like parse_rawdata, the bytes of a '$' and the type after it
+            # are not searched again, but the next packet is still parsed
+            return min(index + NMEA_TYPE_LEN, search_end)
+
+        end_index = buffer.find(
+            NMEA_END, index + NMEA_TYPE_LEN, index + MAX_NMEA_LEN)
+        if end_index < 0:
+            return -1 if len(buffer) - index < MAX_NMEA_LEN else index + 1
+
+        self.f_nmea.write(bytes(buffer[index:end_index+2]))
+        return end_index + 2
+
+    def find_sync_offset(self, start):
+        '''
+        Find the offset of first CRC valid packet at or after start
+        '''
+        self.data_file.seek(start)
+        buffer = bytearray()
+        buffer_offset = start
+        while True:
+            chunk = self.data_file.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                return buffer_offset + len(buffer)
+            buffer.extend(chunk)
+            buffer_len = len(buffer)
+
+            header_index = buffer.find(USER_PACKET_HEADER)
+            while header_index >= 0 and header_index + 5 <= buffer_len:
+                payload_end = header_index + 5 + buffer[header_index+4]
+                if payload_end + 2 > buffer_len:
+                    break
+                packet_type = bytes(buffer[header_index+2:header_index+4])
+                packet_crc = 256 * buffer[payload_end] + buffer[payload_end+1]
+                if packet_type in self.packet_types and \
+                        packet_crc == self.calc_crc(buffer[header_index+2:payload_end]):
+                    return buffer_offset + header_index
+                header_index = buffer.find(USER_PACKET_HEADER, header_index + 1)
+
+            keep_index = header_index if header_index >= 0 else max(
+                0, buffer_len - 1)
+            buffer = buffer[keep_index:]
+            buffer_offset += keep_index
+
+    def parse_range(self, start, end):
+        '''
+        Parse the byte range as a segment, the title bar and kml are left
+        to the merge of segments
+        '''
+        self.is_segment = True
+        self.prepare_parse()
+        self.open_files()
+        stop = self.parse_stream(start, end)
+        log_names = list(self.log_files.keys()) + \
+            list(self.record_writers.keys())
+        gnss_kml = None
+        ins_kml = None
+        if not self.is_columnar():
+            gnss_kml = self.gnss_kml.close()
+            ins_kml = self.ins_kml.close()
+        self.close_files()
+        return {
+            'path': self.path,
+            'start': start,
+            'end': end,
+            'stop': stop,
+            'log_names': log_names,
+            'packet_count': self.packet_count,
+            'crc_error_count': self.crc_error_count,
+            'gnss_kml': gnss_kml,
+            'ins_kml': ins_kml
+        }
+
+    def parse_parallel(self, jobs):
+        '''
+        Split log file into ranges starts at a CRC valid packet, parse them
+        in jobs processes, then merge the outputs in order
+        '''
+        file_size = os.fstat(self.data_file.fileno()).st_size
+        segment_size = max(MIN_SEGMENT_SIZE, file_size // jobs + 1)
+        offsets = [0]
+        for split in range(segment_size, file_size, segment_size):
+            offset = self.find_sync_offset(split)
+            if offsets[-1] < offset < file_size:
+                offsets.append(offset)
+
+        if len(offsets) == 1:
+            self.parse_stream()
+            return
+
+        temp_folder = tempfile.mkdtemp(
+            dir=os.path.dirname(os.path.abspath(self.path)))
+        tasks = []
+        for i, start in enumerate(offsets):
+            end = offsets[i+1] if i + 1 < len(offsets) else None
+            tasks.append((self.__class__, self.data_file.name,
+                          os.path.join(temp_folder, '{0}_'.format(i)),
+                          self.kml_rate, self.json_setting, self.export_format,
+                          start, end))
+
+        try:
+            pool = Pool(min(jobs, len(tasks)))
+            try:
+                results = pool.map(_parse_segment_task, tasks)
+            finally:
+                pool.close()
+                pool.join()
+
+            stop = 0
+            for task, result in zip(tasks, results):
+                if stop > result['start']:
+                    # a frame of last segment crosses the start, parse the
+                    # segment again from where the last one stopped
+                    result = parse_segment(*(task[0:6] + (stop, result['end'])))
+                self.merge_segment(result)
+                stop = result['stop']
+        finally:
+            shutil.rmtree(temp_folder, ignore_errors=True)
+
+    def merge_segment(self, result):
+        '''
+        Append outputs of a parsed segment
+        '''
+        self.packet_count += result['packet_count']
+        self.crc_error_count += result['crc_error_count']
+        if self.is_columnar():
+            self.merge_records(result)
+            return
+
+        for attr, suffix, mode in OUTPUT_FILES:
+            _copy_file(result['path'][0:-1] + suffix,
+                       'rb' if 'b' in mode else 'r', getattr(self, attr))
+
+        for name in result['log_names']:
+            log_file = self.log_files.get(name)
+            if log_file is None:
+                log_file = self.open_log_file(self.output_packets[name])
+            _copy_file(result['path'] + name + '.csv', 'r', log_file)
+
+        self.merge_kml(self.gnss_kml, result['gnss_kml'],
+                       result['path'][0:-1] + '-gnss')
+        self.merge_kml(self.ins_kml, result['ins_kml'],
+                       result['path'][0:-1] + '-ins')
+
+    def merge_records(self, result):
+        for attr, suffix, mode in COLUMNAR_OUTPUT_FILES:
+            _copy_file(result['path'][0:-1] + suffix,
+                       'rb' if 'b' in mode else 'r', getattr(self, attr))
+
+        for name in result['log_names']:
+            record_writer = self.record_writers.get(name)
+            if record_writer is None:
+                record_writer = self.open_record_writer(
+                    self.output_packets[name])
+            with open(result['path'] + name + RECORD_FILE_SUFFIX, 'rb') as record_file:
+                record_writer.merge(record_file)
+
+    def merge_kml(self, kml_writer, segment, file_prefix):
+        with open(file_prefix + '.kml', 'r') as coordinate_file:
+            with open(file_prefix + '-placemark', 'r') as placemark_file:
+                kml_writer.merge(segment, coordinate_file, placemark_file)
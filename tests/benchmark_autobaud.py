@@ -0,0 +1,101 @@
+"""
+Benchmark time to first device of serial autobaud on mock serial lines of
+a host with 8 ports, the mock IMU is linked to the 6th port at 115200.
+Compares with the thread per group of ports autobaud used before.
+Run from the repository root: python tests/benchmark_autobaud.py
+"""
+import sys
+import time
+import threading
+
+try:
+    from aceinna.framework.communicators.autobaud import AutobaudScheduler
+    from aceinna.framework.communicators import SerialPort
+    from aceinna.framework.constants import BAUDRATE_LIST
+    from mocker.serial_port import (MockSerialHost, MockSerialLine)
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    sys.path.append('./tests')
+    from aceinna.framework.communicators.autobaud import AutobaudScheduler
+    from aceinna.framework.communicators import SerialPort
+    from aceinna.framework.constants import BAUDRATE_LIST
+    from mocker.serial_port import (MockSerialHost, MockSerialLine)
+
+PORT_COUNT = 8
+DEVICE_INDEX = 5
+DEVICE_BAUD = 115200
+LEGACY_THREAD_COUNT = 4
+
+
+def build_host():
+    lines = []
+    for index in range(PORT_COUNT):
+        port = 'ttyUSB{0}'.format(index)
+        if index == DEVICE_INDEX:
+            lines.append(MockSerialLine(port, 'IMU', DEVICE_BAUD))
+        else:
+            lines.append(MockSerialLine(port))
+    return MockSerialHost(lines)
+
+
+def legacy_autobaud(communicator, host):
+    '''
+    Ports are grouped to 4 threads, each thread pings its ports at each
+    baudrate one by one
+    '''
+    found = threading.Event()
+    result = []
+
+    def ping_ports(ports):
+        for port in ports:
+            for baud in BAUDRATE_LIST:
+                if found.is_set():
+                    return
+                serial_port = host.open_port(port, baud)
+                if communicator.confirm_device(serial_port, None):
+                    result.append((serial_port, baud))
+                    found.set()
+                    return
+                serial_port.close()
+                time.sleep(0.1)
+
+    ports = host.ports
+    ports_list = [ports[i::LEGACY_THREAD_COUNT]
+                  for i in range(LEGACY_THREAD_COUNT)]
+    threads = [threading.Thread(target=ping_ports, args=(x,))
+               for x in ports_list]
+    for thread in threads:
+        thread.start()
+    found.wait()
+    return result[0]
+
+
+def run(name, find):
+    host = build_host()
+    communicator = SerialPort()
+    start = time.time()
+    serial_port, baud = find(communicator, host)
+    span = time.time() - start
+    serial_port.close()
+    print('{0:<20}{1:>10}{2:>8}{3:>10.2f} s{4:>8} opens'.format(
+        name, serial_port.port, baud, span, sum(host.open_counts.values())))
+    host.stop()
+    return span
+
+
+def scheduler_autobaud(communicator, host):
+    scheduler = AutobaudScheduler(
+        host.ports, BAUDRATE_LIST,
+        lambda serial_port: communicator.confirm_device(serial_port, None),
+        open_port=host.open_port)
+    return scheduler.run()
+
+
+def main():
+    legacy = run('thread per ports', legacy_autobaud)
+    scheduled = run('AutobaudScheduler', scheduler_autobaud)
+    print('speedup: {0:.1f}x'.format(legacy / scheduled))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark csv and npz/npy export of a synthetic OpenRTK user log with
+s1, g1 and i1 packets, parsed in streaming mode. numpy is required.
+Run from the repository root: python tests/benchmark_columnar_export.py
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import struct
+import tempfile
+
+try:
+    from aceinna.tools.openrtk_parse import UserRawParse
+    from aceinna.framework.utils.crc import calc_crc16
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.tools.openrtk_parse import UserRawParse
+    from aceinna.framework.utils.crc import calc_crc16
+
+PACKET_COUNT = 200000
+
+
+def build_payload_config(fields):
+    return [{'name': name, 'type': value_type, 'unit': '', 'format': value_format}
+            for name, value_type, value_format in fields]
+
+
+SETTING = {
+    'userPacketsTypeList': ['s1', 'g1', 'i1'],
+    'userNMEAList': [],
+    'userOutputPackets': [
+        {'name': 's1', 'isList': False, 'payload': build_payload_config(
+            [('week', 'uint32', 'd'), ('tow', 'uint32', '11.3f')] +
+            [('imu{0}'.format(i), 'float', '14.10f') for i in range(6)])},
+        {'name': 'g1', 'isList': False, 'payload': build_payload_config(
+            [('week', 'uint32', 'd'), ('tow', 'uint32', '11.3f'),
+             ('positionMode', 'uint8', 'd'), ('latitude', 'double', '14.9f'),
+             ('longitude', 'double', '14.9f'), ('height', 'double', '10.4f'),
+             ('numberOfSVs', 'uint8', '3d')] +
+            [('gnss{0}'.format(i), 'float', '8.3f') for i in range(9)])},
+        {'name': 'i1', 'isList': False, 'payload': build_payload_config(
+            [('week', 'uint32', 'd'), ('tow', 'uint32', '11.3f'),
+             ('insStatus', 'uint8', '3d'), ('insPositionType', 'uint8', '3d'),
+             ('latitude', 'double', '14.9f'), ('longitude', 'double', '14.9f'),
+             ('height', 'double', '10.4f')] +
+            [('ins{0}'.format(i), 'float', '8.3f') for i in range(6)])}
+    ]
+}
+
+
+def build_packet(packet_type, payload):
+    body = bytearray(packet_type.encode()) + bytearray([len(payload)]) + payload
+    crc = calc_crc16(body)
+    return b'\x55\x55' + bytes(body) + bytes(bytearray([crc >> 8, crc & 0xFF]))
+
+
+def build_log():
+    log = bytearray()
+    for i in range(PACKET_COUNT):
+        tow = 100000 + i * 10
+        if i % 10 == 0:
+            log += build_packet('g1', struct.pack(
+                '<IIBdddB9f', 2100, tow, 4, 31 + i * 1e-7, 121 + i * 1e-7,
+                10.0, 12, *[0.1 * j for j in range(9)]))
+        elif i % 10 == 5:
+            log += build_packet('i1', struct.pack(
+                '<IIBBddd6f', 2100, tow, 1, 4, 31 + i * 1e-7, 121 + i * 1e-7,
+                10.0, *[0.1 * j for j in range(6)]))
+        else:
+            log += build_packet('s1', struct.pack(
+                '<II6f', 2100, tow, *[0.01 * j for j in range(6)]))
+    return bytes(log)
+
+
+def folder_size(folder):
+    return sum(os.path.getsize(os.path.join(folder, x)) for x in os.listdir(folder))
+
+
+def run(folder, log_path, setting_path, export_format):
+    output_folder = os.path.join(folder, export_format)
+    os.makedirs(output_folder)
+
+    start = time.time()
+    with open(log_path, 'rb') as log_file:
+        parse = UserRawParse(log_file, output_folder + '/user_', 5, setting_path,
+                             streaming=True, export_format=export_format)
+        parse.start_pasre()
+    span = time.time() - start
+
+    print('{0:<6}{1:>8} packets{2:>10.3f} s{3:>10.2f} MB output'.format(
+        export_format, parse.packet_count, span,
+        folder_size(output_folder) / 1024.0 / 1024.0))
+    return span
+
+
+def main():
+    folder = tempfile.mkdtemp()
+    try:
+        setting_path = os.path.join(folder, 'setting.json')
+        with open(setting_path, 'w') as setting_file:
+            json.dump(SETTING, setting_file)
+        log_path = os.path.join(folder, 'user.bin')
+        with open(log_path, 'wb') as log_file:
+            log_file.write(build_log())
+        print('log size: {0:.2f} MB'.format(
+            os.path.getsize(log_path) / 1024.0 / 1024.0))
+
+        csv = run(folder, log_path, setting_path, 'csv')
+        for export_format in ['npz', 'npy']:
+            span = run(folder, log_path, setting_path, export_format)
+            print('{0} speedup: {1:.1f}x'.format(export_format, csv / span))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
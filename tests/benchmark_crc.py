@@ -0,0 +1,84 @@
+"""
+Benchmark CRC-16 CCITT on 1 MB of recorded z1 traffic.
+Run from the repository root: python tests/benchmark_crc.py
+"""
+import os
+import sys
+import time
+
+try:
+    from aceinna.framework.utils.crc import (calc_crc16, calc_crc16_table)
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.framework.utils.crc import (calc_crc16, calc_crc16_table)
+
+Z1_RAW_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'mocker', 'devices', 'z1.raw')
+TARGET_SIZE = 1024 * 1024
+
+
+def legacy_calc_crc(payload):
+    '''
+    The bit-by-bit implementation replaced by the crc module
+    '''
+    crc = 0x1D0F
+    for bytedata in payload:
+        crc = crc ^ (bytedata << 8)
+        i = 0
+        while i < 8:
+            if crc & 0x8000:
+                crc = (crc << 1) ^ 0x1021
+            else:
+                crc = crc << 1
+            i += 1
+
+    crc = crc & 0xffff
+    return crc
+
+
+def load_frames():
+    with open(Z1_RAW_PATH, 'rb') as raw_file:
+        raw_data = raw_file.read()
+
+    raw_data = raw_data * (TARGET_SIZE // len(raw_data) + 1)
+    raw_data = raw_data[:TARGET_SIZE]
+
+    frames = []
+    index = raw_data.find(b'UU')
+    while index > -1 and index + 5 <= len(raw_data):
+        frame_len = raw_data[index+4] + 7
+        if index + frame_len > len(raw_data):
+            break
+        frames.append(memoryview(raw_data)[index+2:index+frame_len-2])
+        index = raw_data.find(b'UU', index+frame_len)
+    return frames
+
+
+def run(name, func, frames, list_input=False):
+    inputs = [list(x) for x in frames] if list_input else frames
+    start = time.time()
+    for frame in inputs:
+        func(frame)
+    span = time.time() - start
+    print('{0:<28}{1:>10.3f} ms{2:>10.1f} MB/s'.format(
+        name, span * 1000, TARGET_SIZE / span / 1024 / 1024))
+    return span
+
+
+def main():
+    frames = load_frames()
+    expected = [legacy_calc_crc(x) for x in frames]
+    assert expected == [calc_crc16(x) for x in frames]
+    assert expected == [calc_crc16_table(x) for x in frames]
+
+    print('frames: {0}'.format(len(frames)))
+    legacy = run('legacy bit-by-bit (list)', legacy_calc_crc, frames, True)
+    table = run('lookup table (memoryview)', calc_crc16_table, frames)
+    native = run('crc_hqx (memoryview)', calc_crc16, frames)
+    run('crc_hqx (list)', calc_crc16, frames, True)
+    print('speedup: table {0:.1f}x, crc_hqx {1:.1f}x'.format(
+        legacy / table, legacy / native))
+
+
+if __name__ == '__main__':
+    main()
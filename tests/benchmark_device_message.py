@@ -0,0 +1,130 @@
+"""
+Benchmark command round-trip latency and CPU usage of with_device_message
+on the mock IMU device, compares with the busy-spin wait used before.
+Run from the repository root: python tests/benchmark_device_message.py
+"""
+import os
+import sys
+import json
+import time
+import functools
+
+try:
+    from aceinna.devices.message_center import (
+        DeviceMessageCenter, DeviceMessage)
+    from aceinna.devices.parser_manager import ParserManager
+    from aceinna.devices.decorator import with_device_message
+    from aceinna.framework.utils import helper
+    from mocker.communicator import MockCommunicator
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.devices.message_center import (
+        DeviceMessageCenter, DeviceMessage)
+    from aceinna.devices.parser_manager import ParserManager
+    from aceinna.devices.decorator import with_device_message
+    from aceinna.framework.utils import helper
+    from mocker.communicator import MockCommunicator
+
+DEVICE_TYPE = APP_NAME = 'IMU'
+APP_FILE_PATH = os.path.join(
+    os.getcwd(), 'src', 'aceinna', 'setting', 'OpenIMU300ZI', APP_NAME, 'openimu.json')
+COMMAND_COUNT = 50
+
+
+def legacy_with_device_message(func):
+    '''
+    The busy-spin implementation replaced by DeviceMessage.wait
+    '''
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        generator_func = func(*args, **kwargs)
+        global generator_result
+        generator_result = None
+
+        def check_result():
+            global generator_result
+            while not generator_result:
+                continue
+
+            next_device_message = generator_func.send(generator_result)
+            if isinstance(next_device_message, DeviceMessage):
+                generator_result = None
+                next_device_message.on('finished', on_resolve)
+                next_device_message.send()
+                return check_result()
+            return next_device_message
+
+        def on_resolve(*args, **kwargs):
+            global generator_result
+            generator_result = {
+                'packet_type': kwargs['packet_type'],
+                'data': kwargs['data'],
+                'error': kwargs['error'],
+                'raw': kwargs['raw']
+            }
+
+        try:
+            device_message = generator_func.send(None)
+            if isinstance(device_message, DeviceMessage):
+                device_message.on('finished', on_resolve)
+                device_message.send()
+                return check_result()
+            return device_message
+        except StopIteration as ex:
+            return ex.value
+
+    return wrapper
+
+
+def build_ping(decorator, message_center):
+    @decorator
+    def send_ping_command():
+        command_line = helper.build_input_packet('pG')
+        result = yield message_center.build(command=command_line)
+        return result
+    return send_ping_command
+
+
+def run(name, decorator, properties):
+    communicator = MockCommunicator(options={'device': DEVICE_TYPE})
+    message_center = DeviceMessageCenter(communicator)
+    message_center.set_parser(ParserManager.build(
+        DEVICE_TYPE, 'uart', properties))
+    message_center.setup()
+    send_ping_command = build_ping(decorator, message_center)
+
+    try:
+        latencies = []
+        cpu_start = time.process_time()
+        wall_start = time.time()
+        for _ in range(COMMAND_COUNT):
+            start = time.time()
+            result = send_ping_command()
+            latencies.append(time.time() - start)
+            assert not result['error']
+        wall_span = time.time() - wall_start
+        cpu_span = time.process_time() - cpu_start
+    finally:
+        message_center.stop()
+        communicator.close()
+
+    latencies.sort()
+    print('{0:<20} mean {1:>7.2f} ms  p95 {2:>7.2f} ms  cpu {3:>6.1f}%'.format(
+        name,
+        sum(latencies) / len(latencies) * 1000,
+        latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        cpu_span / wall_span * 100))
+
+
+def main():
+    with open(APP_FILE_PATH) as json_data:
+        properties = json.load(json_data)
+
+    run('busy-spin (before)', legacy_with_device_message, properties)
+    time.sleep(0.5)
+    run('event (after)', with_device_message, properties)
+    os._exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark uart framers on 1 MB of recorded z1 traffic, fed in 1000 bytes
+blocks like DeviceMessageCenter.thread_receiver does.
+Run from the repository root: python tests/benchmark_framer.py
+"""
+import os
+import sys
+import json
+import time
+
+try:
+    from aceinna.devices.parsers.open_message_parser import (
+        UartMessageParser, BufferedUartMessageParser)
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.devices.parsers.open_message_parser import (
+        UartMessageParser, BufferedUartMessageParser)
+
+APP_FILE_PATH = os.path.join(
+    os.getcwd(), 'src', 'aceinna', 'setting', 'OpenIMU300ZI', 'IMU', 'openimu.json')
+Z1_RAW_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'mocker', 'devices', 'z1.raw')
+TARGET_SIZE = 1024 * 1024
+READ_SIZE = 1000
+# 921600 baud, 8N1
+BAUD_921600_BYTES_PER_SECOND = 921600 / 10
+
+
+def load_stream():
+    with open(Z1_RAW_PATH, 'rb') as raw_file:
+        raw_data = raw_file.read()
+    raw_data = raw_data * (TARGET_SIZE // len(raw_data) + 1)
+    return raw_data[:TARGET_SIZE]
+
+
+def run(name, parser_cls, properties, stream):
+    counter = {'count': 0}
+
+    def on_message(*args, **kwargs):
+        counter['count'] += 1
+
+    parser = parser_cls(properties)
+    parser.on('continuous_message', on_message)
+
+    start = time.time()
+    for index in range(0, len(stream), READ_SIZE):
+        parser.analyse(stream[index:index+READ_SIZE])
+    span = time.time() - start
+
+    throughput = len(stream) / span
+    print('{0:<28}{1:>8} packets{2:>10.3f} s{3:>10.2f} MB/s{4:>8.1f}x of 921600 baud'.format(
+        name, counter['count'], span, throughput / 1024 / 1024,
+        throughput / BAUD_921600_BYTES_PER_SECOND))
+    return span
+
+
+def main():
+    with open(APP_FILE_PATH) as json_data:
+        properties = json.load(json_data)
+    stream = load_stream()
+
+    legacy = run('UartMessageParser', UartMessageParser, properties, stream)
+    buffered = run('BufferedUartMessageParser',
+                   BufferedUartMessageParser, properties, stream)
+    print('speedup: {0:.1f}x'.format(legacy / buffered))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark RTCM3 framing of a correction stream, fed in 1024 bytes blocks
+like NTRIPClient.recv does. A recorded stream could be given as argument,
+otherwise 1 MB of MSM-like frames with noise between them is generated.
+Run from the repository root: python tests/benchmark_rtcm.py [rtcm.bin]
+"""
+import sys
+import time
+import random
+import struct
+
+try:
+    from aceinna.core.gnss import (RTCMParser, CRC24Q_TABLE, calc_crc24q)
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.core.gnss import (RTCMParser, CRC24Q_TABLE, calc_crc24q)
+
+TARGET_SIZE = 1024 * 1024
+READ_SIZE = 1024
+# message type, payload length of a typical base station stream
+MESSAGES = [(1005, 19), (1077, 620), (1087, 480), (1097, 410),
+            (1127, 520), (1230, 6)]
+
+
+def build_frame(message_type, payload_len):
+    payload = struct.pack('>H', message_type << 4) + bytes(
+        bytearray(random.randint(0, 255) for _ in range(payload_len - 2)))
+    frame = bytes(bytearray([0xD3, payload_len >> 8, payload_len & 0xFF])) + payload
+    return frame + struct.pack('>I', calc_crc24q(frame))[1:]
+
+
+def build_stream():
+    random.seed(10)
+    stream = bytearray()
+    while len(stream) < TARGET_SIZE:
+        for message_type, payload_len in MESSAGES:
+            stream += build_frame(message_type, payload_len)
+        # a broken frame and noise with preambles
+        stream += build_frame(1077, 100)[:-1] + b'\x00'
+        stream += b'\xd3\x00' + bytes(bytearray(random.randint(0, 255)
+                                                for _ in range(30)))
+    return bytes(stream)
+
+
+class LegacyRTCMParser(object):
+    '''
+    The byte by byte parser replaced by RTCMFramer
+    '''
+
+    def __init__(self):
+        self.read_index = 0
+        self.status = 0
+        self.raw = []
+        self.payload_length = 0
+        self.crc_passed_count = 0
+
+    def receive(self, buf):
+        packets = []
+        buf_iter = iter(buf)
+        while True:
+            try:
+                byte_data = next(buf_iter)
+            except StopIteration:
+                break
+            if self.status == 0:
+                if self.read_index == 0 and byte_data == 0xD3:
+                    self.raw = [byte_data]
+                    self.status = 1
+                    self.read_index += 1
+                else:
+                    self.read_index = 0
+                continue
+            if self.status == 1:
+                self.raw.append(byte_data)
+                self.read_index += 1
+                if self.read_index == 3:
+                    self.payload_length = struct.unpack(
+                        '>I', bytes(2) + bytes(self.raw[1:3]))[0] & 0x3FF
+                    self.payload_length += 3
+                    self.status = 2
+                continue
+            self.raw.append(byte_data)
+            self.read_index += 1
+            if self.read_index == self.payload_length + 3:
+                # the table list was built in each call of calc_crc
+                table = list(CRC24Q_TABLE)
+                crc = 0
+                for value in self.raw[:self.payload_length]:
+                    crc = ((crc << 8) & 0xFFFFFF) ^ table[(crc >> 16) ^ value]
+                crc_value = struct.unpack(
+                    '>I', bytes(1) + bytes(self.raw[-3:]))[0]
+                if crc == crc_value:
+                    self.crc_passed_count += 1
+                    packets.append(self.raw)
+                self.status = 0
+                self.read_index = 0
+        return packets
+
+
+def run(name, receive, stream):
+    count = 0
+    start = time.time()
+    for index in range(0, len(stream), READ_SIZE):
+        count += len(receive(stream[index:index+READ_SIZE]))
+    span = time.time() - start
+    print('{0:<20}{1:>8} frames{2:>10.3f} s{3:>10.2f} MB/s'.format(
+        name, count, span, len(stream) / span / 1024 / 1024))
+    return span, count
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'rb') as rtcm_file:
+            stream = rtcm_file.read()
+    else:
+        stream = build_stream()
+
+    legacy_parser = LegacyRTCMParser()
+    legacy, legacy_count = run('byte by byte', legacy_parser.receive, stream)
+
+    parser = RTCMParser()
+    framed = []
+    parser.on('parsed', framed.append)
+
+    def receive(data):
+        del framed[:]
+        parser.receive(data)
+        return framed[0] if framed else []
+
+    buffered, count = run('RTCMFramer', receive, stream)
+    print('crc failed: {0}, legacy frames: {1}, frames: {2}'.format(
+        parser.crc_failed_count, legacy_count, count))
+    print('speedup: {0:.1f}x'.format(legacy / buffered))
+
+
+if __name__ == '__main__':
+    main()
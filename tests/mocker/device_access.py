@@ -113,11 +113,11 @@ class DeviceAccess(object):
         except:
             command = None
         # print('stop',self._is_stop)
-        if command:
+        for item in self._split_command(command):
             response = None
             try:
                 # do handle command
-                response = self._app.handle_command(command)
+                response = self._app.handle_command(item)
             except Exception as ex:
                 print(ex)
                 response = None
@@ -125,6 +125,21 @@ class DeviceAccess(object):
                 # write to response
                 os.write(self._pipe_sensor_data_write, response)
 
+    def _split_command(self, command):
+        # commands may be written in pipeline, split them by packet header,
+        # the bytes after a packet (such as delay) belong to the packet
+        commands = []
+        while command:
+            next_index = -1
+            if len(command) >= 5 and command[0:2] == b'\x55\x55':
+                next_index = command.find(b'\x55\x55', 5 + command[4] + 2)
+            if next_index < 0:
+                commands.append(command)
+                break
+            commands.append(command[0:next_index])
+            command = command[next_index:]
+        return commands
+
     def write(self, data):
         if isinstance(data, str):
             os.write(self._pipe_command_write, data.encode('utf-8'))
@@ -0,0 +1,95 @@
+import time
+import random
+import threading
+
+from .device_access import DeviceAccess
+
+
+class MockSerialLine(object):
+    '''
+    A serial line of a host, a mock device could be linked at a baudrate
+    '''
+
+    def __init__(self, port, device_name=None, device_baud=None):
+        self.port = port
+        self.device_baud = device_baud
+        self.device_access = None
+        self.lock = threading.Lock()
+        if device_name:
+            self.device_access = DeviceAccess(device_name)
+            self.device_access.start()
+
+    def stop(self):
+        if self.device_access:
+            self.device_access.stop()
+
+
+class MockSerialPort(object):
+    '''
+    Serial port opened on a mock line, bytes of device are noise at other
+    baudrates. The line could be opened once at a time, as exclusive.
+    '''
+
+    def __init__(self, line, baudrate, timeout=0.1):
+        if not line.lock.acquire(False):
+            raise IOError('{0} is in use'.format(line.port))
+        self._line = line
+        self.port = line.port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self._is_open = True
+        self._is_matched = line.device_access is not None and \
+            baudrate == line.device_baud
+        if line.device_access:
+            # drop the output before open
+            while line.device_access.read(4096):
+                pass
+
+    def isOpen(self):
+        return self._is_open
+
+    def close(self):
+        if self._is_open:
+            self._is_open = False
+            self._line.lock.release()
+
+    def write(self, data):
+        if self._is_matched:
+            self._line.device_access.write(data)
+        return len(data)
+
+    def read(self, size=1):
+        data = b''
+        end_time = time.time() + self.timeout
+        while len(data) < size and time.time() < end_time:
+            if self._line.device_access:
+                data += self._line.device_access.read(size - len(data))
+            if len(data) < size:
+                time.sleep(0.005)
+
+        if not self._is_matched:
+            # at a wrong baudrate, bytes are received as noise
+            data = bytes(bytearray(random.randint(0, 255) for _ in data))
+        return data
+
+
+class MockSerialHost(object):
+    '''
+    Serial lines of a host, open_port could be given to autobaud
+    '''
+
+    def __init__(self, lines):
+        self.lines = dict((x.port, x) for x in lines)
+        self.open_counts = dict((x.port, 0) for x in lines)
+
+    @property
+    def ports(self):
+        return list(self.lines)
+
+    def open_port(self, port, baud):
+        self.open_counts[port] += 1
+        return MockSerialPort(self.lines[port], baud)
+
+    def stop(self):
+        for line in self.lines.values():
+            line.stop()
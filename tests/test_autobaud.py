@@ -0,0 +1,102 @@
+import sys
+import time
+import threading
+import unittest
+
+try:
+    from aceinna.framework.communicators.autobaud import (
+        AutobaudScheduler, has_packet)
+    from aceinna.framework.communicators import SerialPort
+    from aceinna.framework.constants import BAUDRATE_LIST
+    from aceinna.framework.utils import helper
+    from mocker.serial_port import (MockSerialHost, MockSerialLine)
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    sys.path.append('./tests')
+    from aceinna.framework.communicators.autobaud import (
+        AutobaudScheduler, has_packet)
+    from aceinna.framework.communicators import SerialPort
+    from aceinna.framework.constants import BAUDRATE_LIST
+    from aceinna.framework.utils import helper
+    from mocker.serial_port import (MockSerialHost, MockSerialLine)
+
+
+def build_host(device_index, port_count=8, device_baud=115200):
+    lines = []
+    for index in range(port_count):
+        if index == device_index:
+            lines.append(MockSerialLine(
+                'ttyUSB{0}'.format(index), 'IMU', device_baud))
+        else:
+            lines.append(MockSerialLine('ttyUSB{0}'.format(index)))
+    return MockSerialHost(lines)
+
+
+class TestAutobaud(unittest.TestCase):
+    '''
+    Test autobaud of serial ports on mock serial lines
+    '''
+
+    def setUp(self):
+        self.host = None
+
+    def tearDown(self):
+        if self.host:
+            self.host.stop()
+
+    def test_has_packet(self):
+        packet = bytes(helper.build_packet('pG'))
+        self.assertTrue(has_packet(b'\x55\x00' + packet))
+        self.assertFalse(has_packet(packet[:-1]))
+        self.assertFalse(has_packet(packet[:-1] + b'\x00'))
+
+    def test_find_device(self):
+        self.host = build_host(5)
+        communicator = SerialPort()
+        scheduler = AutobaudScheduler(
+            self.host.ports, BAUDRATE_LIST,
+            lambda serial_port: communicator.confirm_device(serial_port, None),
+            open_port=self.host.open_port)
+
+        start = time.time()
+        serial_port, baud = scheduler.run()
+        span = time.time() - start
+        serial_port.close()
+
+        self.assertEqual((serial_port.port, baud), ('ttyUSB5', 115200))
+        self.assertEqual(communicator.device.type, 'IMU')
+        self.assertTrue(span < 5, 'time to first device {0}'.format(span))
+        # sniffed at 2 baudrates and pinged once
+        self.assertEqual(self.host.open_counts['ttyUSB5'], 3)
+        # all other ports are closed
+        for line in self.host.lines.values():
+            self.assertTrue(line.lock.acquire(False))
+
+    def test_preferred_baud(self):
+        self.host = build_host(1, port_count=2, device_baud=38400)
+        communicator = SerialPort()
+        scheduler = AutobaudScheduler(
+            self.host.ports, BAUDRATE_LIST,
+            lambda serial_port: communicator.confirm_device(serial_port, None),
+            open_port=self.host.open_port,
+            preferred_bauds={'ttyUSB1': 38400})
+        serial_port, baud = scheduler.run()
+        serial_port.close()
+        self.assertEqual(baud, 38400)
+        self.assertEqual(self.host.open_counts['ttyUSB1'], 2)
+
+    def test_cancel(self):
+        self.host = build_host(-1, port_count=4)
+        scheduler = AutobaudScheduler(
+            self.host.ports, BAUDRATE_LIST, lambda serial_port: False,
+            open_port=self.host.open_port, max_workers=2)
+        timer = threading.Timer(0.5, scheduler.cancel)
+        timer.start()
+        start = time.time()
+        self.assertIsNone(scheduler.run())
+        self.assertTrue(time.time() - start < 1.5)
+        self.assertTrue(scheduler.cancelled)
+
+
+if __name__ == '__main__':
+    unittest.main()
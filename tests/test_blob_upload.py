@@ -0,0 +1,183 @@
+import os
+import sys
+import gzip
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+
+try:
+    from aceinna.framework.blob_upload import ChunkedBlobUploader
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.framework.blob_upload import ChunkedBlobUploader
+
+CHUNK_SIZE = 1024
+
+
+class FakeBlockBlobService(object):
+    '''
+    Keep blocks and block lists of blobs in memory, like a BlockBlobService.
+    Blocks left out of a committed block list are discarded. Requests raise
+    the error while failures are left.
+    '''
+
+    def __init__(self, blocks=None, failures=0, error='ConnectionError'):
+        self.blocks = blocks if blocks is not None else {}
+        self.block_lists = {}
+        self.failures = failures
+        self.error = error
+        self.put_block_ids = []
+        self._lock = threading.Lock()
+
+    def _check_failure(self):
+        with self._lock:
+            if self.failures > 0:
+                self.failures -= 1
+                raise Exception(self.error)
+
+    def put_block(self, container_name, blob_name, block, block_id):
+        self._check_failure()
+        with self._lock:
+            self.blocks[(container_name, blob_name, block_id)] = block
+            self.put_block_ids.append(block_id)
+
+    def put_block_list(self, container_name, blob_name, block_list,
+                       content_settings=None):
+        self._check_failure()
+        block_ids = [x.id for x in block_list]
+        with self._lock:
+            for key in list(self.blocks):
+                if key[0:2] == (container_name, blob_name) and \
+                        key[2] not in block_ids:
+                    del self.blocks[key]
+        self.block_lists[(container_name, blob_name)] = block_ids
+
+    def get_blob(self, container_name, blob_name):
+        return b''.join(self.blocks[(container_name, blob_name, x)]
+                        for x in self.block_lists[(container_name, blob_name)])
+
+
+class TestBlobUpload(unittest.TestCase):
+    '''
+    Test chunked upload of log file to a fake blob service
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.manifest_path = os.path.join(self.folder, 'upload_manifest.json')
+        self.log_path = os.path.join(self.folder, 's1.csv')
+        random.seed(10)
+        self.data = ''.join('{0},{1:0.4f}\n'.format(i, random.random())
+                            for i in range(2000)).encode()
+        with open(self.log_path, 'wb') as log_file:
+            log_file.write(self.data)
+        self.count = len(self.data) // CHUNK_SIZE + 1
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def create_uploader(self, service, **kwargs):
+        uploader = ChunkedBlobUploader(
+            lambda: service, self.manifest_path, chunk_size=CHUNK_SIZE, **kwargs)
+        uploader.delays = []
+        uploader.sleep = uploader.delays.append
+        return uploader
+
+    def test_upload_in_chunks(self):
+        service = FakeBlockBlobService()
+        uploader = self.create_uploader(service)
+        # only full chunks are uploaded before final
+        self.assertEqual(uploader.upload_file(
+            self.log_path, 'data', 's1.csv.gz'), self.count - 1)
+        self.assertEqual(uploader.upload_file(
+            self.log_path, 'data', 's1.csv.gz', True), self.count)
+        self.assertEqual(len(service.put_block_ids), self.count)
+
+        blob = service.get_blob('data', 's1.csv.gz')
+        self.assertEqual(gzip.decompress(blob), self.data)
+        self.assertTrue(len(blob) < len(self.data))
+        self.assertEqual(uploader.get_statistics()['chunk_bytes'], len(self.data))
+
+    def test_retry_with_backoff(self):
+        service = FakeBlockBlobService(failures=4)
+        uploader = self.create_uploader(
+            service, max_workers=1, retry_delay=1, max_retry_delay=4)
+        uploader.upload_file(self.log_path, 'data', 's1.csv.gz', True)
+        self.assertEqual(uploader.delays, [1, 2, 4, 4])
+        self.assertEqual(gzip.decompress(
+            service.get_blob('data', 's1.csv.gz')), self.data)
+
+    def test_refresh_service(self):
+        services = [FakeBlockBlobService(failures=1, error='AuthenticationFailed'),
+                    FakeBlockBlobService()]
+        created = []
+
+        def create_service():
+            created.append(services[len(created)])
+            return created[-1]
+
+        uploader = ChunkedBlobUploader(
+            create_service, self.manifest_path, chunk_size=len(self.data))
+        uploader.sleep = lambda delay: None
+        self.assertEqual(uploader.upload_file(
+            self.log_path, 'data', 's1.csv.gz', True), 1)
+        self.assertEqual(len(created), 2)
+
+    def test_resume(self):
+        # the upload is interrupted after 3 chunks
+        service = FakeBlockBlobService()
+        uploader = self.create_uploader(service, max_workers=1, max_attempts=1)
+        original_put_block = service.put_block
+
+        def put_block(*args):
+            if len(service.put_block_ids) >= 3:
+                raise Exception('ConnectionError')
+            original_put_block(*args)
+
+        service.put_block = put_block
+        self.assertEqual(uploader.upload_file(
+            self.log_path, 'data', 's1.csv.gz', True), 3)
+
+        # committed blocks are kept by blob service
+        service = FakeBlockBlobService(blocks=service.blocks)
+        uploader = self.create_uploader(service)
+        uploader.resume()
+        self.assertEqual(len(service.put_block_ids), self.count - 3)
+        self.assertNotIn('chunk-00000000', service.put_block_ids)
+        self.assertEqual(gzip.decompress(
+            service.get_blob('data', 's1.csv.gz')), self.data)
+
+        # the manifest of done upload is dropped
+        uploader = self.create_uploader(service)
+        self.assertEqual(uploader.manifest.entries, {})
+
+    def test_failed_middle_chunk(self):
+        # chunk 2 fails, the chunks after it are put but not committed
+        service = FakeBlockBlobService()
+        uploader = self.create_uploader(service, max_workers=1, max_attempts=1)
+        original_put_block = service.put_block
+
+        def put_block(container_name, blob_name, block, block_id):
+            if block_id == 'chunk-00000002':
+                raise Exception('ConnectionError')
+            original_put_block(container_name, blob_name, block, block_id)
+
+        service.put_block = put_block
+        self.assertEqual(uploader.upload_file(
+            self.log_path, 'data', 's1.csv.gz', True), 2)
+        self.assertEqual(len(service.blocks), 2)
+        self.assertEqual(uploader.manifest.entries[self.log_path]['uploaded'],
+                         [0, 1])
+
+        service.put_block = original_put_block
+        del service.put_block_ids[:]
+        uploader.resume()
+        self.assertEqual(len(service.put_block_ids), self.count - 2)
+        self.assertEqual(gzip.decompress(
+            service.get_blob('data', 's1.csv.gz')), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
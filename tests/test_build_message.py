@@ -76,5 +76,25 @@ class TestDMUPacketMessage(unittest.TestCase):
         self.assertEqual(msg, expect_msg, 'TS Message is matched')
 
 
+class TestEthernetPacketMessage(unittest.TestCase):
+    '''
+    Test Ethernet Packet Message
+    1. build_ethernet_frame is same as build_ethernet_packet
+    '''
+
+    def test_build_ethernet_frame(self):
+        dst_mac = bytes([0x04, 0, 0, 0, 0, 0x04])
+        src_mac = bytes([0x02, 0, 0, 0, 0, 0x0a])
+        for message_bytes in [[], list(range(20)), list(range(256)) * 4]:
+            for use_length_as_protocol in [True, False]:
+                command = helper.build_ethernet_packet(
+                    dst_mac, src_mac, b'\x02\x0b', message_bytes,
+                    use_length_as_protocol=use_length_as_protocol)
+                frame = helper.build_ethernet_frame(
+                    dst_mac + src_mac, b'\x02\x0b', bytes(message_bytes),
+                    use_length_as_protocol)
+                self.assertEqual(frame, command.actual_command)
+
+
 if __name__ == '__main__':
     unittest.main()
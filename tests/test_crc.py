@@ -0,0 +1,41 @@
+import sys
+import unittest
+
+try:
+    from aceinna.framework.utils import helper
+    from aceinna.framework.utils.crc import (
+        calc_crc16, calc_crc16_table, calc_crc16_bytes, check_crc16)
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.framework.utils import helper
+    from aceinna.framework.utils.crc import (
+        calc_crc16, calc_crc16_table, calc_crc16_bytes, check_crc16)
+
+
+class TestCRC16(unittest.TestCase):
+    '''
+    Test CRC-16 CCITT
+    '''
+
+    def test_known_packets(self):
+        # pG, gA from the command tests
+        self.assertEqual(calc_crc16_bytes([112, 71, 0]), [93, 95])
+        self.assertEqual(calc_crc16_bytes(b'gA\x00'), [49, 10])
+
+    def test_input_types(self):
+        data = bytes(bytearray(range(256))) * 3
+        expected = calc_crc16_table(list(bytearray(data)))
+        self.assertEqual(calc_crc16(data), expected)
+        self.assertEqual(calc_crc16(bytearray(data)), expected)
+        self.assertEqual(calc_crc16(memoryview(data)[0:]), expected)
+        self.assertEqual(calc_crc16(list(bytearray(data))), expected)
+        self.assertEqual(calc_crc16_table(memoryview(data)), expected)
+
+    def test_check_crc(self):
+        packet = helper.build_packet('gP', [2, 0, 0, 0])
+        self.assertTrue(check_crc16(packet[2:-2], packet[-2], packet[-1]))
+        self.assertFalse(check_crc16(packet[2:-2], packet[-1], packet[-2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
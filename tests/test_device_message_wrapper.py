@@ -2,13 +2,16 @@ import os
 import sys
 import json
 import time
+import threading
 import unittest
 
 try:
+    from aceinna.core.packet_statistics import PacketStatistics
     from aceinna.devices.message_center import DeviceMessageCenter
     from aceinna.devices.parser_manager import ParserManager
     from aceinna.framework.utils import helper
     from aceinna.devices.decorator import with_device_message
+    from aceinna.devices.dmu import dmu_helper
     from aceinna.devices.parsers.open_field_parser import (
         decode_value, encode_value)
     from mocker.communicator import MockCommunicator
@@ -17,10 +20,12 @@ except:  # pylint: disable=bare-except
     print('load package from local')
     sys.path.append('./src')
     # sys.path.append('./tests')
+    from aceinna.core.packet_statistics import PacketStatistics
     from aceinna.devices.message_center import DeviceMessageCenter
     from aceinna.devices.parser_manager import ParserManager
     from aceinna.framework.utils import helper
     from aceinna.devices.decorator import with_device_message
+    from aceinna.devices.dmu import dmu_helper
     from aceinna.devices.parsers.open_field_parser import (
         decode_value, encode_value)
     from mocker.communicator import MockCommunicator
@@ -38,15 +43,23 @@ APP_FILE_PATH = os.path.join(
 PROPERTIES = None
 with open(APP_FILE_PATH) as json_data:
     PROPERTIES = json.load(json_data)
+DMU_APP_FILE_PATH = os.path.join(
+    os.getcwd(), 'src', 'aceinna', 'setting', 'dmu', 'dmu.json')
+with open(DMU_APP_FILE_PATH) as json_data:
+    DMU_PROPERTIES = json.load(json_data)
+INS401_APP_FILE_PATH = os.path.join(
+    os.getcwd(), 'src', 'aceinna', 'setting', 'INS401', 'RTK_INS', 'ins401.json')
 
 
-def setup_message_center():
+def setup_message_center(pipeline_window=1, parse_batch_size=1):
     global MESSAGE_CENTER
     global MOCK_COMMUNICATOR
 
     MOCK_COMMUNICATOR = MockCommunicator(options={'device': DEVICE_TYPE})
 
-    MESSAGE_CENTER = DeviceMessageCenter(MOCK_COMMUNICATOR)
+    MESSAGE_CENTER = DeviceMessageCenter(
+        MOCK_COMMUNICATOR, pipeline_window=pipeline_window)
+    MESSAGE_CENTER.set_parse_batch_size(parse_batch_size)
     parser = ParserManager.build(
         DEVICE_TYPE, 'uart', PROPERTIES)
     MESSAGE_CENTER.set_parser(parser)
@@ -100,6 +113,20 @@ def send_get_version_timeout_command():
     return result
 
 
+@with_device_message
+def send_pipelined_commands():
+    messages = [
+        MESSAGE_CENTER.build(command=helper.build_input_packet('pG')),
+        MESSAGE_CENTER.build(command=helper.build_input_packet(
+            'gP', properties=PROPERTIES, param=3)),
+        MESSAGE_CENTER.build(command=helper.build_input_packet('gA')),
+        MESSAGE_CENTER.build(command=helper.build_input_packet(
+            'gP', properties=PROPERTIES, param=4))
+    ]
+    results = yield messages
+    return results
+
+
 @with_device_message
 def send_invalid_response_message():
     command_line = helper.build_input_packet('NA')
@@ -204,6 +231,121 @@ class TestDeviceMessageWrapper(unittest.TestCase):
                          'Got result after timeout')
         close_message_center()
 
+    def test_concurrent_messages(self):
+        setup_message_center()
+
+        results = {}
+
+        def send_in_thread(name, func):
+            results[name] = func()
+
+        threads = [
+            threading.Thread(target=send_in_thread,
+                             args=('pG', send_ping_command)),
+            threading.Thread(target=send_in_thread,
+                             args=('gA', send_get_all_parameters_command))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        command_result = [
+            results['pG']['packet_type'], results['pG']['error'],
+            results['gA']['packet_type'], results['gA']['error']
+        ]
+        expect_result = ['pG', False, 'gA', False]
+        self.assertEqual(command_result, expect_result,
+                         'Got result of concurrent messages')
+        close_message_center()
+
+    def test_pipelined_messages(self):
+        setup_message_center(pipeline_window=4)
+        self.assertEqual(MESSAGE_CENTER.pipeline_window, 4)
+
+        results = send_pipelined_commands()
+        command_result = [(item['packet_type'], item['error'])
+                          for item in results]
+        expect_result = [('pG', False), ('gP', False),
+                         ('gA', False), ('gP', False)]
+        self.assertEqual(command_result, expect_result,
+                         'Got result of pipelined messages')
+        self.assertEqual(results[1]['data']['paramId'], 3)
+        self.assertEqual(results[3]['data']['paramId'], 4)
+
+        close_message_center()
+
+    def test_stray_response_message(self):
+        communicator = MockCommunicator(options={'device': DEVICE_TYPE})
+        message_center = DeviceMessageCenter(communicator, pipeline_window=4)
+        message_center.set_parser(ParserManager.build(
+            DEVICE_TYPE, 'uart', PROPERTIES))
+
+        message = message_center.build(command=helper.build_input_packet(
+            'gP', properties=PROPERTIES, param=3))
+        message.send()
+        # a late response of another command is dropped
+        message_center.on_command_receive(
+            packet_type='gA', data=[],
+            raw=helper.build_packet('gA'))
+        self.assertFalse(message.get_finished())
+
+        message_center.on_command_receive(
+            packet_type='gP', data={'paramId': 3},
+            raw=helper.build_packet('gP', [3, 0, 0, 0]))
+        self.assertTrue(message.get_finished())
+        self.assertEqual(message.result['data']['paramId'], 3)
+        communicator.close()
+
+    def test_unsupported_pipeline_window(self):
+        # GP response of DMU is renamed to the requested packet type, it
+        # could not be matched in pipeline, so commands are run one by one
+        communicator = MockCommunicator(options={'device': 'DMU'})
+        message_center = DeviceMessageCenter(communicator, pipeline_window=4)
+        message_center.set_parser(ParserManager.build(
+            'DMU', 'uart', DMU_PROPERTIES))
+        message_center.setup()
+        self.assertEqual(message_center.pipeline_window, 1)
+        # INS401 commands start with the MAC header, not 0x5555
+        with open(INS401_APP_FILE_PATH) as json_data:
+            ins401_message_center = DeviceMessageCenter(
+                None, pipeline_window=4)
+            ins401_message_center.set_parser(ParserManager.build(
+                'INS401', 'ethernet', json.load(json_data)))
+        self.assertEqual(ins401_message_center.pipeline_window, 1)
+
+        @with_device_message
+        def send_get_id_command():
+            command_line = dmu_helper.build_packet('GP', [0x49, 0x44])
+            result = yield message_center.build(command=command_line)
+            return result
+
+        result = send_get_id_command()
+        message_center.stop()
+        communicator.close()
+        # the mock DMU is streaming, the packet finishes GP is not always ID
+        self.assertIsNone(result['error'])
+
+    def test_batched_parse_messages(self):
+        setup_message_center(parse_batch_size=8)
+
+        ping_result = send_ping_command()
+        version_result = send_get_version_command()
+        command_result = [ping_result['packet_type'], ping_result['error'],
+                          version_result['packet_type'], version_result['error']]
+        expect_result = ['pG', False, 'gV', False]
+        self.assertEqual(command_result, expect_result,
+                         'Got result of batched parse')
+
+        time.sleep(0.5)
+        statistics = PacketStatistics()
+        statistics.add_parse_latency(MESSAGE_CENTER.latency)
+        latency = statistics.get_parse_latency_result()['uart']
+        self.assertTrue(latency['count'] > 0)
+        self.assertTrue(latency['max'] >= latency['average'] >= 0)
+
+        close_message_center()
+
     def test_invalid_response_message(self):
         setup_message_center()
 
@@ -74,6 +74,41 @@ class TestOpenIMUProvider(unittest.TestCase):
         expect_result = 'success'
         self.assertEqual(method_result, expect_result)
 
+    def test_get_statistics(self):
+        provider = build_provider()
+        statistics_result = provider.get_statistics()
+        close_provider(provider)
+
+        method_result = [statistics_result['packetType'],
+                         'uart' in statistics_result['data']['parseLatency']]
+        expect_result = ['statistics', True]
+        self.assertEqual(method_result, expect_result)
+
+    def test_set_params_stop_at_failure(self):
+        provider = build_provider()
+        written_params = []
+        device_write = provider.communicator.write
+
+        def write_without_update_param(data, is_flush=False):
+            # the device does not response uP commands
+            if bytes(data[2:4]) == b'uP':
+                written_params.append(data)
+                return
+            device_write(data, is_flush)
+
+        provider.communicator.write = write_without_update_param
+        update_params = [
+            {'paramId': 1, 'value': 1},
+            {'paramId': 2, 'value': 2},
+            {'paramId': 3, 'value': 3},
+        ]
+        set_params_result = provider.set_params(update_params)
+        close_provider(provider)
+
+        method_result = [set_params_result['packetType'], len(written_params)]
+        expect_result = ['error', 1]
+        self.assertEqual(method_result, expect_result)
+
     def test_set_param(self):
         provider = build_provider()
         set_param_result = provider.set_param({'paramId': 1, 'value': 1})
@@ -0,0 +1,120 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from collections import namedtuple
+
+try:
+    from aceinna.framework.communicators import SerialPort
+    from aceinna.framework.communicators.discovery_cache import (
+        DiscoveryCache, build_port_key)
+    from mocker.serial_port import (MockSerialHost, MockSerialLine)
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    sys.path.append('./tests')
+    from aceinna.framework.communicators import SerialPort
+    from aceinna.framework.communicators.discovery_cache import (
+        DiscoveryCache, build_port_key)
+    from mocker.serial_port import (MockSerialHost, MockSerialLine)
+
+PortInfo = namedtuple(
+    'PortInfo', ['device', 'vid', 'pid', 'serial_number', 'location'])
+
+PORT_INFOS = [
+    PortInfo('ttyUSB0', 0x0403, 0x6011, 'FT4X7ABC', '1-1.2:1.0'),
+    PortInfo('ttyUSB1', 0x0403, 0x6011, 'FT4X7ABC', '1-1.2:1.1'),
+    PortInfo('ttyUSB2', 0x0403, 0x6011, 'FT4X7ABC', '1-1.2:1.2'),
+    PortInfo('ttyACM0', 0x2fe3, 0x0100, None, '1-1.3:1.0'),
+    PortInfo('ttyS0', None, None, None, None)
+]
+DEVICE_PORT = 'ttyUSB1'
+
+
+class TestDiscoveryCache(unittest.TestCase):
+    '''
+    Test cached devices of ports are validated before autobaud
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.host = None
+
+    def tearDown(self):
+        if self.host:
+            self.host.stop()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def build_host(self, device_name='IMU'):
+        if self.host:
+            self.host.stop()
+        self.host = MockSerialHost([
+            MockSerialLine(x.device, device_name, 57600)
+            if x.device == DEVICE_PORT else MockSerialLine(x.device)
+            for x in PORT_INFOS])
+
+    def build_communicator(self):
+        communicator = SerialPort()
+        communicator.connection_file_path = os.path.join(
+            self.folder, 'connection.json')
+        communicator.discovery_cache = DiscoveryCache(
+            os.path.join(self.folder, 'discovery.json'))
+        communicator.port_opener = self.host.open_port
+        communicator.port_keys = dict(
+            (x.device, build_port_key(x)) for x in PORT_INFOS)
+        return communicator
+
+    def test_port_key(self):
+        keys = [build_port_key(x) for x in PORT_INFOS]
+        self.assertEqual(keys[0], 'usb:0403:6011:FT4X7ABC:1.0')
+        self.assertEqual(keys[3], 'usb:2FE3:0100@1-1.3:1.0')
+        self.assertEqual(keys[4], 'port:ttyS0')
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_validate_cached_device(self):
+        self.build_host()
+        communicator = self.build_communicator()
+        self.assertEqual(communicator.try_cached_devices(self.host.ports),
+                         self.host.ports)
+        self.assertTrue(communicator.autobaud(self.host.ports))
+        communicator.serial_port.close()
+
+        with open(os.path.join(self.folder, 'discovery.json')) as cache_file:
+            cached = json.load(cache_file)
+        cached_device = cached['devices']['usb:0403:6011:FT4X7ABC:1.1']
+        self.assertEqual(cached['last'], 'usb:0403:6011:FT4X7ABC:1.1')
+        self.assertEqual(cached_device['baud'], 57600)
+        self.assertEqual(cached_device['device_type'], 'IMU')
+        self.assertTrue(cached_device['fingerprint'].startswith('OpenIMU|'))
+
+        # a single ping at the cached baud after restart
+        self.build_host()
+        communicator = self.build_communicator()
+        scan_ports = communicator.try_cached_devices(self.host.ports)
+        self.assertIsNotNone(communicator.device)
+        self.assertNotIn(DEVICE_PORT, scan_ports)
+        self.assertEqual(communicator.serial_port.port, DEVICE_PORT)
+        self.assertEqual(sum(self.host.open_counts.values()), 1)
+        communicator.serial_port.close()
+
+    def test_changed_device(self):
+        self.build_host()
+        communicator = self.build_communicator()
+        communicator.autobaud(self.host.ports)
+        communicator.serial_port.close()
+
+        # another device is linked to the port at same baud
+        self.build_host('RTK')
+        communicator = self.build_communicator()
+        communicator.discovery_cache.update(
+            'usb:0403:6011:FT4X7ABC:1.1', DEVICE_PORT, 57600, 'RTK',
+            'OpenRTK|old')
+        scan_ports = communicator.try_cached_devices(self.host.ports)
+        self.assertIsNone(communicator.device)
+        self.assertEqual(scan_ports[0], DEVICE_PORT)
+        self.assertEqual(sorted(scan_ports), sorted(self.host.ports))
+
+
+if __name__ == '__main__':
+    unittest.main()
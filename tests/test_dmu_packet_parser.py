@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import random
+import struct
+import unittest
+
+try:
+    from aceinna.devices.parsers import dum_packet_parser
+    from aceinna.devices.parsers.dum_packet_parser import (
+        compile_scaling, build_continuous_decoders, common_continuous_parser)
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.devices.parsers import dum_packet_parser
+    from aceinna.devices.parsers.dum_packet_parser import (
+        compile_scaling, build_continuous_decoders, common_continuous_parser)
+
+APP_FILE_PATH = os.path.join(
+    os.getcwd(), 'src', 'aceinna', 'setting', 'dmu', 'dmu.json')
+with open(APP_FILE_PATH) as json_data:
+    PROPERTIES = json.load(json_data)
+
+TYPE_FORMATS = {'int16': 'h', 'uint16': 'H', 'int32': 'i', 'uint32': 'I'}
+
+
+def build_payload(output_packet):
+    values = []
+    pack_fmt = '>'
+    for value in output_packet['payload']:
+        pack_fmt += TYPE_FORMATS[value['type']]
+        values.append(random.randint(0, 30000))
+    return list(bytearray(struct.pack(pack_fmt, *values))), values
+
+
+def reset_time_status():
+    dum_packet_parser.DMU_PACKET_STATUS.PREV_PACKET_TYPE = ''
+    dum_packet_parser.DMU_PACKET_STATUS.PREV_TIME_FIELD_VALUE = ''
+    dum_packet_parser.DMU_PACKET_STATUS.PRE_ELAPSED_TIME_SEC = 0.0
+
+
+class TestDmuPacketParser(unittest.TestCase):
+    '''
+    Test precompiled decoders of DMU output packets
+    '''
+
+    def test_compile_scaling(self):
+        self.assertEqual(compile_scaling('20*9.80665/65536'),
+                         20*9.80665/65536)
+        self.assertEqual(compile_scaling(' -(2**3) + 1 '), -7.0)
+        self.assertEqual(compile_scaling(0.5), 0.5)
+        for expression in ['__import__("os")', 'x * 2', '1/0', '[1]', 'True']:
+            with self.assertRaises(ValueError):
+                compile_scaling(expression)
+
+    def test_decode_packets(self):
+        random.seed(10)
+        scaling = PROPERTIES['scaling']
+        output_packets = PROPERTIES['userMessages']['outputPackets']
+        decoders = build_continuous_decoders(output_packets, scaling)
+        for output_packet in output_packets:
+            decoder = decoders[output_packet['name']]
+            payload, values = build_payload(output_packet)
+            reset_time_status()
+            data = common_continuous_parser(
+                payload, output_packet, scaling, decoder)
+            self.assertEqual(list(data), [x['name']
+                                          for x in output_packet['payload']])
+
+            for idx, item in enumerate(output_packet['payload']):
+                if idx == decoder.time_index:
+                    # elapsed time of the first packet
+                    self.assertEqual(data[item['name']], 1.0)
+                elif 'scaling' in item:
+                    self.assertAlmostEqual(
+                        data[item['name']],
+                        values[idx] * compile_scaling(scaling[item['scaling']]))
+                else:
+                    self.assertEqual(data[item['name']], values[idx])
+
+        self.assertEqual(decoders['S1'].time_index, 10)
+        self.assertEqual(decoders['S0'].factors[0], 20*9.80665/65536)
+
+    def test_invalid_scaling(self):
+        output_packet = {'name': 'X1', 'payload': [
+            {'type': 'int16', 'name': 'x', 'scaling': 'unknown'}]}
+        decoders = build_continuous_decoders([output_packet], {})
+        self.assertIsNone(common_continuous_parser(
+            [0, 1], output_packet, {}, decoders['X1']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+
+try:
+    from aceinna.core.packet_statistics import PacketStatistics
+    from aceinna.framework.context import APP_CONTEXT
+    from aceinna.framework.file_storage import (
+        FileLoger, build_row_formatter, LOG_FLUSH_INTERVAL)
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.core.packet_statistics import PacketStatistics
+    from aceinna.framework.context import APP_CONTEXT
+    from aceinna.framework.file_storage import (
+        FileLoger, build_row_formatter, LOG_FLUSH_INTERVAL)
+
+SETTING_PATH = os.path.join(os.getcwd(), 'src', 'aceinna', 'setting')
+IMU_SETTING_PATH = os.path.join(
+    SETTING_PATH, 'OpenIMU300ZI', 'IMU', 'openimu.json')
+SAMPLE_VALUES = {
+    'double': 31.123456789012,
+    'float': -0.123456,
+    'uint8': 7,
+    'int16': -300,
+    'uint16': 2100,
+    'int32': -70000,
+    'uint32': 345600000,
+    'uint64': 12345678901,
+}
+
+
+def legacy_format(output_packet, data, with_header):
+    '''
+    Header and row of CSV log formatted by FileLoger.log before row
+    formatters were built
+    '''
+    fields = [field['name'] for field in output_packet['payload']]
+    header = ''
+    if with_header:
+        labels = ''
+        for i, (k, v) in enumerate(data.items()):
+            if not fields.__contains__(k):
+                continue
+            data_str = output_packet['payload'][i]['name']
+            unit_str = output_packet['payload'][i]['unit']
+            if unit_str == '':
+                labels = labels + '{0:s},'.format(data_str)
+            else:
+                labels = labels + \
+                    '{0:s} ({1:s}),'.format(data_str, unit_str)
+        header = labels[:-1] + '\n'
+
+    write_str = ''
+    for i, (k, v) in enumerate(data.items()):
+        if not fields.__contains__(k):
+            continue
+        output_packet_type = output_packet['payload'][i]['type']
+        if output_packet['payload'][i].__contains__('scaling'):
+            write_str += '{0},'.format(v)
+        elif output_packet_type in ['uint32', 'int32', 'uint16', 'int16',
+                                    'uint64', 'int64']:
+            write_str += '{0},'.format(v)
+        elif output_packet_type == 'double':
+            write_str += '{0:0.8f},'.format(v)
+        elif output_packet_type == 'float':
+            write_str += '{0:0.4f},'.format(v)
+        elif output_packet_type == 'uint8':
+            write_str += '{0:d},'.format(v)
+        elif output_packet_type in ['uchar', 'char', 'string']:
+            write_str += '{:},'.format(v)
+        else:
+            write_str += '{0:3.5f},'.format(v)
+    return header + write_str[:-1] + '\n'
+
+
+def build_data(output_packet, offset=0):
+    data = OrderedDict()
+    for value in output_packet['payload']:
+        sample = SAMPLE_VALUES[value['type']]
+        if 'scaling' in value:
+            sample = sample * 0.5
+        data[value['name']] = sample + offset
+    return data
+
+
+def load_output_packets(file_path):
+    with open(file_path) as json_data:
+        properties = json.load(json_data)
+    return properties.get('userMessages', {}).get('outputPackets', [])
+
+
+class FakeLogFile(object):
+    def __init__(self):
+        self.data = ''
+        self.flushes = 0
+
+    def write(self, data):
+        self.data += data
+
+    def flush(self):
+        self.flushes += 1
+
+
+class TestFileStorage(unittest.TestCase):
+    '''
+    Test CSV rows of data log, and the statistics of data log
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_row_formatter(self):
+        setting_files = glob.glob(
+            os.path.join(SETTING_PATH, '**', '*.json'), recursive=True)
+        packet_count = 0
+        for setting_file in setting_files:
+            for output_packet in load_output_packets(setting_file):
+                if len(output_packet.get('payload', [])) == 0:
+                    continue
+                header, format_row = build_row_formatter(output_packet)
+                for offset in [0, 1]:
+                    data = build_data(output_packet, offset)
+                    self.assertEqual(
+                        header + format_row(data),
+                        legacy_format(output_packet, data, True),
+                        '{0} of {1}'.format(output_packet['name'], setting_file))
+                packet_count += 1
+        self.assertTrue(packet_count > 10)
+
+    def test_log_rows(self):
+        with open(IMU_SETTING_PATH) as json_data:
+            properties = json.load(json_data)
+        output_packet = properties['userMessages']['outputPackets'][0]
+        packet_type = output_packet['name']
+
+        file_logger = FileLoger(properties)
+        file_logger.root_folder = self.folder
+        self.assertEqual(file_logger.start_user_log('test'), 0)
+        log_file_path = file_logger.log_files_obj[packet_type].name
+
+        expect_rows = ''
+        for i in range(100):
+            data = build_data(output_packet, i)
+            file_logger.append(packet_type, data)
+            expect_rows += legacy_format(output_packet, data, i == 0)
+        file_logger.stop_user_log()
+        self.assertTrue(APP_CONTEXT.log_sink.drain(5))
+
+        with open(log_file_path) as log_file:
+            self.assertEqual(log_file.read(), expect_rows)
+
+        statistics = PacketStatistics()
+        result = statistics.get_data_log_result()['test']
+        self.assertEqual(result['rows'], 100)
+        self.assertEqual(result['bytes'], len(expect_rows))
+        self.assertTrue(result['rows_per_second'] > 0)
+        # rates do not drop after log is stopped
+        time.sleep(0.1)
+        self.assertEqual(statistics.get_data_log_result()['test'], result)
+
+    def test_flush_interval(self):
+        with open(IMU_SETTING_PATH) as json_data:
+            properties = json.load(json_data)
+        output_packet = properties['userMessages']['outputPackets'][0]
+        packet_type = output_packet['name']
+
+        file_logger = FileLoger(properties)
+        file_logger.log_file_rows[packet_type] = 0
+        file_logger.msgs_need_to_log.append(packet_type)
+        log_file = FakeLogFile()
+        file_logger.log_files_obj[packet_type] = log_file
+
+        # rows are flushed once in a flush interval
+        file_logger.last_flush_time = time.time()
+        for i in range(10):
+            file_logger.append(packet_type, build_data(output_packet, i))
+        self.assertEqual(log_file.flushes, 0)
+
+        file_logger.last_flush_time = time.time() - LOG_FLUSH_INTERVAL
+        file_logger.append(packet_type, build_data(output_packet))
+        file_logger.append(packet_type, build_data(output_packet))
+        self.assertEqual(log_file.flushes, 1)
+        self.assertEqual(log_file.data.count('\n'), 13)
+
+        file_logger.flush_log_files(True)
+        self.assertEqual(log_file.flushes, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
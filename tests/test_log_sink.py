@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+try:
+    from aceinna.framework.log_sink import (
+        LogSink, BLOCK, DROP_OLDEST, DROP_NEWEST)
+    from aceinna.core.packet_statistics import PacketStatistics
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.framework.log_sink import (
+        LogSink, BLOCK, DROP_OLDEST, DROP_NEWEST)
+    from aceinna.core.packet_statistics import PacketStatistics
+
+
+class TestLogSink(unittest.TestCase):
+    '''
+    Test log files written by the writer thread of log sink
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def write_stalled(self, sink, count, stall=None):
+        # the writer thread is stalled until all writes are put
+        file_path = os.path.join(self.folder, 'user.bin')
+        log_file = sink.open(file_path)
+        stall = stall or threading.Event()
+        log_file.write(b'')
+        sink.put(StalledFile(stall), 0, b'')
+        time.sleep(0.1)
+        for i in range(count):
+            log_file.write(bytearray([i]))
+        log_file.close()
+        stall.set()
+        self.assertTrue(sink.drain(5))
+        with open(file_path, 'rb') as written:
+            return written.read()
+
+    def test_write_in_order(self):
+        sink = LogSink('test')
+        text_path = os.path.join(self.folder, 'data.csv')
+        text_file = sink.open(text_path, 'w')
+        binary_path = os.path.join(self.folder, 'user.bin')
+        binary_file = sink.open(binary_path)
+        data = bytearray()
+        for i in range(1000):
+            text_file.write('{0}\n'.format(i))
+            chunk = bytearray([i % 256] * 10)
+            binary_file.write(chunk)
+            data.extend(chunk)
+            # the buffer is copied when it is queued
+            chunk[0] = 0xFF
+        text_file.close()
+        binary_file.close()
+        self.assertTrue(sink.drain(5))
+        self.assertRaises(ValueError, text_file.write, '1')
+
+        with open(text_path) as written:
+            self.assertEqual(written.read(), ''.join(
+                '{0}\n'.format(i) for i in range(1000)))
+        with open(binary_path, 'rb') as written:
+            self.assertEqual(written.read(), bytes(data))
+        self.assertEqual(sink.get_statistics()['written'], 2000)
+        self.assertEqual(sink.get_statistics()['dropped'], 0)
+
+    def test_drop_newest(self):
+        sink = LogSink('test', max_size=10, policy=DROP_NEWEST)
+        self.assertEqual(self.write_stalled(sink, 20), bytes(bytearray(range(10))))
+        self.assertEqual(sink.get_statistics()['dropped'], 10)
+
+    def test_drop_oldest(self):
+        sink = LogSink('test', max_size=10, policy=DROP_OLDEST)
+        self.assertEqual(self.write_stalled(sink, 20),
+                         bytes(bytearray(range(10, 20))))
+        self.assertEqual(sink.get_statistics()['dropped'], 10)
+
+    def test_block(self):
+        sink = LogSink('test', max_size=10, policy=BLOCK)
+        stall = threading.Event()
+        thread = threading.Thread(
+            target=self.write_stalled, args=(sink, 20, stall))
+        thread.start()
+        time.sleep(0.3)
+        # writes are blocked by the full queue
+        self.assertEqual(sink.get_statistics()['depth'], 10)
+        self.assertTrue(thread.is_alive())
+        stall.set()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(sink.get_statistics()['written'], 22)
+        self.assertEqual(sink.get_statistics()['dropped'], 0)
+
+    def test_statistics(self):
+        sink = LogSink('test_statistics')
+        statistics = PacketStatistics()
+        statistics.add_log_sink(sink)
+        self.assertEqual(
+            statistics.get_log_sink_result()['test_statistics']['depth'], 0)
+        self.assertRaises(ValueError, sink.set_policy, 'unknown')
+
+
+class StalledFile(object):
+    '''
+    A file blocks write until the event is set
+    '''
+
+    def __init__(self, event):
+        self.event = event
+
+    def write(self, data):
+        self.event.wait(5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import random
+import unittest
+
+try:
+    from aceinna.devices.parser_manager import ParserManager
+    from aceinna.devices.parsers.open_message_parser import (
+        UartMessageParser, BufferedUartMessageParser)
+    from aceinna.framework.utils import helper
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.devices.parser_manager import ParserManager
+    from aceinna.devices.parsers.open_message_parser import (
+        UartMessageParser, BufferedUartMessageParser)
+    from aceinna.framework.utils import helper
+
+APP_FILE_PATH = os.path.join(
+    os.getcwd(), 'src', 'aceinna', 'setting', 'OpenIMU300ZI', 'IMU', 'openimu.json')
+PROPERTIES = None
+with open(APP_FILE_PATH) as json_data:
+    PROPERTIES = json.load(json_data)
+
+RAW_FOLDER = os.path.join(os.path.dirname(__file__), 'mocker', 'devices')
+
+
+def read_raw(name):
+    with open(os.path.join(RAW_FOLDER, name), 'rb') as raw_file:
+        return raw_file.read()
+
+
+def build_stream():
+    ping_response = bytearray(helper.build_packet(
+        'pG', list(bytearray(b'OpenIMU300ZI 5020-3885-02'))))
+    broken_response = bytearray(helper.build_packet('gV'))
+    broken_response[-1] ^= 0xFF
+    return read_raw('z1.raw')[:20000] + bytes(ping_response) + \
+        b'\x00\x55\x01' + bytes(broken_response) + read_raw('s1.raw')[:20000]
+
+
+def collect_events(parser, stream, chunk_sizes):
+    events = []
+    parser.on('continuous_message', lambda **kwargs: events.append(
+        ('continuous_message', kwargs['packet_type'], kwargs['data'])))
+    parser.on('command', lambda **kwargs: events.append(
+        ('command', kwargs['packet_type'], kwargs['data'],
+         kwargs['error'], list(kwargs['raw']))))
+    parser.on('crc_failure', lambda **kwargs: events.append(
+        ('crc_failure', kwargs['packet_type'])))
+
+    index = 0
+    for size in chunk_sizes:
+        parser.analyse(stream[index:index+size])
+        index += size
+        if index >= len(stream):
+            break
+    return events
+
+
+class TestBufferedUartMessageParser(unittest.TestCase):
+    '''
+    Test buffer based uart framer
+    '''
+
+    def test_same_events_as_byte_parser(self):
+        stream = build_stream()
+        random.seed(1)
+        chunk_sizes = [random.randint(1, 1000) for _ in range(len(stream))]
+
+        expected = collect_events(
+            UartMessageParser(PROPERTIES), stream, [1000] * len(stream))
+        actual = collect_events(
+            BufferedUartMessageParser(PROPERTIES), stream, chunk_sizes)
+
+        self.assertTrue(len(expected) > 100)
+        self.assertEqual(actual, expected)
+        self.assertTrue(('crc_failure', 'gV') in actual)
+
+    def test_bounded_buffer(self):
+        parser = BufferedUartMessageParser(PROPERTIES)
+        parser.analyse(bytes(bytearray(range(0x56, 0xFF))) * 100)
+        self.assertEqual(len(parser._buffer), 0)
+        parser.analyse(b'\x55')
+        self.assertEqual(len(parser._buffer), 1)
+
+    def test_build_from_parser_manager(self):
+        parser = ParserManager.build(
+            'IMU', 'uart', PROPERTIES, use_buffer_framer=True)
+        self.assertIsInstance(parser, BufferedUartMessageParser)
+        parser = ParserManager.build('IMU', 'uart', PROPERTIES)
+        self.assertNotIsInstance(parser, BufferedUartMessageParser)
+
+
+if __name__ == '__main__':
+    unittest.main()
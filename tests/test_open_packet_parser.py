@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import math
+import struct
+import unittest
+
+try:
+    from aceinna.devices.parsers.open_packet_parser import (
+        ContinuousPacketDecoder, build_continuous_decoders,
+        decode_continuous_packet, common_continuous_parser)
+    from aceinna.devices.parsers.open_message_parser import UartMessageParser
+    from aceinna.framework.utils import helper
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.devices.parsers.open_packet_parser import (
+        ContinuousPacketDecoder, build_continuous_decoders,
+        decode_continuous_packet, common_continuous_parser)
+    from aceinna.devices.parsers.open_message_parser import UartMessageParser
+    from aceinna.framework.utils import helper
+
+APP_FILE_PATH = os.path.join(
+    os.getcwd(), 'src', 'aceinna', 'setting', 'OpenIMU300ZI', 'IMU', 'openimu.json')
+PROPERTIES = None
+with open(APP_FILE_PATH) as json_data:
+    PROPERTIES = json.load(json_data)
+
+Z1_RAW_PATH = os.path.join(
+    os.path.dirname(__file__), 'mocker', 'devices', 'z1.raw')
+
+LIST_PACKET = {
+    'name': 'y1',
+    'isList': 1,
+    'payload': [
+        {'type': 'uint16', 'name': 'id'},
+        {'type': 'float', 'name': 'value'}
+    ]
+}
+
+
+def find_output_packet(name):
+    return next(x for x in PROPERTIES['userMessages']['outputPackets']
+                if x['name'] == name)
+
+
+def read_z1_frames():
+    frames = []
+    with open(Z1_RAW_PATH, 'rb') as raw_file:
+        raw_data = raw_file.read()
+
+    index = raw_data.find(b'UU')
+    while index > -1 and index + 5 <= len(raw_data):
+        payload_len = raw_data[index+4]
+        frame = raw_data[index:index+payload_len+7]
+        if len(frame) == payload_len + 7:
+            frames.append(frame)
+        index = raw_data.find(b'UU', index+payload_len+7)
+    return frames
+
+
+class TestContinuousPacketDecoder(unittest.TestCase):
+    '''
+    Test precompiled output packet decoder
+    '''
+
+    def test_decoder_layout(self):
+        decoder = ContinuousPacketDecoder(find_output_packet('z1'))
+        self.assertEqual(decoder.struct.format, '<Ifffffffff')
+        self.assertEqual(decoder.size, 40)
+        self.assertEqual(len(decoder.names), 10)
+        self.assertEqual(decoder.nan_indexes, tuple(range(1, 10)))
+        self.assertFalse(decoder.is_list)
+
+    def test_decode_recorded_z1(self):
+        frames = read_z1_frames()
+        self.assertTrue(len(frames) > 0, 'z1 frames are loaded')
+
+        decoders = build_continuous_decoders(
+            PROPERTIES['userMessages']['outputPackets'])
+        for frame in frames[:50]:
+            payload = memoryview(frame)[5:frame[4]+5]
+            data = decode_continuous_packet(payload, decoders['z1'])
+            expected = common_continuous_parser(
+                list(payload), find_output_packet('z1'))
+            self.assertEqual(data, expected)
+
+    def test_filter_nan(self):
+        decoder = ContinuousPacketDecoder(find_output_packet('z1'))
+        payload = struct.pack('<Ifffffffff', 1, float('nan'), *([1.0] * 8))
+        data = decoder.unpack(memoryview(payload))
+        self.assertEqual(data['time'], 1)
+        self.assertEqual(data['xAccel'], 0)
+        self.assertFalse(any(isinstance(x, float) and math.isnan(x)
+                             for x in data.values()))
+
+    def test_decode_wrong_length(self):
+        decoder = ContinuousPacketDecoder(find_output_packet('z1'))
+        data = decode_continuous_packet(bytes(39), decoder)
+        self.assertIsNone(data)
+
+    def test_decode_list(self):
+        decoder = ContinuousPacketDecoder(LIST_PACKET)
+        payload = struct.pack('<Hf', 1, 1.5) + \
+            struct.pack('<Hf', 2, 2.5) + b'\x00'
+        data = decode_continuous_packet(memoryview(payload), decoder)
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[1]['id'], 2)
+        self.assertEqual(data[1]['value'], 2.5)
+
+
+class TestUartMessageParserDecoders(unittest.TestCase):
+    '''
+    Test output packet decoding in uart message parser
+    '''
+
+    def test_emit_continuous_message(self):
+        received = []
+        parser = UartMessageParser(PROPERTIES)
+        parser.on('continuous_message',
+                  lambda **kwargs: received.append(kwargs))
+        frames = read_z1_frames()
+        parser.analyse(b''.join(frames[:10]))
+
+        self.assertEqual(len(received), 10)
+        self.assertEqual(received[0]['packet_type'], 'z1')
+
+    def test_set_configuration_rebuild_decoders(self):
+        received = []
+        properties = json.loads(json.dumps(PROPERTIES))
+        properties['userMessages']['outputPackets'].append(LIST_PACKET)
+
+        parser = UartMessageParser(PROPERTIES)
+        parser.set_configuration(properties)
+        parser.on('continuous_message',
+                  lambda **kwargs: received.append(kwargs))
+
+        payload = list(struct.pack('<Hf', 1, 1.5))
+        parser.analyse(bytearray(helper.build_packet('y1', payload)))
+
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]['data'][0]['value'], 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import shutil
+import struct
+import tempfile
+import unittest
+
+try:
+    from aceinna.framework import packet_layout
+    from aceinna.framework.packet_layout import (
+        get_packet_layout, compile_packet_layouts, load_packet_layouts)
+    from aceinna.devices.parsers.dum_packet_parser import common_continuous_parser
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.framework import packet_layout
+    from aceinna.framework.packet_layout import (
+        get_packet_layout, compile_packet_layouts, load_packet_layouts)
+    from aceinna.devices.parsers.dum_packet_parser import common_continuous_parser
+
+OUTPUT_PACKET = {
+    'name': 's1',
+    'payload': [
+        {'type': 'uint16', 'name': 'GPS_Week'},
+        {'type': 'uint32', 'name': 'GPS_TimeOfWeek'},
+        {'type': 'int8', 'name': 'mode'},
+        {'type': 'string', 'name': 'station', 'length': '4'},
+        {'type': 'double', 'name': 'latitude'},
+        {'type': 'float', 'name': 'height', 'scaling': 'height'}
+    ]
+}
+
+
+class TestPacketLayout(unittest.TestCase):
+    '''
+    Test compile and cache of output packet layouts
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_compile_layout(self):
+        layout = get_packet_layout(OUTPUT_PACKET)
+        self.assertEqual(layout.struct.format, '<HIb4sdf')
+        self.assertEqual(layout.size, 23)
+        self.assertEqual(layout.names[3], 'station')
+        self.assertEqual(layout.scalings, (None,) * 5 + ('height',))
+        self.assertEqual(layout.nan_indexes, (4, 5))
+        self.assertTrue(layout.is_valid)
+        self.assertFalse(layout.is_list)
+
+        # packets of same definition share the layout
+        self.assertIs(get_packet_layout(json.loads(json.dumps(OUTPUT_PACKET))),
+                      layout)
+        self.assertEqual(get_packet_layout(OUTPUT_PACKET, '>').struct.format,
+                         '>HIb4sdf')
+
+        unknown = get_packet_layout({'name': 'x1', 'payload': [
+            {'type': 'uint16', 'name': 'a'}, {'type': 'ip4', 'name': 'b'},
+            {'type': 'float', 'name': 'c'}]})
+        self.assertFalse(unknown.is_valid)
+        self.assertEqual(unknown.nan_indexes, (1,))
+
+    def test_load_setting(self):
+        setting_path = os.path.join(self.folder, 'setting.json')
+        with open(setting_path, 'w') as setting_file:
+            json.dump({'userOutputPackets': [OUTPUT_PACKET]}, setting_file)
+
+        layouts = load_packet_layouts(setting_path)
+        self.assertEqual(list(layouts), ['s1'])
+
+        # the file is not loaded again until it is modified
+        load = json.load
+        json.load = None
+        try:
+            self.assertIs(load_packet_layouts(setting_path), layouts)
+        finally:
+            json.load = load
+
+        with open(setting_path, 'w') as setting_file:
+            json.dump({'userMessages': {'outputPackets': [
+                OUTPUT_PACKET, dict(OUTPUT_PACKET, name='s2')]}}, setting_file)
+        os.utime(setting_path, (0, 0))
+        self.assertEqual(sorted(load_packet_layouts(setting_path)), ['s1', 's2'])
+        self.assertEqual(len([x for x in packet_layout._SETTING_LAYOUTS
+                              if x[0] == os.path.abspath(setting_path)]), 1)
+        self.assertEqual(compile_packet_layouts(None), {})
+
+    def test_big_endian_packet(self):
+        configuration = {'name': 'A9', 'payload': [
+            {'type': 'int16', 'name': 'xAccel', 'scaling': 'accel'},
+            {'type': 'uint32', 'name': 'counter'}]}
+        payload = list(bytearray(struct.pack('>hI', -2, 70000)))
+        data = common_continuous_parser(payload, configuration, {'accel': '0.5'})
+        self.assertEqual(list(data.items()), [('xAccel', -1.0), ('counter', 70000)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import os
+import sys
+import time
+import shutil
+import socket
+import subprocess
+import unittest
+
+try:
+    from aceinna.framework.communicators import raw_socket
+    from aceinna.framework.communicators.ethernet_100base_t1 import Ethernet
+    from aceinna.framework.utils import helper
+    from aceinna.models.args import WebserverArgs
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.framework.communicators import raw_socket
+    from aceinna.framework.communicators.ethernet_100base_t1 import Ethernet
+    from aceinna.framework.utils import helper
+    from aceinna.models.args import WebserverArgs
+
+DEVICE_IFACE = 'aceveth0'
+HOST_IFACE = 'aceveth1'
+DEVICE_MAC = '02:00:00:00:00:0a'
+OTHER_MAC = '02:00:00:00:00:0b'
+HARD_CODE_MAC = '04:00:00:00:00:04'
+
+
+def can_create_veth():
+    return raw_socket.is_supported() and hasattr(os, 'geteuid') and \
+        os.geteuid() == 0 and (shutil.which('ip') is not None or
+                               os.path.exists('/usr/sbin/ip'))
+
+
+def run_ip(*args):
+    ip_path = shutil.which('ip') or '/usr/sbin/ip'
+    subprocess.check_call([ip_path] + list(args),
+                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def build_frame(src_mac, packet_type, payload=b'', preamble=b'\x55\x55'):
+    packet = preamble + packet_type + \
+        len(payload).to_bytes(4, 'little') + payload
+    return bytes(6) + raw_socket.mac_to_bytes(src_mac) + \
+        len(packet).to_bytes(2, 'big') + packet
+
+
+@unittest.skipUnless(can_create_veth(), 'requires root on Linux to create veth')
+class TestRawSocket(unittest.TestCase):
+    '''
+    Test raw socket capture on a veth pair, the device sends on one end
+    '''
+
+    def setUp(self):
+        run_ip('link', 'add', DEVICE_IFACE, 'type',
+               'veth', 'peer', 'name', HOST_IFACE)
+        run_ip('link', 'set', DEVICE_IFACE, 'up')
+        run_ip('link', 'set', HOST_IFACE, 'up')
+        self.sender = socket.socket(socket.AF_PACKET, socket.SOCK_RAW)
+        self.sender.bind((DEVICE_IFACE, 0))
+        self.ethernet = None
+
+    def tearDown(self):
+        if self.ethernet:
+            self.ethernet.close()
+        self.sender.close()
+        run_ip('link', 'del', DEVICE_IFACE)
+
+    def wait_packets(self, count):
+        packets = []
+        for _ in range(100):
+            packet = self.ethernet.read()
+            if packet:
+                packets.append(packet)
+                if len(packets) == count:
+                    break
+            else:
+                time.sleep(0.02)
+        return packets
+
+    def test_filter(self):
+        received = []
+        receiver = raw_socket.RawSocketReceiver(
+            HOST_IFACE, [DEVICE_MAC, HARD_CODE_MAC],
+            lambda frame: received.append(bytes(frame)), batch_size=4)
+        receiver.start()
+        try:
+            frames = [build_frame(DEVICE_MAC, b'\x01\x0a', bytes(range(i)))
+                      for i in range(10)]
+            self.sender.send(build_frame(OTHER_MAC, b'\x01\x0a'))
+            self.sender.send(build_frame(DEVICE_MAC, b'\x01\x0a',
+                                         preamble=b'\x55\x54'))
+            for frame in frames:
+                self.sender.send(frame)
+            hard_code_frame = build_frame(HARD_CODE_MAC, b'\x01\xcc')
+            self.sender.send(hard_code_frame)
+
+            for _ in range(100):
+                if len(received) >= 11:
+                    break
+                time.sleep(0.02)
+        finally:
+            receiver.stop()
+
+        # veth pads short frames to 60 bytes
+        self.assertEqual([x[:len(y)] for x, y in zip(received, frames)], frames)
+        self.assertEqual(received[-1][:len(hard_code_frame)], hard_code_frame)
+        self.assertEqual(receiver.received_count, 11)
+        self.assertTrue(receiver.batch_count <= receiver.received_count)
+
+    def test_ethernet_read(self):
+        self.ethernet = Ethernet(WebserverArgs(
+            interface='100base-t1', ethernet_capture='raw-socket'))
+        self.ethernet.iface = HOST_IFACE
+        self.ethernet.dst_mac = DEVICE_MAC
+        self.ethernet.start_listen_data()
+        self.assertIsNotNone(self.ethernet.raw_receiver)
+        self.assertIsNone(self.ethernet.async_sniffer)
+
+        payload = bytes(range(200))
+        self.sender.send(build_frame(DEVICE_MAC, b'\x0a\x01', payload))
+        self.sender.send(build_frame(OTHER_MAC, b'\x0a\x01', payload))
+        self.sender.send(build_frame(HARD_CODE_MAC, b'\x01\xcc', b'\x01'))
+
+        packets = self.wait_packets(2)
+        self.assertEqual(packets[0], b'\x55\x55\x0a\x01' +
+                         (200).to_bytes(4, 'little') + payload)
+        self.assertEqual(packets[1][:8], b'\x55\x55\x01\xcc\x01\x00\x00\x00')
+        self.assertEqual(self.ethernet.dst_mac, HARD_CODE_MAC)
+
+    def test_write_many(self):
+        self.ethernet = Ethernet(WebserverArgs(
+            interface='100base-t1', ethernet_capture='raw-socket'))
+        self.ethernet.iface = HOST_IFACE
+        self.ethernet.src_mac = OTHER_MAC
+        self.ethernet.dst_mac = DEVICE_MAC
+        device_socket = raw_socket.open_raw_socket(DEVICE_IFACE)
+        device_socket.settimeout(1)
+
+        mac_header = self.ethernet.get_mac_header()
+        self.assertIs(self.ethernet.get_mac_header(), mac_header)
+        frames = [helper.build_ethernet_frame(
+            mac_header, b'\x02\x0b', bytes([i]) * (i * 100)) for i in range(8)]
+        self.assertEqual(self.ethernet.write_many(frames), 8)
+        send_socket = self.ethernet.send_socket
+        self.ethernet.write(frames[0])
+        self.assertIs(self.ethernet.send_socket, send_socket)
+
+        received = []
+        try:
+            while len(received) < 9:
+                frame = device_socket.recv(2048)
+                if frame[6:12] == raw_socket.mac_to_bytes(OTHER_MAC):
+                    received.append(frame)
+        finally:
+            device_socket.close()
+        self.assertEqual(received, frames + frames[0:1])
+
+        self.ethernet.close()
+        self.assertIsNone(self.ethernet.send_socket)
+
+    def test_build_filter(self):
+        program = raw_socket.build_filter([DEVICE_MAC, HARD_CODE_MAC])
+        self.assertEqual(len(program), 13)
+        # the last compare of each mac jumps to the preamble check
+        self.assertEqual(program[3][1] + 4, 9)
+        self.assertEqual(program[7][1] + 8, 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
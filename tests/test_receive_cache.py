@@ -0,0 +1,118 @@
+import sys
+import time
+import threading
+import unittest
+
+try:
+    from aceinna.framework.receive_cache import ReceiveCache
+    from aceinna.framework.log_sink import (BLOCK, DROP_OLDEST, DROP_NEWEST)
+    from aceinna.framework.communicators.ethernet_100base_t1 import Ethernet
+    from aceinna.core.packet_statistics import PacketStatistics
+    from aceinna.models.args import WebserverArgs
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.framework.receive_cache import ReceiveCache
+    from aceinna.framework.log_sink import (BLOCK, DROP_OLDEST, DROP_NEWEST)
+    from aceinna.framework.communicators.ethernet_100base_t1 import Ethernet
+    from aceinna.core.packet_statistics import PacketStatistics
+    from aceinna.models.args import WebserverArgs
+
+
+def read_all(cache):
+    packets = []
+    while True:
+        packet = cache.get()
+        if packet is None:
+            return packets
+        packets.append(packet)
+
+
+class TestReceiveCache(unittest.TestCase):
+    '''
+    Test overflow policies and counters of receive cache
+    '''
+
+    def test_drop_oldest(self):
+        cache = ReceiveCache('test', max_size=10, policy=DROP_OLDEST)
+        results = [cache.put(i) for i in range(25)]
+        self.assertEqual(results.count(False), 15)
+        self.assertEqual(read_all(cache), list(range(15, 25)))
+        statistics = cache.get_statistics()
+        self.assertEqual(statistics['received'], 25)
+        self.assertEqual(statistics['dropped'], 15)
+        self.assertEqual(statistics['max_depth'], 10)
+        self.assertEqual(statistics['depth'], 0)
+
+    def test_drop_newest(self):
+        cache = ReceiveCache('test', max_size=10, policy=DROP_NEWEST)
+        for i in range(5):
+            cache.put(i)
+        self.assertEqual(cache.get(), 0)
+        for i in range(5, 25):
+            cache.put(i)
+        self.assertEqual(read_all(cache), list(range(1, 11)))
+        self.assertEqual(cache.dropped, 14)
+        self.assertEqual(cache.max_depth, 10)
+
+    def test_block(self):
+        cache = ReceiveCache('test', max_size=10, policy=BLOCK)
+        thread = threading.Thread(
+            target=lambda: [cache.put(i) for i in range(20)])
+        thread.start()
+        time.sleep(0.2)
+        # capture is blocked by the full cache
+        self.assertTrue(thread.is_alive())
+        self.assertEqual(len(cache), 10)
+
+        packets = []
+        while len(packets) < 20:
+            packet = cache.get()
+            if packet is None:
+                time.sleep(0.01)
+            else:
+                packets.append(packet)
+        thread.join(5)
+        self.assertEqual(packets, list(range(20)))
+        self.assertEqual(cache.dropped, 0)
+
+        # a blocked capture exits when cache is closed
+        for i in range(10):
+            cache.put(i)
+        thread = threading.Thread(target=cache.put, args=(10,))
+        thread.start()
+        time.sleep(0.1)
+        cache.close()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(cache.dropped, 1)
+        self.assertEqual(cache.received, 31)
+
+    def test_ethernet_statistics(self):
+        ethernet = Ethernet(WebserverArgs(
+            interface='100base-t1', receive_cache_policy=DROP_NEWEST))
+        frame = bytes(12) + b'\x00\x08' + b'\x55\x55\x01\x0a' + bytes(4)
+        for _ in range(1005):
+            ethernet.handle_receive_frame(frame)
+        self.assertEqual(ethernet.read(), frame[14:])
+        self.assertEqual(ethernet.read(), frame[14:])
+
+        statistics = PacketStatistics()
+        statistics.add_receive_cache(ethernet.receive_cache)
+        result = statistics.get_receive_cache_result()['100base-t1']
+        self.assertEqual(result['policy'], DROP_NEWEST)
+        self.assertEqual(result['received'], 1005)
+        self.assertEqual(result['dropped'], 5)
+        self.assertEqual(result['max_depth'], 1000)
+        self.assertEqual(result['depth'], 998)
+
+        statistics.reset()
+        result = statistics.get_receive_cache_result()['100base-t1']
+        self.assertEqual((result['received'], result['dropped'],
+                          result['max_depth']), (0, 0, 998))
+        ethernet.reset_buffer()
+        self.assertEqual(ethernet.read(), [])
+        self.assertRaises(ValueError, ethernet.receive_cache.set_policy, 'x')
+
+
+if __name__ == '__main__':
+    unittest.main()
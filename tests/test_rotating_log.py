@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+import random
+import shutil
+import struct
+import tempfile
+import threading
+import unittest
+
+try:
+    from aceinna.framework.log_sink import LogSink
+    from aceinna.framework.rotating_log import (
+        RotatingLogFile, PacketIndexer, get_segment_path, load_segment_index)
+    from aceinna.framework.utils.crc import calc_crc16
+    from aceinna.tools.parse_jobs import filter_time_window
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.framework.log_sink import LogSink
+    from aceinna.framework.rotating_log import (
+        RotatingLogFile, PacketIndexer, get_segment_path, load_segment_index)
+    from aceinna.framework.utils.crc import calc_crc16
+    from aceinna.tools.parse_jobs import filter_time_window
+
+OUTPUT_PACKETS = [
+    {'name': 's1', 'payload': [
+        {'name': 'GPS_Week', 'type': 'uint16'},
+        {'name': 'GPS_TimeOfWeek', 'type': 'uint32', 'unit': 'ms'},
+        {'name': 'x_accel', 'type': 'float'}]},
+    {'name': 'g1', 'payload': [
+        {'name': 'GPS_Week', 'type': 'uint16'},
+        {'name': 'GPS_TimeOfWeek', 'type': 'uint32', 'unit': 'ms'},
+        {'name': 'latitude', 'type': 'double'}]}
+]
+
+
+def build_packet(packet_type, payload, length_size=1):
+    length = struct.pack('<B' if length_size == 1 else '<I', len(payload))
+    body = bytearray(packet_type) + bytearray(length) + payload
+    crc = calc_crc16(body)
+    return b'\x55\x55' + bytes(body) + bytes(bytearray([crc >> 8, crc & 0xFF]))
+
+
+def build_log(count):
+    random.seed(10)
+    log = bytearray()
+    for i in range(count):
+        tow = 100000 + i * 10
+        if i % 10 == 0:
+            log += build_packet(b'g1', struct.pack('<HId', 2100, tow, 31.0))
+        else:
+            log += build_packet(b's1', struct.pack('<HIf', 2100, tow, 0.1))
+        if i % 50 == 0:
+            log += '$GPGGA,{0},3112.0,N*00\r\n'.format(tow).encode()
+    return bytes(log)
+
+
+class TestRotatingLog(unittest.TestCase):
+    '''
+    Test segments and index sidecars of rotating raw log
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.folder, 'user_2021_01_01.bin')
+        self.sink = LogSink('test')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def write_log(self, data, **kwargs):
+        log_file = RotatingLogFile(self.sink, self.file_path, **kwargs)
+        random.seed(20)
+        offset = 0
+        while offset < len(data):
+            size = random.randint(1, 200)
+            log_file.write(bytearray(data[offset:offset+size]))
+            offset += size
+        log_file.close()
+        self.assertTrue(self.sink.drain(5))
+        return log_file
+
+    def read_segments(self, count):
+        segments = []
+        for segment in range(count):
+            with open(get_segment_path(self.file_path, segment), 'rb') as segment_file:
+                segments.append(segment_file.read())
+        return segments
+
+    def test_rotate_by_size(self):
+        data = build_log(3000)
+        log_file = self.write_log(
+            data, max_size=8192, indexer=PacketIndexer(OUTPUT_PACKETS))
+        count = log_file.segment + 1
+        self.assertTrue(count > 5)
+        self.assertFalse(os.path.exists(get_segment_path(self.file_path, count)))
+
+        segments = self.read_segments(count)
+        self.assertEqual(b''.join(segments), data)
+        packets = {}
+        offset = 0
+        last_tow = 0
+        for segment, segment_data in enumerate(segments):
+            # a segment is cut in the write reaches the max size
+            self.assertTrue(len(segment_data) <= 8192 + 200)
+            # segments are cut at packet boundary
+            self.assertTrue(segment_data.startswith(b'\x55\x55') or
+                            segment_data.startswith(b'$'))
+            index = load_segment_index(get_segment_path(self.file_path, segment))
+            self.assertEqual(index['segment'], segment)
+            self.assertEqual(index['offset'], offset)
+            self.assertEqual(index['size'], len(segment_data))
+            self.assertTrue(index['closed'])
+            self.assertTrue(index['first_tow'] > last_tow)
+            self.assertTrue(index['last_tow'] >= index['first_tow'])
+            last_tow = index['last_tow']
+            offset += len(segment_data)
+            for name, value in index['packets'].items():
+                packets[name] = packets.get(name, 0) + value
+
+        self.assertEqual(packets, {'s1': 2700, 'g1': 300})
+        self.assertEqual(index['last_tow'], (100000 + 2999 * 10) / 1000.0)
+
+        # segments out of the time window are skipped
+        index = load_segment_index(get_segment_path(self.file_path, 2))
+        start = (2100, index['first_tow'])
+        end = (None, index['last_tow'])
+        file_paths = [get_segment_path(self.file_path, x) for x in range(count)]
+        self.assertEqual(filter_time_window(file_paths, (start, end)),
+                         file_paths[2:3])
+        self.assertEqual(filter_time_window(file_paths, (start, None)),
+                         file_paths[2:])
+        self.assertEqual(filter_time_window(file_paths), file_paths)
+
+    def test_rotate_by_time(self):
+        log_file = RotatingLogFile(self.sink, self.file_path, max_duration=0.2)
+        log_file.write(b'\x01' * 10)
+        log_file.write(b'\x02' * 10)
+        time.sleep(0.3)
+        log_file.write(b'\x03' * 10)
+        log_file.close()
+        self.assertTrue(self.sink.drain(5))
+        self.assertEqual(self.read_segments(2), [b'\x01' * 10 + b'\x02' * 10,
+                                                 b'\x03' * 10])
+        index = load_segment_index(get_segment_path(self.file_path, 1))
+        self.assertEqual(index['offset'], 20)
+        self.assertNotIn('packets', index)
+
+    def test_index_in_sink_thread(self):
+        # the receiver thread only queues data, it is indexed by the sink
+        indexer = PacketIndexer(OUTPUT_PACKETS)
+        feed_threads = set()
+        original_feed = indexer.feed
+
+        def feed(data):
+            feed_threads.add(threading.current_thread().name)
+            original_feed(data)
+
+        indexer.feed = feed
+        self.write_log(build_log(100), indexer=indexer)
+        self.assertEqual(feed_threads, set(['log-sink-test']))
+        index = load_segment_index(self.file_path)
+        self.assertEqual(index['packets'], {'s1': 90, 'g1': 10})
+
+    def test_ethernet_packets(self):
+        indexer = PacketIndexer(length_size=4)
+        data = b''.join(build_packet(b'\x01\n', bytearray(30), 4)
+                        for _ in range(20))
+        indexer.feed(data[0:100])
+        indexer.feed(data[100:])
+        self.assertEqual(indexer.summary()['packets'], {'010a': 20})
+        self.assertEqual(indexer.boundary, len(data))
+        self.assertEqual(indexer.summary()['first_tow'], None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import sys
+import random
+import struct
+import unittest
+
+try:
+    from aceinna.core.gnss import (
+        RTCMFramer, RTCMParser, CRC24Q_TABLE, calc_crc, calc_crc24q)
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.core.gnss import (
+        RTCMFramer, RTCMParser, CRC24Q_TABLE, calc_crc, calc_crc24q)
+
+
+def build_frame(message_type, payload_len):
+    payload = struct.pack('>H', message_type << 4) + bytes(
+        bytearray(random.randint(0, 255) for _ in range(payload_len - 2)))
+    frame = bytes(bytearray([0xD3, payload_len >> 8, payload_len & 0xFF])) + payload
+    return frame + struct.pack('>I', calc_crc24q(frame))[1:]
+
+
+class TestRTCMFramer(unittest.TestCase):
+    '''
+    Test RTCM3 framing of received blocks
+    '''
+
+    def setUp(self):
+        random.seed(10)
+        self.frames = [build_frame(1005, 19), build_frame(1077, 620),
+                       build_frame(1230, 6), build_frame(1087, 1023)]
+
+    def test_crc24q(self):
+        self.assertEqual(len(CRC24Q_TABLE), 256)
+        self.assertEqual(CRC24Q_TABLE[1], 0x864CFB)
+        # the crc of a frame with its crc is 0
+        for frame in self.frames:
+            self.assertEqual(calc_crc24q(frame), 0)
+            self.assertEqual(calc_crc(list(frame), len(frame) - 3),
+                             calc_crc24q(memoryview(frame)[:-3]))
+
+    def test_split_blocks(self):
+        stream = b'\x00\xd3\x01' + b''.join(self.frames) + \
+            b'\xd3\x00\x05\x01' + self.frames[0]
+        for block_size in [1, 2, 7, 100, 1024, len(stream)]:
+            framer = RTCMFramer()
+            frames = []
+            for index in range(0, len(stream), block_size):
+                frames.extend(bytes(x) for x in
+                              framer.feed(stream[index:index+block_size]))
+            self.assertEqual(frames, self.frames + self.frames[0:1])
+            self.assertEqual(framer.crc_passed_count, 5)
+
+    def test_resync_after_broken_frame(self):
+        broken = bytearray(self.frames[1])
+        broken[100] ^= 0xFF
+        # a frame inside the length of a broken frame is found again
+        stream = bytes(broken[:200]) + self.frames[2] + bytes(broken[200:]) + \
+            self.frames[3]
+        parser = RTCMParser()
+        parsed = []
+        parser.on('parsed', lambda frames: parsed.extend(bytes(x) for x in frames))
+        parser.receive(bytearray(stream[:500]))
+        parser.receive(stream[500:])
+        self.assertEqual(parsed, [self.frames[2], self.frames[3]])
+        self.assertTrue(parser.crc_failed_count >= 1)
+        self.assertEqual(parser.get_statistics()['valid_packet_count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,292 @@
+import os
+import sys
+import json
+import random
+import shutil
+import struct
+import tempfile
+import filecmp
+import unittest
+from io import StringIO
+
+try:
+    from aceinna.tools import stream_parse
+    from aceinna.tools import log_index
+    from aceinna.tools.openrtk_parse import UserRawParse
+    from aceinna.tools.rtkl_parse import InceptioParse
+    from aceinna.tools.kml_writer import (InsKmlWriter, InsPoint)
+    from aceinna.framework.utils.crc import calc_crc16
+    from aceinna.framework.columnar_storage import np
+except:  # pylint: disable=bare-except
+    sys.path.append('./src')
+    from aceinna.tools import stream_parse
+    from aceinna.tools import log_index
+    from aceinna.tools.openrtk_parse import UserRawParse
+    from aceinna.tools.rtkl_parse import InceptioParse
+    from aceinna.tools.kml_writer import (InsKmlWriter, InsPoint)
+    from aceinna.framework.utils.crc import calc_crc16
+    from aceinna.framework.columnar_storage import np
+
+
+def build_payload_config(fields):
+    return [{'name': name, 'type': value_type, 'unit': '', 'format': value_format}
+            for name, value_type, value_format in fields]
+
+
+SETTING = {
+    'userPacketsTypeList': ['s1', 'g1', 'i1'],
+    'userNMEAList': ['$GPGGA', '$GNRMC'],
+    'userOutputPackets': [
+        {'name': 's1', 'isList': False, 'payload': build_payload_config(
+            [('week', 'uint32', 'd'), ('tow', 'uint32', '11.3f')] +
+            [('imu{0}'.format(i), 'float', '14.10f') for i in range(6)])},
+        {'name': 'g1', 'isList': False, 'payload': build_payload_config(
+            [('week', 'uint32', 'd'), ('tow', 'uint32', '11.3f'),
+             ('positionMode', 'uint8', 'd'), ('latitude', 'double', '14.9f'),
+             ('longitude', 'double', '14.9f'), ('height', 'double', '10.4f'),
+             ('numberOfSVs', 'uint8', '3d')] +
+            [('gnss{0}'.format(i), 'float', '8.3f') for i in range(9)])},
+        {'name': 'i1', 'isList': False, 'payload': build_payload_config(
+            [('week', 'uint32', 'd'), ('tow', 'uint32', '11.3f'),
+             ('insStatus', 'uint8', '3d'), ('insPositionType', 'uint8', '3d'),
+             ('latitude', 'double', '14.9f'), ('longitude', 'double', '14.9f'),
+             ('height', 'double', '10.4f')] +
+            [('ins{0}'.format(i), 'float', '8.3f') for i in range(6)])}
+    ]
+}
+
+
+def build_packet(packet_type, payload):
+    body = bytearray(packet_type.encode()) + bytearray([len(payload)]) + payload
+    crc = calc_crc16(body)
+    return b'\x55\x55' + bytes(body) + bytes(bytearray([crc >> 8, crc & 0xFF]))
+
+
+def build_log():
+    random.seed(10)
+    log = bytearray()
+    for i in range(30000):
+        tow = 100000 + i * 10
+        value = random.random()
+        if value < 0.6:
+            log += build_packet('s1', struct.pack(
+                '<II6f', 2100, tow, *[random.random() for _ in range(6)]))
+        elif value < 0.65:
+            log += build_packet('g1', struct.pack(
+                '<IIBdddB9f', 2100, tow, random.randint(0, 5),
+                31 + random.random(), 121 + random.random(), 10.0, 12,
+                *[random.random() for _ in range(9)]))
+        elif value < 0.8:
+            log += build_packet('i1', struct.pack(
+                '<IIBBddd6f', 2100, tow - tow % 100, 1, 4,
+                31 + random.random(), 121 + random.random(), 10.0,
+                *[random.random() for _ in range(6)]))
+        elif value < 0.85:
+            log += '$GPGGA,{0},3112.0,N,12130.0,E*00\r\n'.format(tow).encode()
+        elif value < 0.9:
+            broken = bytearray(build_packet('s1', bytearray(32)))
+            broken[-1] ^= 0xFF
+            log += broken
+        else:
+            log += bytearray(random.randint(0, 255)
+                             for _ in range(random.randint(1, 40)))
+    return bytes(log)
+
+
+class TestUserLogParse(unittest.TestCase):
+    '''
+    Test chunk parallel parse of user log
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.setting_path = os.path.join(self.folder, 'setting.json')
+        with open(self.setting_path, 'w') as setting_file:
+            json.dump(SETTING, setting_file)
+        self.log_path = os.path.join(self.folder, 'user.bin')
+        with open(self.log_path, 'wb') as log_file:
+            log_file.write(build_log())
+
+        self.min_segment_size = stream_parse.MIN_SEGMENT_SIZE
+        stream_parse.MIN_SEGMENT_SIZE = 64 * 1024
+
+    def tearDown(self):
+        stream_parse.MIN_SEGMENT_SIZE = self.min_segment_size
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def parse(self, parser_class, name, **kwargs):
+        output_folder = os.path.join(self.folder, name)
+        os.makedirs(output_folder)
+        with open(self.log_path, 'rb') as log_file:
+            parse = parser_class(data_file=log_file, path=output_folder + '/user_',
+                                 inskml_rate=5, json_setting=self.setting_path,
+                                 **kwargs)
+            parse.start_pasre()
+        return output_folder, parse
+
+    def assert_same_output(self, parser_class):
+        serial_folder, serial_parse = self.parse(
+            parser_class, 'serial', streaming=True)
+        parallel_folder, parallel_parse = self.parse(
+            parser_class, 'parallel', jobs=4)
+
+        output_files = sorted(os.listdir(serial_folder))
+        self.assertEqual(output_files, sorted(os.listdir(parallel_folder)))
+        self.assertIn('user_s1.csv', output_files)
+        _, mismatch, errors = filecmp.cmpfiles(
+            serial_folder, parallel_folder, output_files, shallow=False)
+        self.assertEqual(mismatch + errors, [])
+
+        # the same output as parse_rawdata, which parses byte by byte
+        baseline_folder, baseline_parse = self.parse(parser_class, 'baseline')
+        self.assertEqual(output_files, sorted(os.listdir(baseline_folder)))
+        _, mismatch, errors = filecmp.cmpfiles(
+            serial_folder, baseline_folder, output_files, shallow=False)
+        self.assertEqual(mismatch + errors, [])
+        self.assertEqual(serial_parse.packet_count,
+                         baseline_parse.packet_count)
+
+        self.assertTrue(serial_parse.packet_count > 10000)
+        self.assertTrue(serial_parse.crc_error_count > 100)
+        self.assertEqual(serial_parse.packet_count,
+                         parallel_parse.packet_count)
+        self.assertEqual(serial_parse.crc_error_count,
+                         parallel_parse.crc_error_count)
+
+    def test_user_raw_parse(self):
+        self.assert_same_output(UserRawParse)
+
+    def test_inceptio_parse(self):
+        self.assert_same_output(InceptioParse)
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_columnar_export(self):
+        csv_folder, _ = self.parse(UserRawParse, 'csv', streaming=True)
+        for export_format in ['npz', 'npy']:
+            serial_folder, _ = self.parse(
+                UserRawParse, export_format, export_format=export_format)
+            parallel_folder, _ = self.parse(
+                UserRawParse, export_format + '_parallel',
+                export_format=export_format, jobs=4)
+            self.assertEqual(sorted(os.listdir(serial_folder)),
+                             ['user-nmea', 'user_g1.' + export_format,
+                              'user_i1.' + export_format,
+                              'user_s1.' + export_format])
+
+            for name in ['s1', 'g1', 'i1']:
+                file_name = 'user_{0}.{1}'.format(name, export_format)
+                serial = np.load(os.path.join(serial_folder, file_name))
+                parallel = np.load(os.path.join(parallel_folder, file_name))
+                if export_format == 'npz':
+                    self.assertEqual(serial.files, parallel.files)
+                    for field in serial.files:
+                        self.assertTrue(
+                            np.array_equal(serial[field], parallel[field]))
+                else:
+                    self.assertTrue(np.array_equal(serial, parallel))
+                week = serial['week']
+
+                with open(os.path.join(csv_folder, 'user_' + name + '.csv')) as csv_file:
+                    rows = csv_file.read().splitlines()[1:]
+                self.assertEqual(len(week), len(rows))
+                self.assertTrue((week == 2100).all())
+
+    def read_rows(self, folder, name, window):
+        with open(os.path.join(folder, 'user_' + name + '.csv')) as csv_file:
+            rows = csv_file.read().splitlines()[1:]
+        return [row for row in rows
+                if window[0] <= float(row.split(',')[1]) <= window[1]]
+
+    def test_time_window(self):
+        full_folder, _ = self.parse(UserRawParse, 'full', streaming=True)
+        window = (150000, 200000)
+        window_folder, parse = self.parse(
+            UserRawParse, 'window', time_window=((None, window[0]), (2100, window[1])))
+        self.assertTrue(os.path.exists(self.log_path + log_index.INDEX_SUFFIX))
+        for name in ['s1', 'g1', 'i1']:
+            rows = self.read_rows(window_folder, name, (0, 10 ** 9))
+            self.assertTrue(len(rows) > 10)
+            # time of week is written in seconds
+            self.assertEqual(rows, self.read_rows(
+                full_folder, name, (window[0] / 1000.0, window[1] / 1000.0)))
+
+        # the index is reused, until the log file is changed
+        build_log_index = log_index.build_log_index
+        log_index.build_log_index = None
+        try:
+            self.parse(InceptioParse, 'window_again',
+                       time_window=((None, window[0]), None))
+        finally:
+            log_index.build_log_index = build_log_index
+        with open(self.log_path, 'ab') as log_file:
+            log_file.write(b'\x00')
+        os.utime(self.log_path, (0, 0))
+        self.parse(InceptioParse, 'window_changed',
+                   time_window=(None, (None, window[1])))
+
+    def test_split_inside_frame(self):
+        # a range starts inside a frame is parsed again from the frame end
+        with open(self.log_path, 'rb') as log_file:
+            parse = UserRawParse(log_file, self.folder + '/x_', 5,
+                                 self.setting_path, streaming=True)
+            parse.prepare_parse()
+            offset = parse.find_sync_offset(1000)
+            self.assertEqual(
+                parse.find_sync_offset(offset), offset)
+            self.assertTrue(parse.find_sync_offset(offset + 1) > offset)
+
+
+class TestKmlWriter(unittest.TestCase):
+    '''
+    Test merge of kml segments
+    '''
+
+    def build_points(self, count):
+        return [InsPoint(2100, 100000 + i * 100, 3, i % 6, 31 + i * 0.001,
+                         121 + i * 0.001, 10.0, 1.0, 2.0, -0.5, 0.1, 0.2, i * 1.0)
+                for i in range(count)]
+
+    def write_track(self, points):
+        kml_file = StringIO()
+        writer = InsKmlWriter(kml_file, 5)
+        for point in points:
+            writer.add(point)
+        writer.close()
+        return kml_file.getvalue()
+
+    def write_segments(self, segments):
+        kml_file = StringIO()
+        writer = InsKmlWriter(kml_file, 5)
+        for points in segments:
+            coordinate_file = StringIO()
+            placemark_file = StringIO()
+            segment_writer = InsKmlWriter(
+                coordinate_file, 5, placemark_file, is_segment=True)
+            for point in points:
+                segment_writer.add(point)
+            segment = segment_writer.close()
+            coordinate_file.seek(0)
+            placemark_file.seek(0)
+            writer.merge(segment, coordinate_file, placemark_file)
+        writer.close()
+        return kml_file.getvalue()
+
+    def test_merge_segments(self):
+        points = self.build_points(40)
+        expected = self.write_track(points)
+        self.assertIn('<name>Start</name>', expected)
+        self.assertIn('<name>End</name>', expected)
+
+        for sizes in [[40], [0, 40, 0], [1, 1, 1, 37], [2, 3, 4, 31], [39, 1]]:
+            segments = []
+            start = 0
+            for size in sizes:
+                segments.append(points[start:start+size])
+                start += size
+            self.assertEqual(self.write_segments(segments), expected)
+
+        self.assertEqual(self.write_segments([[]]), self.write_track([]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -66,9 +66,19 @@ import serial
 import math
 import string
 import time
+import os
 import sys
 import collections
 import glob
+try:
+    from aceinna.framework.utils.crc import calc_crc16
+except:  # pylint: disable=bare-except
+    # src folder of the repository, the script could be run from any folder
+    sys.path.append(os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+    from aceinna.framework.utils.crc import calc_crc16
+
+
 class OpenIMU:
     def __init__(self, ws=False):
         '''Initialize and then start ports search and autobaud process
@@ -1314,17 +1324,7 @@ class OpenIMU:
     def calc_crc(self, payload):
         '''Calculates CRC per 380 manual
         '''
-        crc = 0x1D0F
-        for bytedata in payload:
-            crc = crc ^ (bytedata << 8)
-            for i in range(0, 8):
-                if crc & 0x8000:
-                    crc = (crc << 1) ^ 0x1021
-                else:
-                    crc = crc << 1
-
-        crc = crc & 0xffff
-        return crc
+        return calc_crc16(payload)
 
     def open(self, port, baud):
         try:
@@ -7,6 +7,8 @@ import math
 import collections
 import datetime
 import time
+import shutil
+import tempfile
 
 PI = 3.1415926535897932
 WGS84 = {
@@ -92,12 +94,24 @@ class INS2000Parser:
         self.sync_state = 0
         self.lastlctime = 0
 
-        self.gnss_kmls = []
-        self.gnss_vels = []
-        self.inspvaxs = []
+        # positions and velocities not paired yet, the n-th position
+        # is paired with the n-th velocity
+        self.gnss_kmls = collections.deque()
+        self.gnss_vels = collections.deque()
+        # count of track points, and the last point waits for next one
+        # to know if it is the end of track
+        self.gnss_kml_count = 0
+        self.gnss_kml_pending = None
+        self.ins_kml_count = 0
+        self.ins_kml_pending = None
+        # placemarks are appended to kml file after the line string
+        self.placemark_files = {}
+        self.utc_time_cache = (None, None)
 
         self.files = {}
         self.packets = 0
+        # message name -> (struct, keys) of its payload
+        self.unpackers = {}
 
 
     def run(self):
@@ -135,10 +149,17 @@ class INS2000Parser:
             fo = open(self.out_prefix + filename, 'w')
             self.files[filename] = fo
 
+        self.write_file(self.gnss_kml_file, self.gnss_kml_header())
+        self.write_file(self.ins_kml_file, self.ins_kml_header())
+        for filename in [self.gnss_kml_file, self.ins_kml_file]:
+            self.placemark_files[filename] = tempfile.TemporaryFile(mode='w+')
+
     def close_files(self):
         """close all files"""
         for _, fo in self.files.items():
             fo.close()
+        for _, fo in self.placemark_files.items():
+            fo.close()
 
     def append_process_txt(self, data):
         """append process txt"""
@@ -205,11 +226,16 @@ class INS2000Parser:
         if not message_str in self.cfgs["outputPackets"]:
             return
 
-        payload = self.cfgs["outputPackets"][message_str]["payload"]
-        bin_format, keys = self.output_fmt(payload)
+        unpacker = self.unpackers.get(message_str)
+        if unpacker is None:
+            payload = self.cfgs["outputPackets"][message_str]["payload"]
+            bin_format, keys = self.output_fmt(payload)
+            unpacker = (struct.Struct(bin_format), keys)
+            self.unpackers[message_str] = unpacker
+        keys = unpacker[1]
 
         try:
-            packets = struct.unpack(bin_format, packet[self.header_len:-4])
+            packets = unpacker[0].unpack(packet[self.header_len:-4])
         except Exception as e:
             return
 
@@ -306,7 +332,7 @@ class INS2000Parser:
         """trace gga nmea"""
         self.print_ins_txt(msg)
         if math.fabs(msg['lat']) > 0.001:
-            self.inspvaxs.append(msg)
+            self.trace_ins_kml(msg)
 
         if not (math.fabs(msg['lat']) > 0.001 and (msg['ins_status'] == 3 or msg['ins_status'] == 6 or
             msg['ins_status'] == 7)):
@@ -342,6 +368,7 @@ class INS2000Parser:
 
         if math.fabs(msg['lat']) > 0.001:
             self.gnss_kmls.append(msg)
+            self.pair_gnss_kml()
 
     def print_gnss_txt(self, msg):
         """print gnss txt"""
@@ -362,6 +389,7 @@ class INS2000Parser:
 
         if math.fabs(msg['hor_spd']) > 0.0001 or math.fabs(msg['vert_spd']) > 0.0001 or math.fabs(msg['trk_gnd']) > 0.0001:
             self.gnss_vels.append(msg)
+            self.pair_gnss_kml()
 
     def trace_rawimusx(self, msg):
         """trace rawimusx"""
@@ -412,8 +440,8 @@ class INS2000Parser:
 			    pos['lat'], pos['lon'], pos['hgt'] + pos['undulation'], pos['lat_sigma'], pos['lon_sigma'], pos['hgt_sigma'], pos_type, north_velocity, east_velocity, up_velocity, vel['trk_gnd'])
             self.write_file(self.gnssposvel_txt_file, gnssposvel_txt)
 
-    def save_gnss_kml(self):
-        """save gnss kml"""
+    def gnss_kml_header(self):
+        """gnss kml header and start of track"""
         gnss_kml = ''
         gnss_kml += '<?xml version="1.0" encoding="UTF-8"?>\n'
         gnss_kml += '<kml xmlns="http://www.opengis.net/kml/2.2">\n'
@@ -439,84 +467,106 @@ class INS2000Parser:
             + "</Style>\n"\
             + "<LineString>\n"\
             + "<coordinates>\n"
+        return gnss_kml
+
+    def pair_gnss_kml(self):
+        """add gnss track point when both position and velocity come"""
+        while self.gnss_kmls and self.gnss_vels:
+            msg = self.gnss_kmls.popleft()
+            vel = self.gnss_vels.popleft()
+
+            self.write_file(self.gnss_kml_file, '{:.9f},{:.9f},{:.3f}\n'.format(
+                msg['lon'], msg['lat'], msg['hgt'] + msg['undulation']))
+            self.print_gnssposvel_txt(msg, vel)
+
+            if self.gnss_kml_pending is not None:
+                self.placemark_files[self.gnss_kml_file].write(self.gnss_placemark(
+                    self.gnss_kml_pending, self.gnss_kml_count - 1, False))
+            self.gnss_kml_pending = (msg, vel)
+            self.gnss_kml_count += 1
+
+    def gnss_placemark(self, point, i, is_last):
+        """gnss placemark of track point i"""
+        msg, vel = point
+        ep_sp = self.gps_to_utc(msg['header_gps_week'], msg['header_gps_seconds'] / 1000, -18)
+
+        north_velocity = vel['hor_spd']* math.cos(vel['trk_gnd'] * PI / 180)
+        east_velocity = vel['hor_spd'] * math.sin(vel['trk_gnd'] * PI / 180)
+        up_velocity = vel['vert_spd']
+
+        gnss_kml = "<Placemark>\n"
+        if i <= 1:
+            gnss_kml += "<name>Start</name>\n"
+        elif is_last:
+            gnss_kml += "<name>End</name>\n"
+        else:
+            if math.fmod(ep_sp[5] + 0.025, 30) < 0.05:
+                gnss_kml += "<name>"\
+                    + "%02d" % ep_sp[3] + "%02d" % ep_sp[4] + "%02d" % ep_sp[5]\
+                    + "</name>\n"
+
+        gnss_kml += "<TimeStamp><when>"\
+                + time.strftime("%Y-%m-%dT%H:%M:%S.", ep_sp)\
+                + "%02dZ" % ((msg['header_gps_seconds']%1000)/10)\
+                + "</when></TimeStamp>\n"
+
+        gnss_kml += "<description><![CDATA[\n"\
+            + "<TABLE border=\"1\" width=\"100%\" Align=\"center\">\n"\
+            + "<TR ALIGN=RIGHT>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Time:</TD><TD>"\
+            + str(msg['header_gps_week']) + "</TD><TD>" + "%.3f" % (msg['header_gps_seconds']/1000) + "</TD><TD>"\
+            + "%2d:%2d:%7.4f" % (ep_sp[3],ep_sp[4],ep_sp[5]+(msg['header_gps_seconds']%1000)/1000) + "</TD><TD>"\
+            + "%4d/%2d/%2d" % (ep_sp[0], ep_sp[1], ep_sp[2]) + "</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Position:</TD><TD>"\
+            + "%.8f" % msg['lat'] + "</TD><TD>" + "%.8f" % msg['lon'] + "</TD><TD>" + "%.4f" % (msg['hgt'] + msg['undulation']) + "</TD><TD>(DMS,m)</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Vel(N,E,D):</TD><TD>"\
+            + "%.4f" % north_velocity + "</TD><TD>" + "%.4f" % east_velocity + "</TD><TD>" + "%.4f" % (-up_velocity) + "</TD><TD>(m/s)</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Att(r,p,h):</TD><TD>"\
+            + "0" + "</TD><TD>" + "0" + "</TD><TD>" + "%.4f" % vel['trk_gnd'] + "</TD><TD>(deg,approx)</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Mode:</TD><TD>"\
+            + str(msg['sol_status']) + "</TD><TD>" + str(msg['pos_type']) + "</TD><TR>\n"\
+            + "</TABLE>\n"\
+            + "]]></description>\n"
+
+        color = self.getpostype(msg['pos_type'])
+        gnss_kml += "<styleUrl>#P" + str(color) + "</styleUrl>\n"\
+                + "<Style>\n"\
+                + "<IconStyle>\n"\
+                + "<heading>" + "%.4f" % vel['trk_gnd'] + "</heading>\n"\
+                + "</IconStyle>\n"\
+                + "</Style>\n"
 
-        for msg in self.gnss_kmls:
-            gnss_kml += '{:.9f},{:.9f},{:.3f}\n'.format(msg['lon'], msg['lat'], msg['hgt'] + msg['undulation'])
+        gnss_kml += "<Point>\n"\
+                + "<coordinates>" + "%.9f,%.9f,%.3f" % (msg['lon'], msg['lat'], msg['hgt'] + msg['undulation']) + "</coordinates>\n"\
+                + "</Point>\n"
 
-        gnss_kml += "</coordinates>\n"\
+        gnss_kml += "</Placemark>\n"
+        return gnss_kml
+
+    def save_gnss_kml(self):
+        """save gnss kml"""
+        if self.gnss_kml_pending is not None:
+            self.placemark_files[self.gnss_kml_file].write(self.gnss_placemark(
+                self.gnss_kml_pending, self.gnss_kml_count - 1, True))
+            self.gnss_kml_pending = None
+
+        gnss_kml = "</coordinates>\n"\
             + "</LineString>\n"\
             + "</Placemark>\n"
 
         gnss_kml += "<Folder>\n"\
             + "<name>Rover Position</name>\n"
+        self.write_file(self.gnss_kml_file, gnss_kml)
+        self.copy_placemarks(self.gnss_kml_file)
 
-        for i, msg in enumerate(self.gnss_kmls):
-            ep = self.weeksecondstoutc(msg['header_gps_week'], msg['header_gps_seconds'] / 1000, -18)
-            ep_sp = time.strptime(ep, "%Y-%m-%d %H:%M:%S")
-
-            vel = self.gnss_vels[i]
-            north_velocity = vel['hor_spd']* math.cos(vel['trk_gnd'] * PI / 180)
-            east_velocity = vel['hor_spd'] * math.sin(vel['trk_gnd'] * PI / 180)
-            up_velocity = vel['vert_spd']
-
-            self.print_gnssposvel_txt(msg, vel)
-
-            gnss_kml += "<Placemark>\n"
-            if i <= 1:
-                gnss_kml += "<name>Start</name>\n"
-            elif i == len(self.gnss_kmls)-1:
-                gnss_kml += "<name>End</name>\n"
-            else:
-                if math.fmod(ep_sp[5] + 0.025, 30) < 0.05:
-                    gnss_kml += "<name>"\
-                        + "%02d" % ep_sp[3] + "%02d" % ep_sp[4] + "%02d" % ep_sp[5]\
-                        + "</name>\n"
-
-            gnss_kml += "<TimeStamp><when>"\
-                    + time.strftime("%Y-%m-%dT%H:%M:%S.", ep_sp)\
-                    + "%02dZ" % ((msg['header_gps_seconds']%1000)/10)\
-                    + "</when></TimeStamp>\n"
-
-            gnss_kml += "<description><![CDATA[\n"\
-                + "<TABLE border=\"1\" width=\"100%\" Align=\"center\">\n"\
-                + "<TR ALIGN=RIGHT>\n"\
-                + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Time:</TD><TD>"\
-                + str(msg['header_gps_week']) + "</TD><TD>" + "%.3f" % (msg['header_gps_seconds']/1000) + "</TD><TD>"\
-                + "%2d:%2d:%7.4f" % (ep_sp[3],ep_sp[4],ep_sp[5]+(msg['header_gps_seconds']%1000)/1000) + "</TD><TD>"\
-                + "%4d/%2d/%2d" % (ep_sp[0], ep_sp[1], ep_sp[2]) + "</TD></TR>\n"\
-                + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Position:</TD><TD>"\
-                + "%.8f" % msg['lat'] + "</TD><TD>" + "%.8f" % msg['lon'] + "</TD><TD>" + "%.4f" % (msg['hgt'] + msg['undulation']) + "</TD><TD>(DMS,m)</TD></TR>\n"\
-                + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Vel(N,E,D):</TD><TD>"\
-                + "%.4f" % north_velocity + "</TD><TD>" + "%.4f" % east_velocity + "</TD><TD>" + "%.4f" % (-up_velocity) + "</TD><TD>(m/s)</TD></TR>\n"\
-                + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Att(r,p,h):</TD><TD>"\
-                + "0" + "</TD><TD>" + "0" + "</TD><TD>" + "%.4f" % vel['trk_gnd'] + "</TD><TD>(deg,approx)</TD></TR>\n"\
-                + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Mode:</TD><TD>"\
-                + str(msg['sol_status']) + "</TD><TD>" + str(msg['pos_type']) + "</TD><TR>\n"\
-                + "</TABLE>\n"\
-                + "]]></description>\n"
-
-            color = self.getpostype(msg['pos_type'])
-            gnss_kml += "<styleUrl>#P" + str(color) + "</styleUrl>\n"\
-                    + "<Style>\n"\
-                    + "<IconStyle>\n"\
-                    + "<heading>" + "%.4f" % vel['trk_gnd'] + "</heading>\n"\
-                    + "</IconStyle>\n"\
-                    + "</Style>\n"
-
-            gnss_kml += "<Point>\n"\
-                    + "<coordinates>" + "%.9f,%.9f,%.3f" % (msg['lon'], msg['lat'], msg['hgt'] + msg['undulation']) + "</coordinates>\n"\
-                    + "</Point>\n"
-
-            gnss_kml += "</Placemark>\n"
-
-        gnss_kml += "</Folder>\n"\
+        gnss_kml = "</Folder>\n"\
             + "</Document>\n"\
             + "</kml>\n"
 
         self.write_file(self.gnss_kml_file, gnss_kml)
 
-    def save_ins_kml(self):
-        """save ins kml"""
+    def ins_kml_header(self):
+        """ins kml header and start of track"""
         color = ["ffffffff","ff0000ff","ffff00ff","50FF78F0","ff00ff00","ff00aaff"]
         ins_kml = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"\
             + "<kml xmlns=\"http://www.opengis.net/kml/2.2\">\n"\
@@ -539,90 +589,117 @@ class INS2000Parser:
                 + "</Style>\n"\
                 + "<LineString>\n"\
                 + "<coordinates>\n"
+        return ins_kml
+
+    def trace_ins_kml(self, ins):
+        """add ins track point"""
+        if math.fmod(ins['header_gps_seconds'] / 1000 + 0.0005, 1.0) < 0.005:
+            self.write_file(self.ins_kml_file, '{:.9f},{:.9f},{:.3f}\n'.format(
+                ins['lon'], ins['lat'], ins['hgt'] + ins['undulation']))
+
+        if self.ins_kml_pending is not None:
+            self.placemark_files[self.ins_kml_file].write(self.ins_placemark(
+                self.ins_kml_pending, self.ins_kml_count - 1, False))
+        self.ins_kml_pending = ins
+        self.ins_kml_count += 1
+
+    def ins_placemark(self, ins, i, is_last):
+        """ins placemark of track point i"""
+        if not (i == 0 or is_last or math.fmod(ins['header_gps_seconds'] / 1000 + 0.0005, 1.0) < 0.005):
+            return ''
+
+        ep_sp = self.gps_to_utc(ins['header_gps_week'], ins['header_gps_seconds'] / 1000, -18)
+
+        ins_kml = "<Placemark>\n"
+        if i <= 1:
+            ins_kml += "<name>Start</name>\n"
+        elif is_last:
+            ins_kml += "<name>End</name>\n"
+        else:
+            if math.fmod(ep_sp[5]+(ins['header_gps_seconds'] % 1000)/1000+0.025, 30) < 0.05:
+                ins_kml += "<name>"\
+                    + "%02d" % ep_sp[3] + "%02d" % ep_sp[4] + "%02d" % ep_sp[5]\
+                    + "</name>\n"
+
+        ins_kml += "<TimeStamp><when>"\
+            + time.strftime("%Y-%m-%dT%H:%M:%S.", ep_sp)\
+            + "%02dZ" % ((ins['header_gps_seconds']%1000)/10)\
+            + "</when></TimeStamp>\n"
+
+        ins_kml += "<description><![CDATA[\n"\
+            + "<TABLE border=\"1\" width=\"100%\" Align=\"center\">\n"\
+            + "<TR ALIGN=RIGHT>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Time:</TD><TD>"\
+            + str(ins['header_gps_week']) + "</TD><TD>" + "%.3f" % (ins['header_gps_seconds']/1000) + "</TD><TD>"\
+            + "%2d:%2d:%7.4f" % (ep_sp[3],ep_sp[4],ep_sp[5]+(ins['header_gps_seconds']%1000)/1000) + "</TD><TD>"\
+            + "%4d/%2d/%2d" % (ep_sp[0], ep_sp[1], ep_sp[2]) + "</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Position:</TD><TD>"\
+            + "%.9f" % ins['lat'] + "</TD><TD>" + "%.9f" % ins['lon'] + "</TD><TD>" + "%.4f" % (ins['hgt'] + ins['undulation']) + "</TD><TD>(DMS,m)</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Vel(N,E,D):</TD><TD>"\
+            + "%.4f" % ins['north_velocity'] + "</TD><TD>" + "%.4f" % ins['east_velocity'] + "</TD><TD>" + "%.4f" % (-ins['up_velocity']) + "</TD><TD>(m/s)</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Att(r,p,h):</TD><TD>"\
+            + "%.4f" % ins['roll'] + "</TD><TD>" + "%.4f" % ins['pitch'] + "</TD><TD>" + "%.4f" % (-ins['azimuth']) + "</TD><TD>(deg,approx)</TD></TR>\n"\
+            + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Mode:</TD><TD>"\
+            + str(ins['ins_status']) + "</TD><TD>" + str(ins['pos_type']) + "</TD><TR>\n"\
+            + "</TABLE>\n"\
+            + "]]></description>\n"
+
+        pcolor = 0
+        if ins['ins_status'] == 0:     # "INS_INACTIVE"
+            pcolor = 0
+        elif ins['ins_status'] == 1:   # "SPP/INS_SPP"
+            pcolor = 1
+        elif ins['ins_status'] == 2:   # "PSRDIFF/INS_PSRDIFF (RTD)"
+            pcolor = 1
+        elif ins['ins_status'] == 3:   # "INS_DR"
+            pcolor = 4
+        elif ins['ins_status'] == 6:   # "RTK_FIX/INS_RTKFIXED"
+            pcolor = 1
+        elif ins['ins_status'] == 7:   # "RTK_FLOAT/INS_RTKFLOAT"
+            pcolor = 1
+
+        ins_kml += "<styleUrl>#P" + str(pcolor) + "</styleUrl>\n"\
+            + "<Style>\n"\
+            + "<IconStyle>\n"\
+            + "<heading>" + "%.4f" % ins['azimuth'] + "</heading>\n"\
+            + "</IconStyle>\n"\
+            + "</Style>\n"
+
+        ins_kml += "<Point>\n"\
+            + "<coordinates>" + "%.9f,%.9f,%.3f" % (ins['lon'], ins['lat'], ins['hgt'] + ins['undulation']) + "</coordinates>\n"\
+            + "</Point>\n"
+
+        ins_kml += "</Placemark>\n"
+        return ins_kml
 
-        for ins in self.inspvaxs:
-            if math.fmod(ins['header_gps_seconds'] / 1000 + 0.0005, 1.0) < 0.005:
-                ins_kml += '{:.9f},{:.9f},{:.3f}\n'.format(ins['lon'], ins['lat'], ins['hgt'] + ins['undulation'])
+    def save_ins_kml(self):
+        """save ins kml"""
+        if self.ins_kml_pending is not None:
+            self.placemark_files[self.ins_kml_file].write(self.ins_placemark(
+                self.ins_kml_pending, self.ins_kml_count - 1, True))
+            self.ins_kml_pending = None
 
-        ins_kml += "</coordinates>\n"\
+        ins_kml = "</coordinates>\n"\
             + "</LineString>\n"\
             + "</Placemark>\n"
 
         ins_kml += "<Folder>\n"\
             + "<name>Rover Position</name>\n"
+        self.write_file(self.ins_kml_file, ins_kml)
+        self.copy_placemarks(self.ins_kml_file)
 
-        for i, ins in enumerate(self.inspvaxs):
-            ep = self.weeksecondstoutc(ins['header_gps_week'], ins['header_gps_seconds'] / 1000, -18)
-            ep_sp = time.strptime(ep, "%Y-%m-%d %H:%M:%S")
-
-            if i == 0 or i == len(self.inspvaxs)-1 or math.fmod(ins['header_gps_seconds'] / 1000 + 0.0005, 1.0) < 0.005:
-                ins_kml += "<Placemark>\n"
-                if i <= 1:
-                    ins_kml += "<name>Start</name>\n"
-                elif i == len(self.inspvaxs)-1:
-                    ins_kml += "<name>End</name>\n"
-                else:
-                    if math.fmod(ep_sp[5]+(ins['header_gps_seconds'] % 1000)/1000+0.025, 30) < 0.05:
-                        ins_kml += "<name>"\
-                            + "%02d" % ep_sp[3] + "%02d" % ep_sp[4] + "%02d" % ep_sp[5]\
-                            + "</name>\n"
-
-                ins_kml += "<TimeStamp><when>"\
-                    + time.strftime("%Y-%m-%dT%H:%M:%S.", ep_sp)\
-                    + "%02dZ" % ((ins['header_gps_seconds']%1000)/10)\
-                    + "</when></TimeStamp>\n"
-
-                ins_kml += "<description><![CDATA[\n"\
-                    + "<TABLE border=\"1\" width=\"100%\" Align=\"center\">\n"\
-                    + "<TR ALIGN=RIGHT>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Time:</TD><TD>"\
-                    + str(ins['header_gps_week']) + "</TD><TD>" + "%.3f" % (ins['header_gps_seconds']/1000) + "</TD><TD>"\
-                    + "%2d:%2d:%7.4f" % (ep_sp[3],ep_sp[4],ep_sp[5]+(ins['header_gps_seconds']%1000)/1000) + "</TD><TD>"\
-                    + "%4d/%2d/%2d" % (ep_sp[0], ep_sp[1], ep_sp[2]) + "</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Position:</TD><TD>"\
-                    + "%.9f" % ins['lat'] + "</TD><TD>" + "%.9f" % ins['lon'] + "</TD><TD>" + "%.4f" % (ins['hgt'] + ins['undulation']) + "</TD><TD>(DMS,m)</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Vel(N,E,D):</TD><TD>"\
-                    + "%.4f" % ins['north_velocity'] + "</TD><TD>" + "%.4f" % ins['east_velocity'] + "</TD><TD>" + "%.4f" % (-ins['up_velocity']) + "</TD><TD>(m/s)</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Att(r,p,h):</TD><TD>"\
-                    + "%.4f" % ins['roll'] + "</TD><TD>" + "%.4f" % ins['pitch'] + "</TD><TD>" + "%.4f" % (-ins['azimuth']) + "</TD><TD>(deg,approx)</TD></TR>\n"\
-                    + "<TR ALIGN=RIGHT><TD ALIGN=LEFT>Mode:</TD><TD>"\
-                    + str(ins['ins_status']) + "</TD><TD>" + str(ins['pos_type']) + "</TD><TR>\n"\
-                    + "</TABLE>\n"\
-                    + "]]></description>\n"
-
-                pcolor = 0
-                if ins['ins_status'] == 0:     # "INS_INACTIVE"
-                    pcolor = 0
-                elif ins['ins_status'] == 1:   # "SPP/INS_SPP"
-                    pcolor = 1
-                elif ins['ins_status'] == 2:   # "PSRDIFF/INS_PSRDIFF (RTD)"
-                    pcolor = 1
-                elif ins['ins_status'] == 3:   # "INS_DR"
-                    pcolor = 4
-                elif ins['ins_status'] == 6:   # "RTK_FIX/INS_RTKFIXED"
-                    pcolor = 1
-                elif ins['ins_status'] == 7:   # "RTK_FLOAT/INS_RTKFLOAT"
-                    pcolor = 1
-
-                ins_kml += "<styleUrl>#P" + str(pcolor) + "</styleUrl>\n"\
-                    + "<Style>\n"\
-                    + "<IconStyle>\n"\
-                    + "<heading>" + "%.4f" % ins['azimuth'] + "</heading>\n"\
-                    + "</IconStyle>\n"\
-                    + "</Style>\n"
-
-                ins_kml += "<Point>\n"\
-                    + "<coordinates>" + "%.9f,%.9f,%.3f" % (ins['lon'], ins['lat'], ins['hgt'] + ins['undulation']) + "</coordinates>\n"\
-                    + "</Point>\n"
-
-                ins_kml += "</Placemark>\n"
-
-        ins_kml += "</Folder>\n"\
+        ins_kml = "</Folder>\n"\
             + "</Document>\n"\
             + "</kml>\n"
 
         self.write_file(self.ins_kml_file, ins_kml)
 
+    def copy_placemarks(self, file):
+        """append placemarks to kml file"""
+        placemark_file = self.placemark_files[file]
+        placemark_file.seek(0)
+        shutil.copyfileobj(placemark_file, self.files[file])
+
     def output_gga_nmea(self, time, pos_type, blh, ns, dop, age):
         """output gga nmea"""
         gga = ''
@@ -750,11 +827,15 @@ class INS2000Parser:
         dms[2] = a
         dms[0] *= sign
 
-    def weeksecondstoutc(self, gpsweek, gpsseconds, leapseconds):
-        datetimeformat = "%Y-%m-%d %H:%M:%S"
-        epoch = datetime.datetime.strptime("1980-01-06 00:00:00",datetimeformat)
+    def gps_to_utc(self, gpsweek, gpsseconds, leapseconds):
+        """utc time struct of gps time, the last second is cached"""
         elapsed = datetime.timedelta(days=(gpsweek*7),seconds=(gpsseconds+leapseconds))
-        return datetime.datetime.strftime(epoch + elapsed,datetimeformat)
+        # whole seconds, as the time is formatted to "%Y-%m-%d %H:%M:%S"
+        key = elapsed.days * 86400 + elapsed.seconds
+        if self.utc_time_cache[0] != key:
+            epoch = datetime.datetime(1980, 1, 6)
+            self.utc_time_cache = (key, (epoch + datetime.timedelta(seconds=key)).timetuple())
+        return self.utc_time_cache[1]
 
     def write_file(self, file, data):
         if self.files[file] is not None: